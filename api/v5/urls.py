@@ -0,0 +1,6 @@
+from django.urls import path, include
+
+
+urlpatterns = [
+    path('books/', include('apps.books.urls_v5')),
+]
\ No newline at end of file
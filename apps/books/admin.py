@@ -3,7 +3,8 @@ from django.contrib import admin
 from .models import (
     Book, BookRent,
     BookReview, BookRating,
-    FavoriteBook,
+    FavoriteBook, BookUpload,
+    BookStats,
 )
 
 
@@ -11,4 +12,6 @@ admin.site.register(Book)
 admin.site.register(BookRent)
 admin.site.register(BookReview)
 admin.site.register(BookRating)
-admin.site.register(FavoriteBook)
\ No newline at end of file
+admin.site.register(FavoriteBook)
+admin.site.register(BookUpload)
+admin.site.register(BookStats)
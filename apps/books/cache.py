@@ -0,0 +1,184 @@
+import json
+import uuid
+import logging
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import parse_etags, quote_etag
+
+from redis.exceptions import RedisError
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from config.db_router import read_from_primary
+
+logger = logging.getLogger(__name__)
+
+
+class BookCache:
+    '''
+    Versioned response cache for the catalog list and detail endpoints.
+
+    Every cached entry key embeds a version token: one per book for detail responses and one
+    shared generation for list responses. Invalidation replaces the token, so the old entries
+    become unreachable at once and a response filled concurrently with a write can never be
+    served after it. Redis errors are logged and treated as a cache miss.
+    '''
+
+    list_version_key = 'books:list:version'
+
+    @staticmethod
+    def detail_version_key(book_uuid) -> str:
+        return f'books:detail:{book_uuid}:version'
+
+    @staticmethod
+    def entry_key(prefix: str, version: str, request) -> str:
+        '''
+        Build the key for one response variant. The host is part of the key because serialized
+        file and image URLs are absolute, and query parameters are sorted so the same filter set
+        always maps to the same key.
+        :param prefix:
+        :param version:
+        :param request:
+        :return:
+        '''
+
+        params = sorted(request.query_params.lists())
+        variant = json.dumps([request.get_host(), request.path, params])
+        digest = hashlib.sha1(variant.encode()).hexdigest()
+
+        return f'{prefix}:{version}:{digest}'
+
+    @staticmethod
+    def get(key: str):
+        try:
+            return cache.get(key)
+        except RedisError:
+            logger.warning('Books cache unavailable, reading %s from the database', key, exc_info=True)
+            return None
+
+    @staticmethod
+    def set(key: str, entry) -> None:
+        try:
+            cache.set(key, entry, settings.BOOKS_CACHE_TIMEOUT)
+        except RedisError:
+            logger.warning('Books cache unavailable, %s not stored', key, exc_info=True)
+
+    @staticmethod
+    async def aget(key: str):
+        try:
+            return await cache.aget(key)
+        except RedisError:
+            logger.warning('Books cache unavailable, reading %s from the database', key, exc_info=True)
+            return None
+
+    @staticmethod
+    async def aset(key: str, entry) -> None:
+        try:
+            await cache.aset(key, entry, settings.BOOKS_CACHE_TIMEOUT)
+        except RedisError:
+            logger.warning('Books cache unavailable, %s not stored', key, exc_info=True)
+
+    @staticmethod
+    def make_entry(data) -> dict:
+        '''
+        Build the cached form of a response body: the data and a strong ETag over it.
+        :param data:
+        :return:
+        '''
+
+        payload = json.dumps(data, sort_keys=True, default=str)
+        return {'data': data, 'etag': quote_etag(hashlib.sha1(payload.encode()).hexdigest())}
+
+    @staticmethod
+    def not_modified(request, entry: dict) -> bool:
+        etags = parse_etags(request.headers.get('If-None-Match', ''))
+        return entry['etag'] in etags or '*' in etags
+
+    @staticmethod
+    def invalidate_book(book_uuid) -> None:
+        '''
+        Drop the cached detail response of a book and every cached list page.
+        :param book_uuid:
+        :return:
+        '''
+
+        BookCache.invalidate_books([book_uuid])
+
+    @staticmethod
+    def invalidate_books(book_uuids) -> None:
+        '''
+        Drop the cached detail responses of several books and every cached list page, in one call.
+        :param book_uuids:
+        :return:
+        '''
+
+        versions = {BookCache.detail_version_key(book_uuid): uuid.uuid4().hex for book_uuid in set(book_uuids)}
+        if not versions:
+            return
+
+        try:
+            cache.set_many({**versions, BookCache.list_version_key: uuid.uuid4().hex}, None)
+        except RedisError:
+            logger.error('Books cache invalidation failed for %d books', len(versions), exc_info=True)
+
+    @staticmethod
+    def invalidate_list() -> None:
+        '''
+        Drop every cached list page, e.g. after books were inserted in bulk.
+        :return:
+        '''
+
+        try:
+            cache.set(BookCache.list_version_key, uuid.uuid4().hex, None)
+        except RedisError:
+            logger.error('Books cache invalidation failed for the list', exc_info=True)
+
+    @staticmethod
+    def invalidate_book_on_commit(book_uuid) -> None:
+        transaction.on_commit(lambda: BookCache.invalidate_book(book_uuid))
+
+    @staticmethod
+    def invalidate_books_on_commit(book_uuids) -> None:
+        book_uuids = list(book_uuids)
+        transaction.on_commit(lambda: BookCache.invalidate_books(book_uuids))
+
+
+class BookCacheMixin:
+    '''
+    View mixin serving GET responses from ``BookCache`` with ETag / If-None-Match support.
+    Views define ``get_cache_version_key`` to choose which version token their entries hang off.
+    Misses are rendered from the primary, so a lagging replica never fills the cache.
+    '''
+
+    cache_prefix = None
+
+    def get_cache_version_key(self) -> str:
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        version = BookCache.get(self.get_cache_version_key()) or '0'
+        key = BookCache.entry_key(self.cache_prefix, version, request)
+        entry = BookCache.get(key)
+
+        if entry is None:
+            with read_from_primary():
+                response = super().get(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+            entry = BookCache.make_entry(response.data)
+            BookCache.set(key, entry)
+        else:
+            response = None
+
+        if BookCache.not_modified(request, entry):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        elif response is None:
+            response = Response(entry['data'])
+
+        response['ETag'] = entry['etag']
+        return response
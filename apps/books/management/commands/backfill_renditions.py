@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from apps.users.models import User
+
+from utils.images import ImageRenditions
+
+from ...models import Book
+
+
+class Command(BaseCommand):
+    help = 'Queue the generation of missing or stale renditions of book covers and user avatars.'
+
+    targets = (
+        (Book, 'book_image', 'apps.books.tasks.generate_book_image_renditions'),
+        (User, 'avatar', 'apps.users.tasks.generate_avatar_renditions'),
+    )
+
+    def handle(self, *args, **options):
+        for model, field, task in self.targets:
+            stale = ImageRenditions.backfill(model.objects.all(), field, task)
+            self.stdout.write(f'{model._meta.label}: {stale} stale renditions queued')
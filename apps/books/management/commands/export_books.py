@@ -0,0 +1,34 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from config.db_router import read_from_replicas
+
+from ...services.book_export import BookExportServices
+
+
+class Command(BaseCommand):
+    help = 'Stream a dataset (books, rents, reviews or ratings) as NDJSON or CSV, reading from a replica when one is configured.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=BookExportServices.datasets)
+        parser.add_argument('--format', choices=BookExportServices.formats, default='ndjson')
+        parser.add_argument('--gzip', action='store_true', help='gzip the output')
+        parser.add_argument('--output', default='-', help="file to write, '-' for stdout")
+
+    def handle(self, *args, **options):
+        with read_from_replicas():
+            queryset = BookExportServices.get_queryset(options['dataset'])
+            queryset = queryset.using(queryset.db)
+
+        chunks = BookExportServices.stream(options['dataset'], queryset, options['format'], options['gzip'])
+
+        output = sys.stdout.buffer if options['output'] == '-' else open(options['output'], 'wb')
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+        finally:
+            if output is sys.stdout.buffer:
+                output.flush()
+            else:
+                output.close()
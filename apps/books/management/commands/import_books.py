@@ -0,0 +1,55 @@
+import sys
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.users.models import User
+
+from ...services.book_import import BookImportServices
+
+
+class Command(BaseCommand):
+    help = 'Import book metadata from a CSV or JSON Lines file in batches, reporting on every row.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or JSON Lines file, '-' to read from stdin")
+        parser.add_argument('--publisher', required=True, help='username of the publisher of the imported books')
+        parser.add_argument('--format', choices=BookImportServices.formats, help='default: guessed from the file extension')
+        parser.add_argument('--method', choices=BookImportServices.methods, default='copy')
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument('--report', help='write the per-row report as JSON Lines to this file instead of listing rejected rows')
+
+    def handle(self, *args, **options):
+        publisher = User.objects.filter(username=options['publisher']).first()
+        if publisher is None:
+            raise CommandError(f'User "{options["publisher"]}" does not exist')
+
+        format = options['format'] or BookImportServices.get_format(options['path'])
+        if format is None:
+            raise CommandError('Cannot guess the file format, pass --format')
+
+        source = sys.stdin if options['path'] == '-' else open(options['path'], encoding='utf-8-sig', newline='')
+        report_file = open(options['report'], 'w') if options['report'] else None
+
+        def report(result: dict) -> None:
+            if report_file is not None:
+                report_file.write(json.dumps(result) + '\n')
+            elif result['status'] != 'created':
+                self.stderr.write(f'line {result["line"]}: {result["status"]} {json.dumps(result.get("errors", result["isbn"]))}')
+
+        try:
+            summary = BookImportServices.import_books(
+                BookImportServices.read_rows(source, format), publisher, report,
+                batch_size=options['batch_size'], method=options['method'],
+            )
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            if report_file is not None:
+                report_file.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{summary["rows"]} rows in {summary["duration_s"]} s ({summary["rows_per_second"]} rows/s): '
+            f'{summary["created"]} created, {summary["exists"]} already in the catalog, '
+            f'{summary["duplicate"]} duplicated in the file, {summary["invalid"]} invalid'
+        ))
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-18 06:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0004_book_price_favoritebook_paid_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['rating', 'created_at', 'uuid'], name='book_rating_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.5 on 2026-10-18 06:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0007_book_upload'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bookrent',
+            index=models.Index(fields=['rent_end_date'], name='bookrent_end_date_idx'),
+        ),
+    ]
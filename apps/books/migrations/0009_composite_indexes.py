@@ -0,0 +1,53 @@
+# Generated by Django 5.2.5 on 2026-10-18 06:44
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0008_bookrent_end_date_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bookrent',
+            index=models.Index(fields=['book', 'renter', 'rent_end_date'], name='bookrent_book_renter_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookrent',
+            index=models.Index(fields=['renter', 'rent_end_date'], name='bookrent_renter_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookreview',
+            index=models.Index(fields=['book', 'created_at'], name='bookreview_book_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='favoritebook',
+            index=models.Index(fields=['user', 'added_at'], name='favoritebook_user_added_idx'),
+        ),
+        # The composite indexes lead with these foreign keys, so their own indexes are redundant.
+        migrations.AlterField(
+            model_name='bookrent',
+            name='book',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='books.book'),
+        ),
+        migrations.AlterField(
+            model_name='bookrent',
+            name='renter',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='bookreview',
+            name='book',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='books.book'),
+        ),
+        migrations.AlterField(
+            model_name='favoritebook',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
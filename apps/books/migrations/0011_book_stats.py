@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-18 07:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+BACKFILL_SQL = '''
+INSERT INTO books_bookstats (book_id, likes, reviews, favorites, active_rents, updated_at)
+SELECT
+    book.uuid,
+    (SELECT COUNT(*) FROM books_bookrating WHERE book_id = book.uuid),
+    (SELECT COUNT(*) FROM books_bookreview WHERE book_id = book.uuid),
+    (SELECT COUNT(*) FROM books_favoritebook WHERE book_id = book.uuid),
+    (SELECT COUNT(*) FROM books_bookrent WHERE book_id = book.uuid),
+    NOW()
+FROM books_book AS book
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0010_bookrent_stripe_session_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookStats',
+            fields=[
+                ('book', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='books.book')),
+                ('likes', models.PositiveIntegerField(default=0)),
+                ('reviews', models.PositiveIntegerField(default=0)),
+                ('favorites', models.PositiveIntegerField(default=0)),
+                ('active_rents', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'BookStats',
+                'verbose_name_plural': 'BooksStats',
+            },
+        ),
+        migrations.RunSQL(BACKFILL_SQL, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-18 07:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('books', '0011_book_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
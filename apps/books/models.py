@@ -1,6 +1,9 @@
 import uuid
 
 from django.db import models
+from django.db.models.functions import Upper
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 
 from ..users.models import User
 
@@ -14,42 +17,88 @@ class Book(models.Model):
     title = models.CharField(max_length=255)
     author = models.CharField(max_length=255)
     book_image = models.ImageField(upload_to='books_images/', null=True, blank=True)
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
     description = models.TextField(null=True, blank=True)
     published_date = models.DateField(null=True, blank=True)
     isbn = models.CharField(max_length=13, unique=True)
     count_of_pages = models.PositiveIntegerField(null=True, blank=True)
     language_iso = models.CharField(max_length=10, null=True, blank=True)
     file = models.FileField(upload_to='books/')
+    file_sha256 = models.CharField(max_length=64, null=True, blank=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     rating = models.PositiveIntegerField(default=0)
     publisher = models.ForeignKey(User, on_delete=models.CASCADE)
     ratings = models.PositiveIntegerField(default=0)
     price = models.DecimalField(max_digits=10, decimal_places=2)
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('title', weight='A', config='simple')
+            + SearchVector('isbn', weight='A', config='simple')
+            + SearchVector('author', weight='B', config='simple')
+            + SearchVector('description', weight='C', config='simple')
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True,
+    )
 
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Book'
         verbose_name_plural = 'Books'
+        indexes = [
+            models.Index(fields=['rating', 'created_at', 'uuid'], name='book_rating_keyset_idx'),
+            GinIndex(fields=['search_vector'], name='book_search_vector_idx'),
+            GinIndex(OpClass(Upper('title'), name='gin_trgm_ops'), name='book_title_trgm_idx'),
+            GinIndex(OpClass(Upper('author'), name='gin_trgm_ops'), name='book_author_trgm_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
 
+class BookUpload(models.Model):
+    '''
+    Model representing a resumable, chunked upload of a book file.
+    '''
+
+    uuid = models.UUIDField(default=uuid.uuid4, primary_key=True, editable=False)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    book = models.ForeignKey(Book, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'BookUpload'
+        verbose_name_plural = 'BookUploads'
+
+    def __str__(self) -> str:
+        return f'Upload {self.filename} by {self.owner.username}'
+
+
 class BookRent(models.Model):
     '''
     Model representing the rental of a book by a user.
     '''
 
     uuid = models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True)
-    book = models.ForeignKey(Book, on_delete=models.CASCADE)
-    renter = models.ForeignKey(User, on_delete=models.CASCADE)
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, db_index=False)
+    renter = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     rent_start_date = models.DateTimeField(auto_now_add=True)
     rent_end_date = models.DateTimeField()
+    stripe_session_id = models.CharField(max_length=255, unique=True, blank=True, null=True)
 
     class Meta:
         verbose_name = 'BookRent'
         verbose_name_plural = 'BookRents'
+        indexes = [
+            models.Index(fields=['rent_end_date'], name='bookrent_end_date_idx'),
+            models.Index(fields=['book', 'renter', 'rent_end_date'], name='bookrent_book_renter_end_idx'),
+            models.Index(fields=['renter', 'rent_end_date'], name='bookrent_renter_end_idx'),
+        ]
 
     def __str__(self) -> str:
         return f'Rent {self.book.title} by {self.renter.username}'
@@ -61,7 +110,7 @@ class BookReview(models.Model):
     '''
 
     uuid = models.UUIDField(primary_key=True, editable=False, default=uuid.uuid4)
-    book = models.ForeignKey(Book, on_delete=models.CASCADE)
+    book = models.ForeignKey(Book, on_delete=models.CASCADE, db_index=False)
     author = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     content = models.CharField(max_length=1000)
@@ -69,6 +118,9 @@ class BookReview(models.Model):
     class Meta:
         verbose_name = 'BookReview'
         verbose_name_plural = 'BooksReviews'
+        indexes = [
+            models.Index(fields=['book', 'created_at'], name='bookreview_book_created_idx'),
+        ]
 
     def __str__(self) -> str:
         return f'Review on {self.book.title} by {self.author.username}'
@@ -99,7 +151,7 @@ class FavoriteBook(models.Model):
 
     uuid = models.UUIDField(primary_key=True, editable=False, default=uuid.uuid4)
     book = models.ForeignKey(Book, on_delete=models.CASCADE)
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     added_at = models.DateTimeField(auto_now_add=True)
     paid = models.BooleanField(default=False)
     stripe_session_id = models.CharField(max_length=255, blank=True, null=True)
@@ -107,8 +159,33 @@ class FavoriteBook(models.Model):
     class Meta:
         unique_together = ('book', 'user')
         ordering = ['-added_at']
+        indexes = [
+            models.Index(fields=['user', 'added_at'], name='favoritebook_user_added_idx'),
+        ]
 
     def __str__(self) -> str:
         return f'{self.user.username}s favorite book - "{self.book.title}"'
 
 
+
+
+class BookStats(models.Model):
+    '''
+    Read model with the popularity counters of a book, so catalog endpoints can show them with a join
+    instead of counting rows. Counters are changed together with the event that moves them and repaired
+    by a periodic reconciliation against the source tables.
+    '''
+
+    book = models.OneToOneField(Book, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    likes = models.PositiveIntegerField(default=0)
+    reviews = models.PositiveIntegerField(default=0)
+    favorites = models.PositiveIntegerField(default=0)
+    active_rents = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'BookStats'
+        verbose_name_plural = 'BooksStats'
+
+    def __str__(self) -> str:
+        return f'Stats of "{self.book_id}"'
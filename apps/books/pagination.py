@@ -0,0 +1,204 @@
+import json
+import base64
+import binascii
+
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class BookKeysetPagination(BasePagination):
+    '''
+    Keyset (seek) pagination for the book catalog ordered on ``(rating, created_at, uuid)``.
+
+    The cursor is an opaque token holding the sort key of the last (or first) row of the
+    page, so every page is fetched with an index range scan instead of an OFFSET and deep
+    pages cost the same as the first one.
+    '''
+
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering = ('rating', 'created_at', 'uuid')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request)
+
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        '''
+        Async variant of ``paginate_queryset`` for views running on the async ORM.
+        '''
+
+        queryset = self.get_page_queryset(queryset, request)
+
+        return self.set_page([book async for book in queryset])
+
+    def get_page_queryset(self, queryset, request):
+        '''
+        Order and bound the queryset to the requested page plus one row, which tells whether
+        another page follows.
+        :param queryset:
+        :param request:
+        :return:
+        '''
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+
+        self.cursor = self.decode_cursor(request)
+        self.reverse = self.cursor is not None and self.cursor['reverse']
+
+        if self.reverse:
+            queryset = queryset.order_by(*('-' + field for field in self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if self.cursor is not None:
+            queryset = queryset.filter(self.get_keyset_filter(self.cursor['position'], self.reverse))
+
+        return queryset[:self.page_size + 1]
+
+    def set_page(self, results: list) -> list:
+        has_following = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if self.reverse:
+            results.reverse()
+            self.has_next = self.cursor is not None
+            self.has_previous = has_following
+        else:
+            self.has_next = has_following
+            self.has_previous = self.cursor is not None
+
+        self.page = results
+        return results
+
+    def get_page_size(self, request) -> int:
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_keyset_filter(self, position, reverse: bool) -> Q:
+        '''
+        Build the "row comes after the cursor" condition for the composite sort key.
+        The leading ``rating`` bound lets PostgreSQL start the range scan on the index.
+        :param position:
+        :param reverse:
+        :return:
+        '''
+
+        rating, created_at, uuid = position
+        op = 'lt' if reverse else 'gt'
+
+        return Q(**{f'rating__{op}e': rating}) & (
+            Q(**{f'rating__{op}': rating})
+            | Q(rating=rating, **{f'created_at__{op}': created_at})
+            | Q(rating=rating, created_at=created_at, **{f'uuid__{op}': uuid})
+        )
+
+    def get_position(self, book) -> tuple:
+        return book.rating, book.created_at, book.uuid
+
+    def encode_cursor(self, position, reverse: bool) -> str:
+        rating, created_at, uuid = position
+        payload = json.dumps(
+            {'r': rating, 'c': created_at.isoformat(), 'u': str(uuid), 'p': int(reverse)},
+            separators=(',', ':'),
+        )
+        token = base64.urlsafe_b64encode(payload.encode('ascii')).decode('ascii').rstrip('=')
+
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            created_at = parse_datetime(payload['c'])
+            if created_at is None:
+                raise ValueError
+            position = (int(payload['r']), created_at, str(payload['u']))
+            reverse = bool(int(payload['p']))
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+        return {'position': position, 'reverse': reverse}
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.get_position(self.page[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.get_position(self.page[0]), reverse=True)
+
+    def get_paginated_response(self, data) -> Response:
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data) -> OrderedDict:
+        return OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ])
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            },
+        ]
+
+
+class BookSearchPagination(LimitOffsetPagination):
+    '''
+    Limit/offset pagination for relevance-ordered search results, which have no stable keyset.
+    '''
+
+    default_limit = 20
+    max_limit = 100
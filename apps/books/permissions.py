@@ -10,4 +10,16 @@ class IsAdminOrLibrarian(BasePermission):
         if not request.user or not request.user.is_authenticated:
             return False
 
-        return request.user.role in ('admin', 'librarian')
\ No newline at end of file
+        return request.user.role in ('admin', 'librarian')
+
+
+class IsAdmin(BasePermission):
+    '''
+    Custom permission to only allow users with the 'admin' role.
+    '''
+
+    def has_permission(self, request, view) -> bool:
+        if not request.user or not request.user.is_authenticated:
+            return False
+
+        return request.user.role == 'admin'
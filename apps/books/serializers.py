@@ -1,52 +1,234 @@
 import os
+import re
 import magic
+import hashlib
+
+from django.conf import settings
+from django.core.files.storage import default_storage
 
 from .models import (
-    Book, BookRent, BookReview,
-    BookRating, FavoriteBook,
+    Book, BookRent, BookReview, BookRating,
+    BookStats, FavoriteBook, BookUpload,
 )
 
 from rest_framework import serializers
-from rest_framework.serializers import ModelSerializer
+
+from apps.users.models import User
+
+from config.instrumentation import InstrumentedModelSerializer
+
+from utils.images import ImageRenditions
+
+VALID_EXTENSIONS = ['.pdf', '.txt', '.epub']
+VALID_MIMES = ['application/pdf', 'text/plain', 'application/epub+zip']
+ISBN_RE = re.compile(r'^(\d{9}[\dX]|\d{13})$')
+
+
+def isbn13_check_digit(digits: str) -> str:
+    return str(-sum(int(digit) * (3 if index % 2 else 1) for index, digit in enumerate(digits)) % 10)
+
+
+def to_isbn13(isbn: str) -> str | None:
+    '''
+    Return the ISBN-13 of a compact ISBN-10 or ISBN-13 (see ``ISBN_RE``), or None when its
+    check digit is wrong. ISBN-10s get the 978 prefix, so both forms of a book compare equal.
+    '''
+
+    if len(isbn) == 10:
+        if sum((10 - index) * (10 if char == 'X' else int(char)) for index, char in enumerate(isbn)) % 11:
+            return None
+        digits = '978' + isbn[:9]
+    else:
+        if isbn13_check_digit(isbn[:12]) != isbn[12]:
+            return None
+        digits = isbn[:12]
+
+    return digits + isbn13_check_digit(digits)
 
 
-class BookSerializer(ModelSerializer):
+def validate_book_file_name(name: str) -> None:
+    ext = os.path.splitext(name)[1].lower()
+    if ext not in VALID_EXTENSIONS:
+        raise serializers.ValidationError({
+            'file': f'Unsupported file extension. Allowed: {', '.join(VALID_EXTENSIONS)}'
+        })
+
+
+def validate_book_file_size(size: int) -> None:
+    max_size = settings.BOOKS_FILE_MAX_SIZE
+    if size > max_size:
+        raise serializers.ValidationError({
+            'file': f'File too large. Maximum size is {max_size // (1024 * 1024)} MB.'
+        })
+
+
+def validate_book_file_mime(head: bytes) -> None:
+    mime = magic.from_buffer(head, mime=True)
+    if mime not in VALID_MIMES:
+        raise serializers.ValidationError({
+            'file': f'Unsupported file type. Allowed: {', '.join(VALID_MIMES)}'
+        })
+
+
+def compute_sha256(file, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: file.read(chunk_size), b''):
+        digest.update(chunk)
+    file.seek(0)
+
+    return digest.hexdigest()
+
+
+class ImageRenditionsField(serializers.Field):
     '''
-    Serializer for the Book model.
+    Read-only URLs of the thumbnails of an image field, by size and format, e.g.
+    ``{'thumb': {'webp': ..., 'jpeg': ...}}``. It is null while they are missing or stale;
+    they are generated on upload, and backfilled by the ``backfill_renditions`` command.
+    '''
+
+    def __init__(self, image_field: str, **kwargs):
+        self.image_field = image_field
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        return ImageRenditions.get_urls(instance, self.image_field, self.context.get('request'))
+
+
+class BookStatsSerializer(InstrumentedModelSerializer):
+    '''
+    Read-only serializer for the popularity counters of a book.
     '''
 
+    class Meta:
+        model = BookStats
+        fields = ('likes', 'reviews', 'favorites', 'active_rents')
+        read_only_fields = fields
+
+
+class BookSerializer(InstrumentedModelSerializer):
+    '''
+    Serializer for the Book model. Read querysets should ``select_related('stats')``.
+    '''
+
+    stats = BookStatsSerializer(read_only=True)
+    book_image_renditions = ImageRenditionsField('book_image')
+
     class Meta:
         model = Book
-        fields = '__all__'
+        exclude = ('search_vector', 'renditions')
+        read_only_fields = ('file_sha256',)
 
     def validate(self, attrs):
         file = attrs.get('file')
 
         if file:
-            ext = os.path.splitext(file.name)[1].lower()
-            valid_extensions = ['.pdf', '.txt', '.epub']
-            if ext not in valid_extensions:
-                raise serializers.ValidationError({
-                    'file': f'Unsupported file extension. Allowed: {', '.join(valid_extensions)}'
-                })
-
-            mime = magic.from_buffer(file.read(2048), mime=True)
+            validate_book_file_name(file.name)
+            validate_book_file_size(file.size)
+
+            validate_book_file_mime(file.read(2048))
             file.seek(0)
-            valid_mimes = ['application/pdf', 'text/plain', 'application/epub+zip']
-            if mime not in valid_mimes:
-                raise serializers.ValidationError({
-                    'file': f'Unsupported file type. Allowed: {', '.join(valid_mimes)}'
-                })
-
-            max_size = 50 * 1024 * 1024
-            if file.size > max_size:
-                raise serializers.ValidationError({
-                    'file': f'File too large. Maximum size is {max_size // (1024 * 1024)} MB.'
-                })
+
+            attrs['file_sha256'] = compute_sha256(file)
 
         return attrs
 
-class BookRentSerializer(ModelSerializer):
+
+class BookSummarySerializer(InstrumentedModelSerializer):
+    '''
+    Compact read-only representation of a book, embedded in list responses.
+    '''
+
+    book_image_renditions = ImageRenditionsField('book_image')
+
+    class Meta:
+        model = Book
+        fields = ('uuid', 'title', 'author', 'book_image', 'book_image_renditions', 'rating', 'price')
+        read_only_fields = fields
+
+
+class UserSummarySerializer(InstrumentedModelSerializer):
+    '''
+    Compact read-only representation of a user, embedded in list responses.
+    '''
+
+    avatar_renditions = ImageRenditionsField('avatar')
+
+    class Meta:
+        model = User
+        fields = ('id', 'username', 'avatar', 'avatar_renditions')
+        read_only_fields = fields
+
+
+class BookUploadSerializer(InstrumentedModelSerializer):
+    '''
+    Serializer for starting a chunked BookUpload. The declared size is checked before any bytes are sent.
+    '''
+
+    class Meta:
+        model = BookUpload
+        fields = ('uuid', 'filename', 'size', 'offset', 'book', 'created_at')
+        read_only_fields = ('offset', 'book')
+
+    def validate(self, attrs):
+        validate_book_file_name(attrs['filename'])
+        validate_book_file_size(attrs['size'])
+        attrs['filename'] = os.path.basename(attrs['filename'])
+
+        return attrs
+
+
+class BookUploadCommitSerializer(InstrumentedModelSerializer):
+    '''
+    Serializer for the book metadata sent when committing a finished BookUpload.
+    '''
+
+    class Meta:
+        model = Book
+        exclude = ('search_vector', 'renditions', 'file', 'file_sha256')
+
+
+class BookImportSerializer(InstrumentedModelSerializer):
+    '''
+    Serializer for one row of a bulk catalog import. ISBNs are normalised to ISBN-13 here and
+    checked for uniqueness in batches by the import, not per row, and ``file`` is the storage
+    name of a file that is already in place, so it is only checked to exist, not opened or sniffed.
+    '''
+
+    isbn = serializers.CharField(max_length=17)
+    file = serializers.CharField(max_length=100, required=False, default='')
+
+    class Meta:
+        model = Book
+        fields = (
+            'title', 'author', 'isbn', 'price', 'description', 'published_date',
+            'count_of_pages', 'language_iso', 'file',
+        )
+
+    def validate_isbn(self, value: str) -> str:
+        isbn = value.replace('-', '').replace(' ', '').upper()
+        if not ISBN_RE.match(isbn):
+            raise serializers.ValidationError('Enter a valid ISBN-10 or ISBN-13.')
+
+        isbn13 = to_isbn13(isbn)
+        if isbn13 is None:
+            raise serializers.ValidationError('ISBN check digit is wrong.')
+
+        return isbn13
+
+    def validate_file(self, value: str) -> str:
+        if not value:
+            return value
+        if os.path.splitext(value)[1].lower() not in VALID_EXTENSIONS:
+            raise serializers.ValidationError(f'Unsupported file extension. Allowed: {', '.join(VALID_EXTENSIONS)}')
+        if not default_storage.exists(value):
+            raise serializers.ValidationError('File does not exist in storage.')
+
+        return value
+
+
+class BookRentSerializer(InstrumentedModelSerializer):
     '''
     Serializer for the BookRent model.
     '''
@@ -56,7 +238,7 @@ class BookRentSerializer(ModelSerializer):
         fields = '__all__'
 
 
-class BookReviewSerializer(ModelSerializer):
+class BookReviewSerializer(InstrumentedModelSerializer):
     '''
     Serializer for the BookReview model.
     '''
@@ -66,7 +248,21 @@ class BookReviewSerializer(ModelSerializer):
         fields = '__all__'
 
 
-class BookRatingSerializer(ModelSerializer):
+class BookReviewReadSerializer(InstrumentedModelSerializer):
+    '''
+    Read-only serializer for BookReview that embeds a summary of the review author.
+    Expects the queryset to ``select_related('author')``.
+    '''
+
+    author = UserSummarySerializer(read_only=True)
+
+    class Meta:
+        model = BookReview
+        fields = ('uuid', 'book', 'author', 'content', 'created_at')
+        read_only_fields = fields
+
+
+class BookRatingSerializer(InstrumentedModelSerializer):
     '''
     Serializer for the BookRating model.
     '''
@@ -76,11 +272,25 @@ class BookRatingSerializer(ModelSerializer):
         fields = '__all__'
 
 
-class FavoriteBookSerializer(ModelSerializer):
+class FavoriteBookSerializer(InstrumentedModelSerializer):
     '''
     Serializer for the FavoriteBook model.
     '''
 
     class Meta:
         model = FavoriteBook
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+
+class FavoriteBookReadSerializer(InstrumentedModelSerializer):
+    '''
+    Read-only serializer for FavoriteBook that embeds a summary of the book.
+    Expects the queryset to ``select_related('book')``.
+    '''
+
+    book = BookSummarySerializer(read_only=True)
+
+    class Meta:
+        model = FavoriteBook
+        fields = ('uuid', 'book', 'user', 'added_at', 'paid')
+        read_only_fields = fields
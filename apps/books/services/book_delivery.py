@@ -0,0 +1,178 @@
+import os
+import re
+import mimetypes
+
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe, quote_etag
+
+from rest_framework import status
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class BookDeliveryServices:
+    '''
+    Service class for delivering book files with HTTP Range, ETag and Last-Modified support.
+
+    When ``BOOKS_FILE_OFFLOAD`` is set, Django only authorizes the read and hands the transfer
+    to the web server through an ``X-Accel-Redirect`` (nginx) or ``X-Sendfile`` (Apache) header.
+    '''
+
+    chunk_size = 64 * 1024
+
+    @staticmethod
+    def deliver(request, book) -> HttpResponse:
+        '''
+        Build the download response for an already authorized read of the book file.
+        :param request:
+        :param book:
+        :return:
+        '''
+
+        if not book.file:
+            raise Http404('File not found')
+
+        filename = os.path.basename(book.file.name)
+        last_modified = int(book.updated_at.timestamp())
+        etag = quote_etag(f'{book.uuid.hex}-{last_modified}')
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            offload = settings.BOOKS_FILE_OFFLOAD
+            if offload:
+                response = BookDeliveryServices.offload(book, offload)
+            else:
+                response = BookDeliveryServices.stream(request, book, etag, last_modified)
+            response['Content-Disposition'] = content_disposition_header(True, filename)
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    @staticmethod
+    def get_content_type(book) -> str:
+        return mimetypes.guess_type(book.file.name)[0] or 'application/octet-stream'
+
+    @staticmethod
+    def offload(book, mode: str) -> HttpResponse:
+        '''
+        Hand the transfer to the web server. The path is percent-encoded, which nginx and Apache
+        decode, so names with spaces or non-ASCII characters survive the header.
+        :param book:
+        :param mode: ``x-accel-redirect`` or ``x-sendfile``
+        :return:
+        '''
+
+        response = HttpResponse(content_type=BookDeliveryServices.get_content_type(book))
+
+        if mode == 'x-accel-redirect':
+            response['X-Accel-Redirect'] = quote(settings.BOOKS_FILE_ACCEL_PREFIX + book.file.name)
+        elif mode == 'x-sendfile':
+            response['X-Sendfile'] = quote(book.file.path)
+        else:
+            raise ValueError(f'Unknown BOOKS_FILE_OFFLOAD mode: {mode}')
+
+        return response
+
+    @staticmethod
+    def stream(request, book, etag: str, last_modified: int) -> HttpResponse:
+        size = book.file.size
+        byte_range = None
+
+        if BookDeliveryServices.range_applies(request, etag, last_modified):
+            byte_range = BookDeliveryServices.parse_range(request.headers.get('Range', ''), size)
+            if byte_range is False:
+                response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+
+        file = book.file.open('rb')
+
+        if byte_range is None:
+            response = FileResponse(file)
+        else:
+            start, end = byte_range
+            file.seek(start)
+            response = StreamingHttpResponse(
+                BookDeliveryServices.read_range(file, end - start + 1),
+                status=status.HTTP_206_PARTIAL_CONTENT,
+                content_type=BookDeliveryServices.get_content_type(book),
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = str(end - start + 1)
+
+        response['Accept-Ranges'] = 'bytes'
+        return response
+
+    @staticmethod
+    def range_applies(request, etag: str, last_modified: int) -> bool:
+        '''
+        A Range header is honoured unless an If-Range validator shows the client holds a stale copy.
+        :param request:
+        :param etag:
+        :param last_modified:
+        :return:
+        '''
+
+        if 'Range' not in request.headers:
+            return False
+
+        if_range = request.headers.get('If-Range')
+        if not if_range:
+            return True
+        if if_range.startswith('"'):
+            return if_range == etag
+
+        return parse_http_date_safe(if_range) == last_modified
+
+    @staticmethod
+    def parse_range(header: str, size: int):
+        '''
+        Parse a single ``bytes=`` range into inclusive offsets.
+        Returns None to serve the whole file (unsupported or multi-range headers)
+        and False when the range cannot be satisfied.
+        :param header:
+        :param size:
+        :return:
+        '''
+
+        match = RANGE_RE.match(header.strip())
+        if not match:
+            return None
+
+        first, last = match.groups()
+        if not first and not last:
+            return None
+        if size == 0:
+            return False
+
+        if not first:
+            length = int(last)
+            if length == 0:
+                return False
+            return max(size - length, 0), size - 1
+
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        if start >= size:
+            return False
+
+        end = min(int(last), size - 1) if last else size - 1
+        return start, end
+
+    @staticmethod
+    def read_range(file, length: int):
+        try:
+            while length > 0:
+                chunk = file.read(min(BookDeliveryServices.chunk_size, length))
+                if not chunk:
+                    break
+                length -= len(chunk)
+                yield chunk
+        finally:
+            file.close()
@@ -0,0 +1,106 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from redis.exceptions import RedisError
+
+from ..models import BookRent
+
+logger = logging.getLogger(__name__)
+
+
+class BookEntitlementServices:
+    '''
+    Answers "may this user read this book now?" from a cached entitlement set per user.
+
+    The set maps the uuid of every book the user has an active rent for to the end of the
+    latest such rent, as a timestamp. It is loaded with one query on a miss and dropped when
+    a rent of the user is created or deleted, including the raw deletes of the expiry job, so
+    a read is authorized by a cache hit. An entry past its end date no longer grants access,
+    even before the expiry job removed the rent. Redis errors fall back to the database.
+    '''
+
+    @staticmethod
+    def get_key(user_id) -> str:
+        return f'books:entitlements:{user_id}'
+
+    @staticmethod
+    def can_read(user, book_id) -> bool:
+        '''
+        :param user:
+        :param book_id: uuid of the book
+        :return: whether the user has an active rent for the book
+        '''
+
+        key = BookEntitlementServices.get_key(user.pk)
+        try:
+            entitlements = cache.get(key)
+        except RedisError:
+            logger.warning('Entitlements cache unavailable, reading rents of %s from the database', user.pk, exc_info=True)
+            entitlements = None
+
+        if entitlements is None:
+            entitlements = {
+                str(book_id): end.timestamp() for book_id, end in BookEntitlementServices.get_rents(user.pk)
+            }
+            try:
+                cache.set(key, entitlements, settings.BOOKS_ENTITLEMENTS_CACHE_TIMEOUT)
+            except RedisError:
+                logger.warning('Entitlements of %s not cached', user.pk, exc_info=True)
+
+        return entitlements.get(str(book_id), 0) > timezone.now().timestamp()
+
+    @staticmethod
+    async def acan_read(user, book_id) -> bool:
+        key = BookEntitlementServices.get_key(user.pk)
+        try:
+            entitlements = await cache.aget(key)
+        except RedisError:
+            logger.warning('Entitlements cache unavailable, reading rents of %s from the database', user.pk, exc_info=True)
+            entitlements = None
+
+        if entitlements is None:
+            entitlements = {
+                str(book_id): end.timestamp() async for book_id, end in BookEntitlementServices.get_rents(user.pk)
+            }
+            try:
+                await cache.aset(key, entitlements, settings.BOOKS_ENTITLEMENTS_CACHE_TIMEOUT)
+            except RedisError:
+                logger.warning('Entitlements of %s not cached', user.pk, exc_info=True)
+
+        return entitlements.get(str(book_id), 0) > timezone.now().timestamp()
+
+    @staticmethod
+    def get_rents(user_id):
+        '''
+        ``(book_id, end)`` of the active rents of a user, the latest rent per book. Read from the
+        primary: the result is cached, and a lagging replica would miss a rent just paid for.
+        '''
+
+        return BookRent.objects.using(DEFAULT_DB_ALIAS).filter(renter_id=user_id, rent_end_date__gt=timezone.now()).values(
+            'book_id',
+        ).annotate(end=Max('rent_end_date')).values_list('book_id', 'end')
+
+    @staticmethod
+    def invalidate(*user_ids) -> None:
+        if not user_ids:
+            return
+
+        try:
+            cache.delete_many([BookEntitlementServices.get_key(user_id) for user_id in set(user_ids)])
+        except RedisError:
+            logger.warning('Entitlements of %d users not invalidated', len(user_ids), exc_info=True)
+
+    @staticmethod
+    def invalidate_on_commit(*user_ids) -> None:
+        '''
+        Drop the entitlement sets now and once the transaction commits, so a set loaded from
+        the rents before the commit is not kept.
+        '''
+
+        BookEntitlementServices.invalidate(*user_ids)
+        transaction.on_commit(lambda: BookEntitlementServices.invalidate(*user_ids))
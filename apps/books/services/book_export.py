@@ -0,0 +1,169 @@
+import io
+import csv
+import json
+import zlib
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils.http import content_disposition_header
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from ..models import Book, BookRent, BookReview, BookRating
+
+encoder = DjangoJSONEncoder()
+
+
+class BookExportServices:
+    '''
+    Service class for streaming exports of the catalog, rentals, reviews and likes.
+
+    Rows are read with ``values_list(...).iterator(chunk_size=...)``, i.e. a server-side cursor on
+    PostgreSQL, rendered as NDJSON or CSV into buffers of ``BOOKS_EXPORT_BUFFER_SIZE`` bytes and
+    optionally gzipped on the fly, so memory stays constant whatever the size of the table.
+    '''
+
+    datasets = {
+        'books': (Book, (
+            'uuid', 'title', 'author', 'isbn', 'description', 'published_date', 'count_of_pages',
+            'language_iso', 'price', 'rating', 'publisher_id', 'file', 'book_image', 'created_at', 'updated_at',
+            'stats__likes', 'stats__reviews', 'stats__favorites', 'stats__active_rents',
+        )),
+        'rents': (BookRent, ('uuid', 'book_id', 'renter_id', 'rent_start_date', 'rent_end_date', 'stripe_session_id')),
+        'reviews': (BookReview, ('uuid', 'book_id', 'author_id', 'content', 'created_at')),
+        'ratings': (BookRating, ('uuid', 'book_id', 'user_id')),
+    }
+
+    formats = {
+        'ndjson': 'application/x-ndjson',
+        'csv': 'text/csv',
+    }
+
+    @staticmethod
+    def get_queryset(dataset: str):
+        model, fields = BookExportServices.datasets[dataset]
+        return model.objects.order_by('pk').values_list(*fields)
+
+    @staticmethod
+    def get_columns(dataset: str) -> list[str]:
+        return [field.replace('__', '_') for field in BookExportServices.datasets[dataset][1]]
+
+    @staticmethod
+    def render(dataset: str, queryset, format: str):
+        '''
+        Render the rows of ``queryset`` as NDJSON lines or CSV records.
+        :param dataset:
+        :param queryset: ``values_list`` queryset of the dataset
+        :param format: ``ndjson`` or ``csv``
+        :return: generator of text
+        '''
+
+        columns = BookExportServices.get_columns(dataset)
+        rows = queryset.iterator(chunk_size=settings.BOOKS_EXPORT_CHUNK_SIZE)
+
+        if format == 'ndjson':
+            for row in rows:
+                yield json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + '\n'
+            return
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow([
+                value if value is None or isinstance(value, (str, int, float)) else encoder.default(value)
+                for value in row
+            ])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+
+    @staticmethod
+    def stream(dataset: str, queryset, format: str, compress: bool = False):
+        '''
+        Encode the rendered rows into byte chunks of about ``BOOKS_EXPORT_BUFFER_SIZE``, gzipped if asked.
+        :param dataset:
+        :param queryset:
+        :param format:
+        :param compress:
+        :return: generator of bytes
+        '''
+
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+        buffer, size = [], 0
+
+        def flush() -> bytes:
+            data = ''.join(buffer).encode()
+            buffer.clear()
+            return compressor.compress(data) if compressor else data
+
+        for text in BookExportServices.render(dataset, queryset, format):
+            buffer.append(text)
+            size += len(text)
+            if size >= settings.BOOKS_EXPORT_BUFFER_SIZE:
+                size = 0
+                if chunk := flush():
+                    yield chunk
+
+        if chunk := flush():
+            yield chunk
+        if compressor:
+            yield compressor.flush()
+
+    @staticmethod
+    async def astream(chunks):
+        '''
+        Iterate a sync chunk generator from the event loop, one chunk per worker thread hop, so ASGI
+        servers stream it instead of consuming it whole. The thread-sensitive executor keeps every
+        step on the thread that owns the database cursor.
+        :param chunks:
+        :return:
+        '''
+
+        done = object()
+        while (chunk := await sync_to_async(next)(chunks, done)) is not done:
+            yield chunk
+
+    @staticmethod
+    def export(request, dataset: str) -> Response | StreamingHttpResponse:
+        '''
+        Stream a dataset as a file download. ``format`` picks NDJSON (default) or CSV and
+        ``gzip=1`` compresses the file.
+        :param request:
+        :param dataset:
+        :return:
+        '''
+
+        if dataset not in BookExportServices.datasets:
+            return Response({'error': 'Dataset not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        format = request.query_params.get('format', 'ndjson')
+        if format not in BookExportServices.formats:
+            return Response(
+                {'error': f'Unsupported format. Allowed: {", ".join(BookExportServices.formats)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        compress = request.query_params.get('gzip') in ('1', 'true')
+
+        # The rows are read after the view returns, so the database chosen for this request
+        # (a replica unless the user is pinned to the primary) is fixed now.
+        queryset = BookExportServices.get_queryset(dataset)
+        queryset = queryset.using(queryset.db)
+
+        chunks = BookExportServices.stream(dataset, queryset, format, compress)
+        if isinstance(request._request, ASGIRequest):
+            chunks = BookExportServices.astream(chunks)
+
+        filename = f'{dataset}.{format}' + ('.gz' if compress else '')
+        response = StreamingHttpResponse(
+            chunks,
+            content_type='application/gzip' if compress else BookExportServices.formats[format],
+        )
+        response['Content-Disposition'] = content_disposition_header(True, filename)
+        return response
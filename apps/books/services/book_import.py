@@ -0,0 +1,266 @@
+import os
+import csv
+import json
+import time
+import codecs
+import logging
+
+from collections import Counter
+from itertools import islice
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from ..cache import BookCache
+from ..models import Book, BookStats
+from ..serializers import BookImportSerializer
+
+logger = logging.getLogger(__name__)
+
+
+class BookImportServices:
+    '''
+    Service class for bulk imports of catalog metadata from CSV or JSON Lines.
+
+    Rows are streamed and handled in batches: every row is validated on its own, ISBNs are
+    deduplicated against the rest of the file and checked against the catalog with one query
+    per batch, and the new books of a batch are loaded with a single ``COPY`` (or ``bulk_create``).
+    Every row gets a report entry with its line number and outcome.
+    '''
+
+    formats = ('csv', 'jsonl')
+    methods = ('copy', 'bulk')
+
+    @staticmethod
+    def get_format(name: str, content_type: str = '') -> str | None:
+        extension = os.path.splitext(name)[1].lower()
+
+        if extension == '.csv' or 'csv' in content_type:
+            return 'csv'
+        if extension in ('.jsonl', '.ndjson') or 'ndjson' in content_type or 'jsonl' in content_type:
+            return 'jsonl'
+        return None
+
+    @staticmethod
+    def read_rows(lines, format: str):
+        '''
+        Parse text lines into ``(line number, row)`` pairs. Empty values are dropped, so optional
+        columns can be left blank; a line that is not a JSON object yields ``None`` as its row.
+        :param lines: iterable of text lines, e.g. a file opened with ``newline=''``
+        :param format: ``csv`` or ``jsonl``
+        :return:
+        '''
+
+        if format == 'csv':
+            reader = csv.DictReader(lines)
+            for row in reader:
+                yield reader.line_num, {
+                    key.strip(): value.strip()
+                    for key, value in row.items() if key and isinstance(value, str) and value.strip()
+                }
+            return
+
+        for line, text in enumerate(lines, 1):
+            if not text.strip():
+                continue
+            try:
+                row = json.loads(text)
+            except ValueError:
+                row = None
+
+            if isinstance(row, dict):
+                yield line, {key: value for key, value in row.items() if value not in (None, '')}
+            else:
+                yield line, None
+
+    @staticmethod
+    def import_books(rows, publisher, report=None, batch_size: int | None = None, method: str = 'copy') -> dict:
+        '''
+        Import parsed rows as books of ``publisher``.
+        :param rows: ``(line number, row)`` pairs, see ``read_rows``
+        :param publisher:
+        :param report: called with the report entry of every row, in input order
+        :param batch_size:
+        :param method: ``copy`` or ``bulk``
+        :return: summary with the outcome counts and the throughput in rows/sec
+        '''
+
+        started = time.monotonic()
+        batch_size = batch_size or settings.BOOKS_IMPORT_BATCH_SIZE
+        rows, seen, totals = iter(rows), set(), Counter()
+
+        while batch := list(islice(rows, batch_size)):
+            for result in BookImportServices.import_batch(batch, publisher, seen, method):
+                totals[result['status']] += 1
+                if report is not None:
+                    report(result)
+
+        if totals['created']:
+            BookCache.invalidate_list()
+
+        duration = time.monotonic() - started
+        count = sum(totals.values())
+        summary = {
+            'rows': count,
+            'created': totals['created'],
+            'duplicate': totals['duplicate'],
+            'exists': totals['exists'],
+            'invalid': totals['invalid'],
+            'duration_s': round(duration, 3),
+            'rows_per_second': round(count / duration, 1) if duration else None,
+        }
+
+        logger.info(
+            'Imported %d of %d books in %.1f s (%s rows/s)', summary['created'], count, duration,
+            summary['rows_per_second'], extra={
+                'method': method, 'rows': count, 'rows_created': summary['created'],
+                'rows_invalid': summary['invalid'], 'rows_per_second': summary['rows_per_second'],
+            },
+        )
+        return summary
+
+    @staticmethod
+    def import_batch(batch: list, publisher, seen: set, method: str) -> list[dict]:
+        '''
+        Validate, deduplicate and insert one batch of rows.
+        :param batch:
+        :param publisher:
+        :param seen: ISBNs met earlier in the file, updated in place
+        :param method:
+        :return: report entries of the batch
+        '''
+
+        results, books = [], {}
+        for line, row in batch:
+            if row is None:
+                results.append({'line': line, 'isbn': None, 'status': 'invalid', 'errors': ['Row is not a JSON object.']})
+                continue
+
+            serializer = BookImportSerializer(data=row)
+            if not serializer.is_valid():
+                results.append({'line': line, 'isbn': row.get('isbn'), 'status': 'invalid', 'errors': serializer.errors})
+                continue
+
+            isbn = serializer.validated_data['isbn']
+            result = {'line': line, 'isbn': isbn, 'status': 'duplicate' if isbn in seen else 'created'}
+            if isbn not in seen:
+                seen.add(isbn)
+                books[isbn] = (Book(publisher=publisher, **serializer.validated_data), result)
+            results.append(result)
+
+        for isbn in Book.objects.filter(isbn__in=list(books)).values_list('isbn', flat=True):
+            books.pop(isbn)[1]['status'] = 'exists'
+
+        created = BookImportServices.insert([book for book, _ in books.values()], method)
+        for book, result in books.values():
+            if book.uuid in created:
+                result['uuid'] = str(book.uuid)
+            else:
+                result['status'] = 'exists'
+
+        return results
+
+    @staticmethod
+    def insert(books: list[Book], method: str) -> set:
+        '''
+        Insert new books together with their zeroed stats rows.
+        A ``COPY`` that hits an ISBN inserted concurrently is retried with ``bulk_create``, which skips conflicts.
+        :param books:
+        :param method:
+        :return: uuids of the books actually inserted
+        '''
+
+        if not books:
+            return set()
+
+        with transaction.atomic():
+            if method == 'copy':
+                try:
+                    with transaction.atomic():
+                        BookImportServices.copy(books)
+                except IntegrityError:
+                    Book.objects.bulk_create(books, ignore_conflicts=True)
+            else:
+                Book.objects.bulk_create(books, ignore_conflicts=True)
+
+            created = set(Book.objects.filter(uuid__in=[book.uuid for book in books]).values_list('uuid', flat=True))
+            BookStats.objects.bulk_create([BookStats(book_id=book_uuid) for book_uuid in created], ignore_conflicts=True)
+
+        return created
+
+    @staticmethod
+    def copy(books: list[Book]) -> None:
+        '''
+        Load books with ``COPY ... FROM STDIN``. Values are prepared by the model fields, as for an ``INSERT``.
+        :param books:
+        :return:
+        '''
+
+        fields = [field for field in Book._meta.concrete_fields if not field.generated]
+        table = connection.ops.quote_name(Book._meta.db_table)
+        columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+
+        with connection.cursor() as cursor, connection.wrap_database_errors:
+            with cursor.copy(f'COPY {table} ({columns}) FROM STDIN') as copy:
+                for book in books:
+                    copy.write_row([field.get_db_prep_save(field.pre_save(book, True), connection) for field in fields])
+
+    @staticmethod
+    def import_upload(request) -> Response:
+        '''
+        Import an uploaded CSV or JSON Lines file and answer with the summary and the report of the
+        rejected rows. Uploads are capped at ``BOOKS_IMPORT_MAX_SIZE`` and the report at the first
+        ``BOOKS_IMPORT_REPORT_LIMIT`` rejected rows, larger catalogs go through ``import_books``.
+        :param request:
+        :return:
+        '''
+
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'No file was submitted'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if upload.size > settings.BOOKS_IMPORT_MAX_SIZE:
+            return Response(
+                {'error': f'File is larger than {settings.BOOKS_IMPORT_MAX_SIZE} bytes, use the import_books command'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+
+        format = request.data.get('format') or BookImportServices.get_format(upload.name, upload.content_type or '')
+        if format not in BookImportServices.formats:
+            return Response(
+                {'error': f'Unsupported format. Allowed: {", ".join(BookImportServices.formats)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        method = request.data.get('method', 'copy')
+        if method not in BookImportServices.methods:
+            return Response(
+                {'error': f'Unsupported method. Allowed: {", ".join(BookImportServices.methods)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        report, rejected = [], Counter()
+
+        def add_to_report(result: dict) -> None:
+            if result['status'] == 'created':
+                return
+            rejected['rows'] += 1
+            if len(report) < settings.BOOKS_IMPORT_REPORT_LIMIT:
+                report.append(result)
+
+        lines = codecs.iterdecode(upload, 'utf-8-sig')
+        try:
+            summary = BookImportServices.import_books(
+                BookImportServices.read_rows(lines, format), request.user, add_to_report, method=method,
+            )
+        except UnicodeDecodeError:
+            return Response(
+                {'error': 'File is not valid UTF-8', 'report': report, 'report_truncated': rejected['rows'] > len(report)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        code = status.HTTP_201_CREATED if summary['created'] else status.HTTP_200_OK
+        return Response({**summary, 'report': report, 'report_truncated': rejected['rows'] > len(report)}, status=code)
@@ -0,0 +1,454 @@
+import os
+import io
+import fcntl
+import gzip
+import json
+import uuid
+import shutil
+import logging
+import zipfile
+import posixpath
+
+from html.parser import HTMLParser
+from xml.etree import ElementTree
+
+from pypdf import PdfReader
+from pypdf.errors import PyPdfError
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from kombu.exceptions import OperationalError
+from redis.exceptions import RedisError
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from ..models import Book
+from .book_entitlements import BookEntitlementServices
+
+logger = logging.getLogger(__name__)
+
+BLOCK_TAGS = {'p', 'div', 'br', 'li', 'tr', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'blockquote', 'section', 'pre'}
+HEADING_TAGS = {'h1', 'h2', 'h3', 'title'}
+
+
+class XHTMLText(HTMLParser):
+    '''
+    Collects the text of an EPUB content document, one paragraph per block element,
+    and its first heading as the chapter title.
+    '''
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self.title = None
+        self.heading = None
+        self.skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ('script', 'style'):
+            self.skip += 1
+        elif tag in HEADING_TAGS and self.title is None:
+            self.heading = []
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style'):
+            self.skip = max(self.skip - 1, 0)
+        if tag in HEADING_TAGS and self.heading is not None:
+            self.title = ' '.join(''.join(self.heading).split()) or None
+            self.heading = None
+        if tag in BLOCK_TAGS:
+            self.parts.append('\n\n')
+
+    def handle_data(self, data):
+        if self.skip:
+            return
+        if self.heading is not None:
+            self.heading.append(data)
+        self.parts.append(data)
+
+    def get_text(self) -> str:
+        paragraphs = (' '.join(paragraph.split()) for paragraph in ''.join(self.parts).split('\n\n'))
+        return '\n\n'.join(paragraph for paragraph in paragraphs if paragraph)
+
+
+class BookPageServices:
+    '''
+    Service class for the per-page text store of book files.
+
+    An offline stage extracts the text of a book file into pages (PDF pages, or EPUB chapters and
+    plain text split at paragraph boundaries into pages of about ``BOOKS_PAGE_MAX_CHARS``) and
+    writes them under ``BOOKS_PAGES_DIR/<book uuid>/``: gzipped JSON chunks of
+    ``BOOKS_PAGES_PER_CHUNK`` pages, and an ``index.json`` with the page count, the chapters and
+    the file they were made from. Reading a page loads one small chunk instead of the whole file.
+    '''
+
+    extensions = ('.pdf', '.epub', '.txt')
+    # Errors of a malformed file, which another attempt would hit again. A KeyError is an EPUB
+    # that lacks a file its manifest or container names, a ValueError one with broken metadata.
+    parse_errors = (PyPdfError, zipfile.BadZipFile, ElementTree.ParseError, KeyError, ValueError)
+
+    @staticmethod
+    def get_dir(book_uuid) -> str:
+        return os.path.join(settings.BOOKS_PAGES_DIR, str(book_uuid))
+
+    @staticmethod
+    def read_index(book_uuid) -> dict | None:
+        try:
+            with open(os.path.join(BookPageServices.get_dir(book_uuid), 'index.json')) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def is_current(book: Book, index: dict | None) -> bool:
+        return index is not None and index['source'] == [book.file.name, book.file_sha256]
+
+    @staticmethod
+    def needs_extraction(book: Book) -> bool:
+        if not book.file or os.path.splitext(book.file.name)[1].lower() not in BookPageServices.extensions:
+            return False
+
+        return not BookPageServices.is_current(book, BookPageServices.read_index(book.uuid))
+
+    @staticmethod
+    def schedule(book: Book) -> None:
+        '''
+        Queue the extraction of a book file, at most once per file version for a few minutes.
+        :param book:
+        :return:
+        '''
+
+        key = f'books:pages:{book.uuid}:{book.file_sha256 or book.file.name}'
+        try:
+            if not cache.add(key, 1, settings.BOOKS_PAGES_SCHEDULE_TIMEOUT):
+                return
+
+            from ..tasks import extract_book_pages
+            extract_book_pages.delay(str(book.uuid))
+        except (RedisError, OperationalError):
+            logger.warning('Page extraction of book %s not queued', book.uuid, exc_info=True)
+
+    @staticmethod
+    def extract(book: Book) -> int:
+        '''
+        Extract the pages of a book file and replace its previous pages.
+
+        Extractions of one book take turns on a lock file in its directory, so one never removes
+        the pages another is writing, and a run that waited returns at once when the pages it
+        was asked for are already there. A file that cannot be parsed gets an index with no pages
+        and the error, so it is not retried; storage errors propagate, for the task to retry.
+        :param book:
+        :return: number of pages
+        '''
+
+        directory = BookPageServices.get_dir(book.uuid)
+        os.makedirs(directory, exist_ok=True)
+
+        with open(os.path.join(directory, '.lock'), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+            index = BookPageServices.read_index(book.uuid)
+            if BookPageServices.is_current(book, index):
+                return index['page_count']
+
+            return BookPageServices.write_pages(book, directory)
+
+    @staticmethod
+    def write_pages(book: Book, directory: str) -> int:
+        '''
+        Write the pages of a book file as a new version, then swap in its index and remove the
+        older versions. Called with the lock of the book held.
+        :param book:
+        :param directory:
+        :return: number of pages
+        '''
+
+        version = uuid.uuid4().hex
+        index = {
+            'source': [book.file.name, book.file_sha256],
+            'version': version,
+            'pages_per_chunk': settings.BOOKS_PAGES_PER_CHUNK,
+            'page_count': 0,
+            'chapters': [],
+            'error': None,
+        }
+
+        os.makedirs(os.path.join(directory, version))
+        chunk = []
+        try:
+            for chapter, text in BookPageServices.get_pages(book):
+                index['page_count'] += 1
+                if chapter and (not index['chapters'] or index['chapters'][-1]['title'] != chapter):
+                    index['chapters'].append({'title': chapter, 'page': index['page_count']})
+
+                chunk.append(text)
+                if len(chunk) == settings.BOOKS_PAGES_PER_CHUNK:
+                    BookPageServices.write_chunk(directory, version, index['page_count'], chunk)
+                    chunk = []
+
+            if chunk:
+                BookPageServices.write_chunk(directory, version, index['page_count'], chunk)
+        except BookPageServices.parse_errors as e:
+            logger.warning('Text extraction of book %s failed', book.uuid, exc_info=True)
+            index.update(page_count=0, chapters=[], error=str(e) or type(e).__name__)
+        except OSError:
+            shutil.rmtree(os.path.join(directory, version), ignore_errors=True)
+            raise
+
+        # The index is swapped in atomically, then the pages of older versions are removed.
+        temp_path = os.path.join(directory, f'index.{version}.tmp')
+        with open(temp_path, 'w') as file:
+            json.dump(index, file)
+        os.replace(temp_path, os.path.join(directory, 'index.json'))
+
+        for name in os.listdir(directory):
+            if name != version and os.path.isdir(os.path.join(directory, name)):
+                shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+        return index['page_count']
+
+    @staticmethod
+    def write_chunk(directory: str, version: str, last_page: int, pages: list[str]) -> None:
+        number = (last_page - 1) // settings.BOOKS_PAGES_PER_CHUNK
+        with gzip.open(os.path.join(directory, version, f'{number:06d}.json.gz'), 'wt', encoding='utf-8') as file:
+            json.dump(pages, file)
+
+    @staticmethod
+    def get_pages(book: Book):
+        '''
+        Yield ``(chapter title, text)`` for every page of the book file.
+        :param book:
+        :return:
+        '''
+
+        extension = os.path.splitext(book.file.name)[1].lower()
+
+        with book.file.open('rb') as file:
+            if extension == '.pdf':
+                for page in PdfReader(file).pages:
+                    yield None, (page.extract_text() or '').strip()
+            elif extension == '.epub':
+                for chapter, text in BookPageServices.read_epub(file):
+                    for page in BookPageServices.paginate(text.splitlines(keepends=True)):
+                        yield chapter, page
+            else:
+                for page in BookPageServices.paginate(io.TextIOWrapper(file, encoding='utf-8', errors='replace')):
+                    yield None, page
+
+    @staticmethod
+    def paginate(lines):
+        '''
+        Group lines into pages of at least ``BOOKS_PAGE_MAX_CHARS``, ending at a paragraph break when one
+        comes before twice that length.
+        :param lines:
+        :return:
+        '''
+
+        max_chars = settings.BOOKS_PAGE_MAX_CHARS
+        page, size = [], 0
+
+        for line in lines:
+            page.append(line)
+            size += len(line)
+            if (size >= max_chars and not line.strip()) or size >= 2 * max_chars:
+                if text := ''.join(page).strip():
+                    yield text
+                page, size = [], 0
+
+        if text := ''.join(page).strip():
+            yield text
+
+    @staticmethod
+    def read_epub(file):
+        '''
+        Yield ``(chapter title, text)`` for every content document of an EPUB, in reading order.
+        :param file:
+        :return:
+        '''
+
+        namespaces = {
+            'container': 'urn:oasis:names:tc:opendocument:xmlns:container',
+            'opf': 'http://www.idpf.org/2007/opf',
+        }
+
+        with zipfile.ZipFile(file) as archive:
+            container = ElementTree.fromstring(archive.read('META-INF/container.xml'))
+            rootfile = container.find('.//container:rootfile', namespaces)
+            opf_path = rootfile.get('full-path') if rootfile is not None else None
+            if not opf_path:
+                raise ValueError('EPUB container names no package document')
+
+            package = ElementTree.fromstring(archive.read(opf_path))
+            base = posixpath.dirname(opf_path)
+
+            manifest = {}
+            for item in package.iterfind('opf:manifest/opf:item', namespaces):
+                if not item.get('href'):
+                    raise ValueError(f'EPUB manifest item {item.get("id")} has no href')
+                manifest[item.get('id')] = posixpath.normpath(posixpath.join(base, item.get('href')))
+
+            for itemref in package.iterfind('opf:spine/opf:itemref', namespaces):
+                parser = XHTMLText()
+                parser.feed(archive.read(manifest[itemref.get('idref')]).decode('utf-8', errors='replace'))
+                if text := parser.get_text():
+                    yield parser.title, text
+
+    @staticmethod
+    def read_pages(book_uuid, index: dict, first: int, last: int) -> list[str]:
+        '''
+        Read pages ``first`` to ``last`` (1-based, inclusive) from their chunks.
+        :param book_uuid:
+        :param index:
+        :param first:
+        :param last:
+        :return:
+        '''
+
+        per_chunk = index['pages_per_chunk']
+        directory = os.path.join(BookPageServices.get_dir(book_uuid), index['version'])
+
+        pages = []
+        for number in range((first - 1) // per_chunk, (last - 1) // per_chunk + 1):
+            with gzip.open(os.path.join(directory, f'{number:06d}.json.gz'), 'rt', encoding='utf-8') as file:
+                chunk = json.load(file)
+
+            start = max(first - 1 - number * per_chunk, 0)
+            pages.extend(chunk[start:last - number * per_chunk])
+
+        return pages
+
+    @staticmethod
+    def get_index(request, book_uuid) -> tuple[dict | None, Response | None]:
+        '''
+        Authorize a paged read and load the page index of the book.
+        :param request:
+        :param book_uuid:
+        :return: the index, or the response to send instead
+        '''
+
+        book = Book.objects.filter(uuid=book_uuid).first()
+        if book is None:
+            return None, Response({'detail': 'No Book matches the given query.'}, status=status.HTTP_404_NOT_FOUND)
+
+        if not BookEntitlementServices.can_read(request.user, book.uuid):
+            return None, Response({'detail': 'You did not rent this book.'}, status=status.HTTP_403_FORBIDDEN)
+
+        if not book.file or os.path.splitext(book.file.name)[1].lower() not in BookPageServices.extensions:
+            return None, Response({'detail': 'This book has no readable file.'}, status=status.HTTP_404_NOT_FOUND)
+
+        index = BookPageServices.read_index(book.uuid)
+        if not BookPageServices.is_current(book, index):
+            BookPageServices.schedule(book)
+            response = Response({'detail': 'Pages are being prepared, retry shortly.'}, status=status.HTTP_202_ACCEPTED)
+            response['Retry-After'] = str(settings.BOOKS_PAGES_RETRY_AFTER)
+            return None, response
+
+        if index['error']:
+            return None, Response({'detail': 'No text could be extracted from this book.'}, status=status.HTTP_404_NOT_FOUND)
+
+        return index, None
+
+    @staticmethod
+    def cached(request, index: dict, key: str, data_func) -> Response:
+        '''
+        Answer with ``data_func()``, or 304 when the client has this version. Pages never change
+        within a version, so they can be cached privately.
+        :param request:
+        :param index:
+        :param key:
+        :param data_func:
+        :return:
+        '''
+
+        etag = quote_etag(f'{index["version"]}-{key}')
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = Response(data_func())
+
+        response['ETag'] = etag
+        response['Cache-Control'] = f'private, max-age={settings.BOOKS_PAGES_CACHE_MAX_AGE}'
+        return response
+
+    @staticmethod
+    def get_contents(request, book_uuid) -> Response:
+        '''
+        Table of contents of a rented book: the page count and the first page of every chapter.
+        :param request:
+        :param book_uuid:
+        :return:
+        '''
+
+        index, response = BookPageServices.get_index(request, book_uuid)
+        if response is not None:
+            return response
+
+        return BookPageServices.cached(request, index, 'contents', lambda: {
+            'page_count': index['page_count'],
+            'chapters': [
+                {
+                    'chapter': number,
+                    'title': chapter['title'],
+                    'first_page': chapter['page'],
+                    'last_page': BookPageServices.get_chapter_end(index, number),
+                }
+                for number, chapter in enumerate(index['chapters'], 1)
+            ],
+        })
+
+    @staticmethod
+    def get_page(request, book_uuid, page: int) -> Response:
+        '''
+        One page of a rented book.
+        :param request:
+        :param book_uuid:
+        :param page:
+        :return:
+        '''
+
+        index, response = BookPageServices.get_index(request, book_uuid)
+        if response is not None:
+            return response
+        if not 1 <= page <= index['page_count']:
+            return Response({'detail': 'Page not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        chapter = next((c['title'] for c in reversed(index['chapters']) if c['page'] <= page), None)
+        return BookPageServices.cached(request, index, f'page-{page}', lambda: {
+            'page': page,
+            'page_count': index['page_count'],
+            'chapter': chapter,
+            'text': BookPageServices.read_pages(book_uuid, index, page, page)[0],
+        })
+
+    @staticmethod
+    def get_chapter(request, book_uuid, chapter: int) -> Response:
+        '''
+        All pages of one chapter of a rented book.
+        :param request:
+        :param book_uuid:
+        :param chapter: 1-based chapter number from the table of contents
+        :return:
+        '''
+
+        index, response = BookPageServices.get_index(request, book_uuid)
+        if response is not None:
+            return response
+        if not 1 <= chapter <= len(index['chapters']):
+            return Response({'detail': 'Chapter not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        first, last = index['chapters'][chapter - 1]['page'], BookPageServices.get_chapter_end(index, chapter)
+        return BookPageServices.cached(request, index, f'chapter-{chapter}', lambda: {
+            'chapter': chapter,
+            'title': index['chapters'][chapter - 1]['title'],
+            'first_page': first,
+            'last_page': last,
+            'pages': BookPageServices.read_pages(book_uuid, index, first, last),
+        })
+
+    @staticmethod
+    def get_chapter_end(index: dict, chapter: int) -> int:
+        chapters = index['chapters']
+        return chapters[chapter]['page'] - 1 if chapter < len(chapters) else index['page_count']
@@ -1,17 +1,18 @@
-import stripe
-
 from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 
-from datetime import timedelta
-
 from ..models import Book, BookRent
+from .book_entitlements import BookEntitlementServices
+from .book_stats import BookStatsServices
+from .rent_expiry import RentExpiryServices
 
 from rest_framework.response import Response
 from rest_framework import status
 
-stripe.api_key = settings.STRIPE_API_KEY
+from config.db_router import pin_to_primary
+from utils.payments import get_payments_client, PaymentsClient, PaymentsUnavailable
 
 
 class BookRentServices:
@@ -40,23 +41,9 @@ class BookRentServices:
             return Response({'message': 'You already have an active rental for this book'})
 
         try:
-            checkout_session = stripe.checkout.Session.create(
-                payment_method_types=['card'],
-                line_items=[{
-                    'price_data': {
-                        'currency': 'usd',
-                        'product_data': {
-                            'name': book.title,
-                        },
-                        'unit_amount': int(book.price * 100),
-                    },
-                    'quantity': 1,
-                }],
-                mode='payment',
-                success_url=settings.STRIPE_SUCCESS_URL,
-                cancel_url=settings.STRIPE_CANCEL_URL,
-                client_reference_id=str(request.user.id),
-            )
+            checkout_session = get_payments_client().create_book_checkout_session(book, request.user)
+        except (PaymentsUnavailable, *PaymentsClient.outage_errors):
+            return Response({'error': 'Payments are temporarily unavailable'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -79,7 +66,7 @@ class BookRentServices:
         except (User.DoesNotExist, Book.DoesNotExist):
             return None
 
-        rent_end_date = timezone.now() + timedelta(days=14)
+        rent_end_date = timezone.now() + settings.BOOKS_RENT_DURATION
         rental = BookRent.objects.create(
             book=book,
             renter=user,
@@ -87,6 +74,57 @@ class BookRentServices:
         )
         return rental
 
+    @staticmethod
+    def create_rentals_after_payment(sessions: list[dict]) -> int:
+        '''
+        Create the rentals for a batch of paid checkout sessions in one insert.
+        Sessions already turned into a rental, or pointing at a missing book or user, are skipped,
+        so replayed webhook events are harmless. The bulk insert sends no signals, so the
+        ``active_rents`` counters and the renters' entitlements are updated here, for the rows
+        actually inserted.
+        :param sessions: dicts with ``session_id``, ``book_uuid`` and ``user_id``
+        :return: number of rentals created
+        '''
+
+        User = get_user_model()
+
+        sessions = list({session['session_id']: session for session in sessions}.values())
+        session_ids = [session['session_id'] for session in sessions]
+
+        existing = set(BookRent.objects.filter(stripe_session_id__in=session_ids).values_list('stripe_session_id', flat=True))
+        books = {str(uuid) for uuid in Book.objects.filter(
+            uuid__in=[session['book_uuid'] for session in sessions]
+        ).values_list('uuid', flat=True)}
+        users = {str(pk) for pk in User.objects.filter(
+            id__in=[session['user_id'] for session in sessions]
+        ).values_list('id', flat=True)}
+
+        rent_end_date = timezone.now() + settings.BOOKS_RENT_DURATION
+        rentals = [
+            BookRent(
+                book_id=session['book_uuid'],
+                renter_id=session['user_id'],
+                rent_end_date=rent_end_date,
+                stripe_session_id=session['session_id'],
+            )
+            for session in sessions
+            if session['session_id'] not in existing and session['book_uuid'] in books and session['user_id'] in users
+        ]
+
+        with transaction.atomic():
+            BookRent.objects.bulk_create(rentals, ignore_conflicts=True)
+            # Rows skipped as conflicts, e.g. a session inserted by a concurrent drain, are not returned
+            inserted = set(BookRent.objects.filter(uuid__in=[rental.uuid for rental in rentals]).values_list('uuid', flat=True))
+            rentals = [rental for rental in rentals if rental.uuid in inserted]
+
+            BookStatsServices.record('active_rents', [rental.book_id for rental in rentals])
+            BookEntitlementServices.invalidate_on_commit(*{rental.renter_id for rental in rentals})
+        for rental in rentals:
+            RentExpiryServices.schedule(rental)
+        pin_to_primary(*{rental.renter_id for rental in rentals})
+
+        return len(rentals)
+
     @staticmethod
     def unrent_book(request, book_uuid) -> Response:
         user = request.user
@@ -0,0 +1,133 @@
+import time
+import logging
+
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+
+from ..cache import BookCache
+from ..models import Book, BookStats, BookRating, BookReview, FavoriteBook, BookRent
+
+logger = logging.getLogger(__name__)
+
+
+class BookStatsServices:
+    '''
+    Service class maintaining the ``BookStats`` read model.
+
+    Every like, review, favorite and rent moves its counter with a single ``UPDATE ... SET x = x + n``
+    (or an upsert for books without a stats row yet) in the transaction of the event itself, so
+    concurrent events never overwrite each other. Paths that bypass model signals, such as bulk
+    inserts and raw deletes, call ``record`` directly. ``reconcile`` recounts the source tables
+    and repairs whatever drifted. Both drop the cached responses of the books whose counters
+    moved once the change is committed, as the counters are part of those responses.
+    '''
+
+    counters = ('likes', 'reviews', 'favorites', 'active_rents')
+
+    sources = {
+        'likes': BookRating,
+        'reviews': BookReview,
+        'favorites': FavoriteBook,
+        'active_rents': BookRent,
+    }
+
+    @staticmethod
+    def record(counter: str, book_ids, delta: int = 1) -> None:
+        '''
+        Move ``counter`` by ``delta`` for every book id, once per occurrence.
+        Decrements never create rows and never go below zero, so the deletes cascading from a
+        removed book are harmless.
+        :param counter: one of ``BookStatsServices.counters``
+        :param book_ids:
+        :param delta:
+        :return:
+        '''
+
+        if counter not in BookStatsServices.counters:
+            raise ValueError(f'Unknown book counter: {counter}')
+
+        changes = Counter()
+        for book_id in book_ids:
+            changes[str(book_id)] += delta
+        if not changes:
+            return
+
+        # Rows are locked in key order, so concurrent batches cannot deadlock.
+        book_ids = sorted(changes)
+        params = [book_ids, [changes[book_id] for book_id in book_ids]]
+        table = connection.ops.quote_name(BookStats._meta.db_table)
+
+        if delta > 0:
+            columns = ', '.join(BookStatsServices.counters)
+            values = ', '.join('d.n' if name == counter else '0' for name in BookStatsServices.counters)
+            sql = (
+                f'INSERT INTO {table} (book_id, {columns}, updated_at) '
+                f'SELECT d.book_id, {values}, NOW() FROM unnest(%s::uuid[], %s::integer[]) AS d(book_id, n) '
+                f'ON CONFLICT (book_id) DO UPDATE SET {counter} = {table}.{counter} + EXCLUDED.{counter}, '
+                f'updated_at = EXCLUDED.updated_at'
+            )
+        else:
+            sql = (
+                f'UPDATE {table} SET {counter} = GREATEST({table}.{counter} + d.n, 0), updated_at = NOW() '
+                f'FROM unnest(%s::uuid[], %s::integer[]) AS d(book_id, n) WHERE {table}.book_id = d.book_id'
+            )
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+        BookCache.invalidate_books_on_commit(book_ids)
+
+    @staticmethod
+    def reconcile(batch_size: int | None = None) -> int:
+        '''
+        Recount every counter from the source tables, walking the catalog in key-ordered batches,
+        and rewrite the stats rows that drifted or are missing.
+        :param batch_size:
+        :return: number of stats rows repaired
+        '''
+
+        started = time.monotonic()
+        batch_size = batch_size or settings.BOOKS_STATS_RECONCILE_BATCH_SIZE
+        quote = connection.ops.quote_name
+
+        table = quote(BookStats._meta.db_table)
+        books = quote(Book._meta.db_table)
+        counts = ', '.join(
+            f'(SELECT COUNT(*) FROM {quote(model._meta.db_table)} WHERE book_id = book.uuid)'
+            for model in BookStatsServices.sources.values()
+        )
+        columns = ', '.join(BookStatsServices.counters)
+        current = ', '.join(f'{table}.{name}' for name in BookStatsServices.counters)
+        excluded = ', '.join(f'EXCLUDED.{name}' for name in BookStatsServices.counters)
+
+        sql = (
+            f'INSERT INTO {table} (book_id, {columns}, updated_at) '
+            f'SELECT book.uuid, {counts}, NOW() FROM {books} AS book '
+            f'WHERE book.uuid = ANY(%s) '
+            f'ON CONFLICT (book_id) DO UPDATE SET ({columns}, updated_at) = ({excluded}, EXCLUDED.updated_at) '
+            f'WHERE ({current}) IS DISTINCT FROM ({excluded}) '
+            f'RETURNING book_id'
+        )
+
+        repaired, queryset = 0, Book.objects.order_by('uuid').values_list('uuid', flat=True)
+        batch = list(queryset[:batch_size])
+        while batch:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [batch])
+                book_ids = [book_id for book_id, in cursor.fetchall()]
+
+            repaired += len(book_ids)
+            BookCache.invalidate_books_on_commit(book_ids)
+
+            if len(batch) < batch_size:
+                break
+            batch = list(queryset.filter(uuid__gt=batch[-1])[:batch_size])
+
+        duration_ms = (time.monotonic() - started) * 1000
+        logger.info(
+            'Reconciled book stats, %d rows repaired in %.1f ms', repaired, duration_ms,
+            extra={'rows_repaired': repaired, 'duration_ms': duration_ms},
+        )
+        return repaired
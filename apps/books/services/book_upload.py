@@ -0,0 +1,198 @@
+import os
+import re
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from rest_framework import status, serializers
+from rest_framework.response import Response
+
+from ..models import Book, BookUpload
+from ..serializers import (
+    BookSerializer, BookUploadSerializer, BookUploadCommitSerializer,
+    compute_sha256, validate_book_file_mime,
+)
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+class BookUploadServices:
+    '''
+    Service class for resumable, chunked uploads of book files.
+
+    Chunks are appended to a part file on local disk and must arrive in order, so a client
+    resumes an interrupted upload from the ``offset`` reported by the server. Only a bounded
+    read buffer is held in memory per request, whatever the size of the file.
+    '''
+
+    read_size = 64 * 1024
+
+    @staticmethod
+    def get_part_path(upload: BookUpload) -> str:
+        return os.path.join(settings.BOOKS_UPLOAD_TEMP_DIR, f'{upload.uuid}.part')
+
+    @staticmethod
+    def get_upload(upload_uuid, user) -> BookUpload | None:
+        return BookUpload.objects.filter(uuid=upload_uuid, owner=user, book__isnull=True).first()
+
+    @staticmethod
+    def start_upload(request) -> Response:
+        '''
+        Register a new upload. The declared file name and size are validated before any bytes are sent.
+        :param request:
+        :return:
+        '''
+
+        serializer = BookUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.save(owner=request.user)
+
+        os.makedirs(settings.BOOKS_UPLOAD_TEMP_DIR, exist_ok=True)
+        open(BookUploadServices.get_part_path(upload), 'wb').close()
+
+        data = dict(serializer.data, chunk_size=settings.BOOKS_UPLOAD_CHUNK_SIZE)
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    @staticmethod
+    def get_status(request, upload_uuid) -> Response:
+        upload = BookUploadServices.get_upload(upload_uuid, request.user)
+        if upload is None:
+            return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response(BookUploadSerializer(upload).data)
+
+    @staticmethod
+    def upload_chunk(request, upload_uuid) -> Response:
+        '''
+        Write one chunk described by the ``Content-Range`` header at the current upload offset.
+        :param request:
+        :param upload_uuid:
+        :return:
+        '''
+
+        upload = BookUploadServices.get_upload(upload_uuid, request.user)
+        if upload is None:
+            return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        match = CONTENT_RANGE_RE.match(request.headers.get('Content-Range', ''))
+        if not match:
+            return Response({'error': 'Content-Range header is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        start, end, total = (int(value) for value in match.groups())
+        length = end - start + 1
+
+        if total != upload.size or end >= upload.size or length <= 0:
+            return Response({'error': 'Invalid Content-Range'}, status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        if length > settings.BOOKS_UPLOAD_CHUNK_SIZE:
+            return Response(
+                {'error': f'Chunk too large. Maximum size is {settings.BOOKS_UPLOAD_CHUNK_SIZE} bytes.'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        if start != upload.offset:
+            return Response({'error': 'Unexpected offset', 'offset': upload.offset}, status=status.HTTP_409_CONFLICT)
+
+        stream = request.stream
+        written = 0
+        with open(BookUploadServices.get_part_path(upload), 'r+b') as part:
+            part.seek(start)
+            while stream is not None and written < length:
+                chunk = stream.read(min(BookUploadServices.read_size, length - written))
+                if not chunk:
+                    break
+                if start == 0 and written == 0:
+                    try:
+                        validate_book_file_mime(chunk[:2048])
+                    except serializers.ValidationError as e:
+                        return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
+                part.write(chunk)
+                written += len(chunk)
+
+        if written != length:
+            return Response(
+                {'error': 'Chunk body is shorter than its Content-Range', 'offset': upload.offset},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        updated = BookUpload.objects.filter(uuid=upload.uuid, offset=start).update(
+            offset=end + 1, updated_at=timezone.now()
+        )
+        if not updated:
+            upload.refresh_from_db()
+            return Response({'error': 'Unexpected offset', 'offset': upload.offset}, status=status.HTTP_409_CONFLICT)
+
+        return Response({'uuid': upload.uuid, 'offset': end + 1, 'size': upload.size})
+
+    @staticmethod
+    def commit_upload(request, upload_uuid) -> Response:
+        '''
+        Attach a fully received upload to a new Book. Files already stored with the same SHA-256
+        digest are reused instead of being written again. The upload row is locked for the whole
+        commit, so a retried or concurrent commit waits and then gets a 409 instead of a second book.
+        :param request:
+        :param upload_uuid:
+        :return:
+        '''
+
+        serializer = BookUploadCommitSerializer(data=request.data)
+
+        with transaction.atomic():
+            upload = BookUpload.objects.select_for_update().filter(uuid=upload_uuid, owner=request.user).first()
+            if upload is None:
+                return Response({'error': 'Upload not found'}, status=status.HTTP_404_NOT_FOUND)
+            if upload.book_id is not None:
+                return Response(
+                    {'error': 'Upload is already committed', 'book': upload.book_id}, status=status.HTTP_409_CONFLICT,
+                )
+            if upload.offset != upload.size:
+                return Response({'error': 'Upload is incomplete', 'offset': upload.offset}, status=status.HTTP_409_CONFLICT)
+
+            serializer.is_valid(raise_exception=True)
+
+            part_path = BookUploadServices.get_part_path(upload)
+            with open(part_path, 'rb') as part:
+                try:
+                    validate_book_file_mime(part.read(2048))
+                except serializers.ValidationError as e:
+                    return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
+                part.seek(0)
+
+                digest = compute_sha256(part)
+                duplicate = Book.objects.filter(file_sha256=digest).exclude(file='').values_list('file', flat=True).first()
+
+                if duplicate:
+                    book = serializer.save(file=duplicate, file_sha256=digest)
+                else:
+                    book = serializer.save(file=File(part, name=upload.filename), file_sha256=digest)
+                upload.book = book
+                upload.save(update_fields=['book', 'updated_at'])
+
+            transaction.on_commit(lambda: BookUploadServices.remove_part(part_path))
+
+        return Response(BookSerializer(book, context={'request': request}).data, status=status.HTTP_201_CREATED)
+
+    @staticmethod
+    def remove_part(part_path: str) -> None:
+        try:
+            os.remove(part_path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def delete_stale_uploads() -> int:
+        '''
+        Remove uncommitted uploads, and their part files, that stopped receiving chunks.
+        :return:
+        '''
+
+        stale = BookUpload.objects.filter(
+            book__isnull=True,
+            updated_at__lt=timezone.now() - settings.BOOKS_UPLOAD_EXPIRY,
+        )
+
+        for upload in stale:
+            BookUploadServices.remove_part(BookUploadServices.get_part_path(upload))
+
+        deleted, _ = stale.delete()
+        return deleted
@@ -1,5 +1,10 @@
+from django.db import transaction
+from django.db.models import F
+
 from rest_framework.response import Response
+from rest_framework import status
 
+from ..cache import BookCache
 from ..models import BookRating, Book
 from ..serializers import BookRatingSerializer
 
@@ -8,6 +13,8 @@ from ..serializers import BookRatingSerializer
 class BooksRatingServices:
     '''
     Service class for handling book rating operations such as liking and disliking books.
+    The like counter on ``Book.rating`` is only ever changed with single-column ``F()`` updates,
+    so concurrent likes cannot overwrite each other and the rest of the row is left untouched.
     '''
 
     @staticmethod
@@ -19,43 +26,43 @@ class BooksRatingServices:
         :return:
         '''
 
-        book = Book.objects.get(uuid=book_uuid)
-        rating, created = BookRating.objects.get_or_create(
-            book=book,
-            user=user
-        )
+        if not Book.objects.filter(uuid=book_uuid).exists():
+            return Response({'error': 'Book not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        with transaction.atomic():
+            rating, created = BookRating.objects.get_or_create(
+                book_id=book_uuid,
+                user=user
+            )
+
+            if not created:
+                return Response({'message': 'You have already liked this book'})
 
-        if not created:
-            return Response({'message': 'You have already liked this book'})
-        else:
-            serializer = BookRatingSerializer(rating)
-            book.rating += 1
-            book.save()
+            Book.objects.filter(uuid=book_uuid).update(rating=F('rating') + 1)
+            BookCache.invalidate_book_on_commit(book_uuid)
 
-            return Response(serializer.data)
+        serializer = BookRatingSerializer(rating)
+        return Response(serializer.data)
 
     @staticmethod
     def dislike_book(book_uuid, user) -> tuple[bool, str]:
         '''
-        Method to dislike (remove like) from a book. Only the user who liked the book or an admin can remove the like.
+        Method to dislike (remove like) from a book. Only the like left by the user is removed.
         :param book_uuid:
         :param user:
         :return:
         '''
 
-        user = user
+        if not Book.objects.filter(uuid=book_uuid).exists():
+            return False, 'Book not found'
 
-        try:
-            book = Book.objects.get(uuid=book_uuid)
-            rating = BookRating.objects.get(book=book)
+        with transaction.atomic():
+            deleted, _ = BookRating.objects.filter(book_id=book_uuid, user=user).delete()
 
-            if user.role == 'admin' or rating.user == user:
-                rating.delete()
-                book.rating -= 1
-                book.save()
-                return True, 'Disliked successfully'
+            if not deleted:
+                return False, 'Like not found'
 
-        except Book.DoesNotExist:
-            return False, 'Book not found'
-        except BookRating.DoesNotExist:
-            return False, 'Like not found'
\ No newline at end of file
+            Book.objects.filter(uuid=book_uuid, rating__gt=0).update(rating=F('rating') - 1)
+            BookCache.invalidate_book_on_commit(book_uuid)
+
+        return True, 'Disliked successfully'
@@ -0,0 +1,89 @@
+import re
+
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+from django.db.models import F, Q, QuerySet
+from django.db.models.functions import Greatest, Upper
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+
+from ..models import Book
+
+
+class BooksSearchServices:
+    '''
+    Service class for ranked full-text search over the book catalog.
+    '''
+
+    max_terms = 8
+    similarity_threshold = 0.3
+
+    @staticmethod
+    def get_terms(query: str) -> list[str]:
+        '''
+        Split the raw query into lowercase word tokens safe to embed in a tsquery.
+        :param query:
+        :return:
+        '''
+
+        return re.findall(r'\w+', query.lower())[:BooksSearchServices.max_terms]
+
+    @staticmethod
+    def search(query: str) -> QuerySet:
+        '''
+        Search books by title, author, description and ISBN.
+        Every term is prefix-matched against the ``search_vector`` GIN index, and titles or authors
+        within trigram word similarity of the query are included to tolerate typos.
+        :param query:
+        :return:
+        '''
+
+        terms = BooksSearchServices.get_terms(query)
+        if not terms:
+            return Book.objects.none()
+
+        text = ' '.join(terms)
+        ts_query = SearchQuery(
+            ' & '.join(f'{term}:*' for term in terms),
+            search_type='raw',
+            config='simple',
+        )
+
+        return (
+            Book.objects.select_related('publisher', 'stats')
+            .alias(title_upper=Upper('title'), author_upper=Upper('author'))
+            .filter(
+                Q(search_vector=ts_query)
+                | Q(title_upper__trigram_word_similar=text)
+                | Q(author_upper__trigram_word_similar=text)
+            )
+            .annotate(
+                rank=SearchRank(F('search_vector'), ts_query),
+                similarity=Greatest(
+                    TrigramWordSimilarity(text, 'title_upper'),
+                    TrigramWordSimilarity(text, 'author_upper'),
+                ),
+            )
+            .order_by('-rank', '-similarity', 'uuid')
+        )
+
+    @staticmethod
+    @contextmanager
+    def typo_tolerance(threshold: float | None = None):
+        '''
+        Lower pg_trgm's word similarity threshold for the duration of a transaction,
+        so the index-backed ``%>`` operator also matches misspelled words.
+        :param threshold:
+        :return:
+        '''
+
+        if threshold is None:
+            threshold = BooksSearchServices.similarity_threshold
+
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)",
+                    [str(threshold)],
+                )
+            yield
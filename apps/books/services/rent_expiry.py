@@ -0,0 +1,145 @@
+import time
+import uuid
+import logging
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from redis.exceptions import RedisError
+
+from config.redis import get_redis
+
+from ..models import BookRent
+from .book_entitlements import BookEntitlementServices
+from .book_stats import BookStatsServices
+
+logger = logging.getLogger(__name__)
+
+
+class RentExpiryServices:
+    '''
+    Service class for expiring overdue book rents.
+
+    Rents are removed with batched raw deletes over the ``rent_end_date`` index, bounded in rows
+    per statement and in time per run, so a backlog never turns into one huge transaction or
+    loads the rows into Python. Raw deletes send no signals, so each batch also takes its rents
+    off the ``active_rents`` counters and drops the entitlements of their renters. With the ``redis`` backend, rents are also registered in a
+    sorted set scored by their end time and each run only pops the ones that are due.
+    '''
+
+    timer_key = 'books:rent_expiry'
+
+    @staticmethod
+    def expire(full_sweep: bool = False) -> int:
+        '''
+        Expire overdue rents with the configured backend and return how many were removed.
+        :param full_sweep:
+        :return:
+        '''
+
+        started = time.monotonic()
+        backend = 'database' if full_sweep else settings.BOOKS_RENT_EXPIRY_BACKEND
+
+        if backend == 'redis':
+            expired = RentExpiryServices.expire_scheduled()
+        else:
+            expired = RentExpiryServices.expire_due()
+
+        duration_ms = (time.monotonic() - started) * 1000
+        logger.info(
+            'Expired %d rents in %.1f ms', len(expired), duration_ms,
+            extra={'backend': backend, 'rows_expired': len(expired), 'duration_ms': duration_ms},
+        )
+        return len(expired)
+
+    @staticmethod
+    def expire_due(now=None, batch_size: int | None = None, time_budget: float | None = None) -> list[tuple]:
+        '''
+        Delete overdue rents in index-ordered batches until none are left or the time budget is spent.
+        :param now:
+        :param batch_size:
+        :param time_budget:
+        :return: ``(book_id, renter_id)`` of every expired rent
+        '''
+
+        now = now or timezone.now()
+        batch_size = batch_size or settings.BOOKS_RENT_EXPIRY_BATCH_SIZE
+        deadline = time.monotonic() + (time_budget or settings.BOOKS_RENT_EXPIRY_TIME_BUDGET)
+        table = connection.ops.quote_name(BookRent._meta.db_table)
+
+        sql = (
+            f'DELETE FROM {table} WHERE uuid IN ('
+            f'SELECT uuid FROM {table} WHERE rent_end_date <= %s '
+            f'ORDER BY rent_end_date LIMIT %s FOR UPDATE SKIP LOCKED'
+            f') RETURNING book_id, renter_id'
+        )
+
+        expired = []
+        while True:
+            batch = RentExpiryServices.delete(sql, [now, batch_size])
+            expired.extend(batch)
+            if len(batch) < batch_size or time.monotonic() >= deadline:
+                return expired
+
+    @staticmethod
+    def expire_scheduled(now=None, batch_size: int | None = None) -> list[tuple]:
+        '''
+        Pop due rents from the Redis timer and delete them by primary key.
+        :param now:
+        :param batch_size:
+        :return: ``(book_id, renter_id)`` of every expired rent
+        '''
+
+        now = now or timezone.now()
+        batch_size = batch_size or settings.BOOKS_RENT_EXPIRY_BATCH_SIZE
+        table = connection.ops.quote_name(BookRent._meta.db_table)
+        client = get_redis()
+
+        sql = (
+            f'DELETE FROM {table} WHERE uuid = ANY(%s) AND rent_end_date <= %s '
+            f'RETURNING book_id, renter_id'
+        )
+
+        expired = []
+        while True:
+            members = client.zrangebyscore(RentExpiryServices.timer_key, '-inf', now.timestamp(), start=0, num=batch_size)
+            if not members:
+                return expired
+
+            expired.extend(RentExpiryServices.delete(sql, [[uuid.UUID(m.decode()) for m in members], now]))
+            client.zrem(RentExpiryServices.timer_key, *members)
+
+            if len(members) < batch_size:
+                return expired
+
+    @staticmethod
+    def delete(sql: str, params: list) -> list[tuple]:
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                expired = cursor.fetchall()
+
+            BookStatsServices.record('active_rents', [book_id for book_id, _ in expired], -1)
+            BookEntitlementServices.invalidate_on_commit(*{renter_id for _, renter_id in expired})
+            return expired
+
+    @staticmethod
+    def schedule(rent: BookRent) -> None:
+        if settings.BOOKS_RENT_EXPIRY_BACKEND != 'redis':
+            return
+
+        try:
+            get_redis().zadd(RentExpiryServices.timer_key, {str(rent.uuid): rent.rent_end_date.timestamp()})
+        except RedisError:
+            logger.warning('Rent %s not scheduled for expiry, the hourly sweep will remove it', rent.uuid, exc_info=True)
+
+    @staticmethod
+    def unschedule(rent_uuid) -> None:
+        if settings.BOOKS_RENT_EXPIRY_BACKEND != 'redis':
+            return
+
+        try:
+            get_redis().zrem(RentExpiryServices.timer_key, str(rent_uuid))
+        except RedisError:
+            logger.warning('Rent %s not removed from the expiry timer', rent_uuid, exc_info=True)
@@ -0,0 +1,184 @@
+import json
+import uuid
+import logging
+
+import stripe
+
+from django.conf import settings
+
+from kombu.exceptions import OperationalError
+from redis.exceptions import RedisError
+
+from rest_framework.response import Response
+from rest_framework import status
+
+from config.redis import get_redis
+
+from .book_rent import BookRentServices
+
+logger = logging.getLogger(__name__)
+
+
+class StripeWebhookServices:
+    '''
+    Service class for Stripe webhook ingestion.
+
+    The HTTP handler only verifies the signature and appends the paid checkout session to a
+    Redis list, so a checkout spike never turns into database load on the web workers. A Celery
+    task drains the list in batches and creates the rentals idempotently by ``stripe_session_id``.
+    '''
+
+    buffer_key = 'books:stripe_checkouts'
+    drain_key = 'books:stripe_checkouts:drain'
+    processing_key = 'books:stripe_checkouts:processing'
+    lease_key = 'books:stripe_checkouts:lease'
+    workers_key = 'books:stripe_checkouts:workers'
+    handled_events = ('checkout.session.completed', 'checkout.session.async_payment_succeeded')
+
+    @staticmethod
+    def receive(request) -> Response:
+        '''
+        Verify a webhook request, buffer its checkout session and acknowledge it.
+        :param request:
+        :return:
+        '''
+
+        try:
+            event = stripe.Webhook.construct_event(
+                request.body, request.headers.get('Stripe-Signature', ''), settings.STRIPE_WEBHOOK_SECRET,
+            )
+        except (ValueError, stripe.SignatureVerificationError):
+            return Response({'error': 'Invalid payload or signature'}, status=status.HTTP_400_BAD_REQUEST)
+
+        session = StripeWebhookServices.parse_session(event)
+        if session is None:
+            return Response({'received': True})
+
+        try:
+            client = get_redis()
+            client.rpush(StripeWebhookServices.buffer_key, json.dumps(session))
+            schedule_drain = client.set(StripeWebhookServices.drain_key, 1, nx=True, ex=60)
+        except RedisError:
+            logger.warning('Stripe event %s not buffered, asking Stripe to retry', event['id'], exc_info=True)
+            return Response({'error': 'Temporarily unavailable'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        if schedule_drain:
+            from ..tasks import drain_stripe_events
+
+            try:
+                drain_stripe_events.delay()
+            except OperationalError:
+                logger.warning('Drain task not queued, the periodic drain will pick event %s up', event['id'], exc_info=True)
+
+        return Response({'received': True})
+
+    @staticmethod
+    def parse_session(event) -> dict | None:
+        '''
+        Extract the rental of a paid checkout session from a webhook event.
+        :param event:
+        :return: ``session_id``, ``book_uuid`` and ``user_id``, or None for events that create no rental
+        '''
+
+        if event['type'] not in StripeWebhookServices.handled_events:
+            return None
+
+        session = event['data']['object']
+        if session.get('payment_status') != 'paid':
+            return None
+
+        metadata = session.get('metadata') or {}
+        try:
+            return {
+                'session_id': session['id'],
+                'book_uuid': str(uuid.UUID(metadata['book_uuid'])),
+                'user_id': str(uuid.UUID(metadata.get('user_id') or session.get('client_reference_id'))),
+            }
+        except (KeyError, TypeError, ValueError):
+            logger.warning('Checkout session %s carries no rental metadata', session.get('id'))
+            return None
+
+    @staticmethod
+    def get_processing_key(worker: str) -> str:
+        return f'{StripeWebhookServices.processing_key}:{worker}'
+
+    @staticmethod
+    def get_lease_key(worker: str) -> str:
+        return f'{StripeWebhookServices.lease_key}:{worker}'
+
+    @staticmethod
+    def requeue_orphans(client) -> int:
+        '''
+        Put back into the buffer the sessions of drains that died between taking a batch and
+        committing its rentals. A drain is dead once its lease has expired.
+        :param client:
+        :return: number of sessions put back
+        '''
+
+        requeued = 0
+        for worker in client.smembers(StripeWebhookServices.workers_key):
+            worker = worker.decode()
+            if client.exists(StripeWebhookServices.get_lease_key(worker)):
+                continue
+
+            processing_key = StripeWebhookServices.get_processing_key(worker)
+            while client.lmove(processing_key, StripeWebhookServices.buffer_key, 'RIGHT', 'LEFT') is not None:
+                requeued += 1
+            client.srem(StripeWebhookServices.workers_key, worker)
+
+        if requeued:
+            logger.warning('Requeued %s checkout sessions left behind by dead drains', requeued)
+
+        return requeued
+
+    @staticmethod
+    def drain(batch_size: int | None = None) -> int:
+        '''
+        Turn every buffered checkout session into a rental, one batch at a time.
+
+        Each batch is moved atomically into a processing list of this drain and only removed
+        from it once its rentals are committed, so a worker killed in between loses nothing:
+        the next drain requeues the list after the drain's lease expires. Rentals are created
+        idempotently, so a session handled twice still makes one rental.
+        :param batch_size:
+        :return: number of rentals created
+        '''
+
+        batch_size = batch_size or settings.STRIPE_WEBHOOK_BATCH_SIZE
+        client = get_redis()
+        client.delete(StripeWebhookServices.drain_key)
+        StripeWebhookServices.requeue_orphans(client)
+
+        worker = uuid.uuid4().hex
+        processing_key = StripeWebhookServices.get_processing_key(worker)
+        lease_key = StripeWebhookServices.get_lease_key(worker)
+        client.sadd(StripeWebhookServices.workers_key, worker)
+
+        created = 0
+        while True:
+            client.set(lease_key, 1, ex=settings.STRIPE_WEBHOOK_DRAIN_LEASE)
+
+            pipe = client.pipeline()
+            for _ in range(batch_size):
+                pipe.lmove(StripeWebhookServices.buffer_key, processing_key, 'LEFT', 'RIGHT')
+            items = [item for item in pipe.execute() if item is not None]
+
+            if not items:
+                break
+
+            try:
+                created += BookRentServices.create_rentals_after_payment([json.loads(item) for item in items])
+            except Exception:
+                client.pipeline().rpush(StripeWebhookServices.buffer_key, *items).delete(processing_key).execute()
+                raise
+
+            pipe = client.pipeline()
+            for item in items:
+                pipe.lrem(processing_key, 1, item)
+            pipe.execute()
+
+            if len(items) < batch_size:
+                break
+
+        client.pipeline().srem(StripeWebhookServices.workers_key, worker).delete(lease_key).execute()
+        return created
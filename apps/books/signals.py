@@ -0,0 +1,115 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from django.db import transaction
+
+from utils.images import ImageRenditions
+
+from .cache import BookCache
+from .models import Book, BookRent, BookStats, FavoriteBook
+from .services.book_entitlements import BookEntitlementServices
+from .services.book_pages import BookPageServices
+from .services.book_stats import BookStatsServices
+from .services.rent_expiry import RentExpiryServices
+
+
+@receiver([post_save, post_delete], sender=Book)
+def invalidate_book_cache(sender, instance, **kwargs) -> None:
+    '''
+    Drop cached catalog responses once a book change is committed.
+    '''
+
+    BookCache.invalidate_book_on_commit(instance.uuid)
+
+
+@receiver(post_save, sender=Book)
+def schedule_book_image_renditions(sender, instance, **kwargs) -> None:
+    '''
+    Render the thumbnails of a new or changed cover once the book is committed.
+    '''
+
+    if ImageRenditions.is_stale(instance, 'book_image'):
+        transaction.on_commit(
+            lambda: ImageRenditions.schedule(instance, 'book_image', 'apps.books.tasks.generate_book_image_renditions')
+        )
+
+
+@receiver(post_save, sender=Book)
+def schedule_book_pages(sender, instance, **kwargs) -> None:
+    '''
+    Extract the pages of a new or replaced book file once the book is committed.
+    '''
+
+    if BookPageServices.needs_extraction(instance):
+        transaction.on_commit(lambda: BookPageServices.schedule(instance))
+
+
+@receiver(post_save, sender=Book)
+def create_book_stats(sender, instance, created, **kwargs) -> None:
+    '''
+    Start every new book with zeroed counters.
+    '''
+
+    if created and not kwargs.get('raw'):
+        BookStats.objects.get_or_create(book=instance)
+
+
+@receiver([post_save, post_delete], sender=FavoriteBook)
+def invalidate_favorite_book_cache(sender, instance, **kwargs) -> None:
+    '''
+    Drop cached catalog responses of a book added to or removed from favorites.
+    '''
+
+    BookCache.invalidate_book_on_commit(instance.book_id)
+
+
+
+@receiver(post_save, sender=BookRent)
+def schedule_rent_expiry(sender, instance, **kwargs) -> None:
+    '''
+    Register the end of a rent in the expiry timer once it is committed.
+    '''
+
+    transaction.on_commit(lambda: RentExpiryServices.schedule(instance))
+
+
+@receiver(post_delete, sender=BookRent)
+def unschedule_rent_expiry(sender, instance, **kwargs) -> None:
+    '''
+    Drop a deleted rent from the expiry timer.
+    '''
+
+    transaction.on_commit(lambda: RentExpiryServices.unschedule(instance.uuid))
+
+
+@receiver([post_save, post_delete], sender=BookRent)
+def invalidate_rent_entitlements(sender, instance, **kwargs) -> None:
+    '''
+    Drop the cached entitlements of a user whose rent was created, changed or deleted.
+    '''
+
+    BookEntitlementServices.invalidate_on_commit(instance.renter_id)
+
+
+def count_book_event(sender, instance, created, **kwargs) -> None:
+    '''
+    Count a new like, review, favorite or rent in the stats of its book.
+    '''
+
+    if created and not kwargs.get('raw'):
+        BookStatsServices.record(STATS_COUNTERS[sender], [instance.book_id])
+
+
+def uncount_book_event(sender, instance, **kwargs) -> None:
+    '''
+    Remove a deleted like, review, favorite or rent from the stats of its book.
+    '''
+
+    BookStatsServices.record(STATS_COUNTERS[sender], [instance.book_id], -1)
+
+
+STATS_COUNTERS = {model: counter for counter, model in BookStatsServices.sources.items()}
+
+for model in STATS_COUNTERS:
+    post_save.connect(count_book_event, sender=model, dispatch_uid=f'count_book_event_{model.__name__}')
+    post_delete.connect(uncount_book_event, sender=model, dispatch_uid=f'uncount_book_event_{model.__name__}')
@@ -1,14 +1,78 @@
 from celery import shared_task
 
-from django.utils import timezone
+from django.conf import settings
 
-from .models import BookRent
+from utils.images import ImageRenditions
+
+from .cache import BookCache
+from .models import Book
+
+from .services.book_pages import BookPageServices
+from .services.book_stats import BookStatsServices
+from .services.book_upload import BookUploadServices
+from .services.rent_expiry import RentExpiryServices
+from .services.stripe_webhook import StripeWebhookServices
 
 
 @shared_task
-def check_rent_status() -> None:
+def check_rent_status(full_sweep: bool = False) -> int:
     '''
-    Task to check and update the status of book rents.
+    Task to expire overdue book rents. Returns the number of rents removed.
     '''
 
-    BookRent.objects.filter(rent_end_date__lte=timezone.now()).delete()
\ No newline at end of file
+    return RentExpiryServices.expire(full_sweep=full_sweep)
+
+
+@shared_task
+def delete_stale_uploads() -> int:
+    '''
+    Task to remove chunked uploads that were abandoned before being committed.
+    '''
+
+    return BookUploadServices.delete_stale_uploads()
+
+
+@shared_task
+def drain_stripe_events() -> int:
+    '''
+    Task to create the rentals of buffered Stripe checkout sessions. Returns the number created.
+    '''
+
+    return StripeWebhookServices.drain()
+
+
+@shared_task
+def reconcile_book_stats() -> int:
+    '''
+    Task to recount the per-book statistics and repair drifted counters. Returns the number of rows repaired.
+    '''
+
+    return BookStatsServices.reconcile()
+
+
+@shared_task
+def generate_book_image_renditions(book_uuid: str) -> None:
+    '''
+    Task to render the thumbnails of a book cover and drop cached responses still pointing at the old ones.
+    '''
+
+    book = Book.objects.filter(uuid=book_uuid).first()
+    if book is None or not ImageRenditions.is_stale(book, 'book_image'):
+        return
+
+    if ImageRenditions.generate(book, 'book_image', settings.BOOKS_IMAGE_RENDITIONS) is not None:
+        BookCache.invalidate_book(book.uuid)
+
+
+@shared_task(autoretry_for=(OSError,), retry_backoff=True, max_retries=3)
+def extract_book_pages(book_uuid: str) -> int:
+    '''
+    Task to extract the text of a book file into the per-page store. Returns the number of pages.
+    Storage errors are retried with backoff.
+    '''
+
+    book = Book.objects.filter(uuid=book_uuid).first()
+    if book is None or not BookPageServices.needs_extraction(book):
+        return 0
+
+    return BookPageServices.extract(book)
@@ -0,0 +1,48 @@
+import fakeredis
+import pytest
+
+from django.core.cache import cache
+
+from apps.books.throttling import TOKEN_BUCKETS
+from config.redis import get_redis
+
+
+@pytest.fixture(autouse=True)
+def fake_redis_cache(settings):
+    '''
+    Point the cache at an in-process fake Redis, so tests neither need a server nor share state.
+    '''
+
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': 'redis://fakeredis:6379/1',
+            'OPTIONS': {'connection_class': fakeredis.FakeRedisConnection},
+        }
+    }
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def fake_redis_store(settings):
+    '''
+    Point the shared Redis client at an in-process fake Redis as well.
+    '''
+
+    settings.REDIS_STORE_OPTIONS = {'connection_class': fakeredis.FakeRedisConnection}
+    settings.REDIS_STORE_URL = 'redis://fakeredis:6379/2'
+    get_redis().flushdb()
+    yield
+    get_redis().flushdb()
+
+
+@pytest.fixture(autouse=True)
+def memory_throttle(settings):
+    '''
+    Keep throttle buckets in memory, as fakeredis runs no Lua, and start every test with full buckets.
+    '''
+
+    settings.THROTTLE_BACKEND = 'memory'
+    TOKEN_BUCKETS['memory'].clear()
@@ -0,0 +1,99 @@
+import pytest
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.books.models import Book
+from apps.users.authentication import UserPrincipalCache
+from apps.users.models import User
+
+
+@pytest.fixture(autouse=True)
+def caches():
+    cache.clear()
+    UserPrincipalCache.local.clear()
+
+
+@pytest.fixture
+def test_user(db) -> User:
+    return User.objects.create_user(username='admin2', password='password123', role='admin')
+
+
+@pytest.fixture
+def api_client(test_user) -> APIClient:
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(test_user)}')
+
+    return client
+
+
+def user_queries(queries) -> list[str]:
+    return [query['sql'] for query in queries if User._meta.db_table in query['sql'].split('FROM')[-1]]
+
+
+def test_warm_requests_do_not_query_the_user(api_client, test_user):
+    api_client.get('/api/v4/books/list/')
+
+    with CaptureQueriesContext(connection) as queries:
+        assert api_client.get('/api/v4/books/my-favorites/').status_code == 200
+    assert user_queries(queries) == []
+
+    UserPrincipalCache.local.clear()
+    with CaptureQueriesContext(connection) as queries:
+        assert api_client.get('/api/v4/books/my-favorites/').status_code == 200
+    assert user_queries(queries) == []
+
+
+def test_principal_is_a_lazy_user(api_client, test_user):
+    book = Book.objects.create(title='Title', author='John Doe', publisher=test_user, isbn=10, price=10)
+    response = api_client.patch(f'/api/v4/books/{book.uuid}/update/', {'title': 'New title'}, format='json')
+
+    assert response.status_code == 200
+    user = UserPrincipalCache.get_user(UserPrincipalCache.get(str(test_user.id)))
+    assert (user.pk, user.username, user.role) == (test_user.pk, 'admin2', 'admin')
+    assert user.email == test_user.email
+
+
+def test_role_change_is_seen_at_once(api_client, test_user):
+    assert api_client.get('/api/v4/books/export/books/').status_code == 200
+
+    test_user.role = None
+    test_user.save()
+
+    assert api_client.get('/api/v4/books/export/books/').status_code == 403
+
+
+def test_password_change_revokes_tokens(test_user, monkeypatch):
+    monkeypatch.setattr(jwt_settings, 'CHECK_REVOKE_TOKEN', True)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(test_user)}')
+    assert client.get('/api/v4/books/my-favorites/').status_code == 200
+
+    test_user.set_password('new-password123')
+    test_user.save()
+
+    assert client.get('/api/v4/books/my-favorites/').status_code == 401
+
+
+def test_inactive_and_deleted_users_are_rejected(api_client, test_user):
+    assert api_client.get('/api/v4/books/my-favorites/').status_code == 200
+
+    test_user.is_active = False
+    test_user.save()
+    assert api_client.get('/api/v4/books/my-favorites/').status_code == 401
+
+    test_user.delete()
+    assert api_client.get('/api/v4/books/my-favorites/').status_code == 401
+
+
+def test_login_keeps_the_cached_principal(test_user):
+    UserPrincipalCache.get(str(test_user.id))
+
+    test_user.save(update_fields=['last_login'])
+
+    assert cache.get(UserPrincipalCache.get_key(str(test_user.id))) is not None
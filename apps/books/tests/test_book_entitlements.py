@@ -0,0 +1,92 @@
+import pytest
+
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from apps.books.models import Book, BookRent
+from apps.books.services.book_entitlements import BookEntitlementServices
+from apps.books.services.book_rent import BookRentServices
+from apps.books.services.rent_expiry import RentExpiryServices
+from apps.users.models import User
+
+
+@pytest.fixture(autouse=True)
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    cache.clear()
+
+
+@pytest.fixture
+def test_user(db) -> User:
+    return User.objects.create_user(username='reader', password='password123')
+
+
+@pytest.fixture
+def test_book(test_user) -> Book:
+    return Book.objects.create(
+        title='Title', author='John Doe', publisher=test_user, isbn=10, price=10,
+        file=SimpleUploadedFile('book.txt', b'content'),
+    )
+
+
+@pytest.fixture
+def reader(test_user) -> APIClient:
+    client = APIClient()
+    client.force_authenticate(user=test_user)
+
+    return client
+
+
+def rent(book: Book, user: User, days: float = 1) -> BookRent:
+    return BookRent.objects.create(book=book, renter=user, rent_end_date=timezone.now() + timedelta(days=days))
+
+
+def test_repeat_renter_can_read(reader, test_user, test_book):
+    rent(test_book, test_user, days=-1)
+    rent(test_book, test_user)
+    rent(test_book, test_user, days=2)
+
+    assert reader.get(f'/api/v4/books/read/{test_book.uuid}/').status_code == 200
+
+
+def test_reads_are_authorized_from_the_cache(reader, test_user, test_book, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        rent(test_book, test_user)
+    assert BookEntitlementServices.can_read(test_user, test_book.uuid)
+
+    with CaptureQueriesContext(connection) as queries:
+        assert BookEntitlementServices.can_read(test_user, test_book.uuid)
+    assert len(queries) == 0
+
+
+def test_new_and_expired_rents_update_the_entitlements(test_user, test_book, django_capture_on_commit_callbacks):
+    assert not BookEntitlementServices.can_read(test_user, test_book.uuid)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        BookRentServices.create_rentals_after_payment([
+            {'session_id': 'cs_1', 'book_uuid': str(test_book.uuid), 'user_id': str(test_user.id)},
+        ])
+    assert BookEntitlementServices.can_read(test_user, test_book.uuid)
+
+    BookRent.objects.update(rent_end_date=timezone.now())
+    with django_capture_on_commit_callbacks(execute=True):
+        assert len(RentExpiryServices.expire_due()) == 1
+    assert cache.get(BookEntitlementServices.get_key(test_user.id)) is None
+    assert not BookEntitlementServices.can_read(test_user, test_book.uuid)
+
+
+def test_entitlement_ends_with_the_rent(test_user, test_book):
+    rent(test_book, test_user)
+    assert BookEntitlementServices.can_read(test_user, test_book.uuid)
+
+    key = BookEntitlementServices.get_key(test_user.id)
+    cache.set(key, {str(test_book.uuid): timezone.now().timestamp() - 1})
+
+    assert not BookEntitlementServices.can_read(test_user, test_book.uuid)
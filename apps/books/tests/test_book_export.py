@@ -0,0 +1,99 @@
+import io
+import csv
+import gzip
+import json
+import pytest
+
+from asgiref.sync import async_to_sync
+
+from django.core.management import call_command
+from django.test import AsyncClient
+
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.books.models import Book, BookReview
+from apps.users.models import User
+
+
+@pytest.fixture
+def test_user(db) -> User:
+    return User.objects.create_user(username='admin2', password='password123', role='admin')
+
+
+@pytest.fixture
+def books(test_user) -> list[Book]:
+    books = [
+        Book.objects.create(title=f'Book {i}', author='John Doe', publisher=test_user, isbn=i, price=10)
+        for i in range(5)
+    ]
+    for book in books:
+        BookReview.objects.create(book=book, author=test_user, content='Great, "really"\nreally great')
+
+    return books
+
+
+def api_client(user: User) -> APIClient:
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+    return client
+
+
+def test_export_books_as_ndjson(test_user, books, settings):
+    settings.BOOKS_EXPORT_CHUNK_SIZE = 2
+    settings.BOOKS_EXPORT_BUFFER_SIZE = 100
+
+    response = api_client(test_user).get('/api/v4/books/export/books/')
+
+    assert response.status_code == 200
+    assert response.streaming
+    assert response['Content-Type'] == 'application/x-ndjson'
+
+    rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+    assert sorted(row['isbn'] for row in rows) == ['0', '1', '2', '3', '4']
+    assert rows[0]['stats_reviews'] == 1
+    assert rows[0]['price'] == '10.00'
+
+
+def test_export_reviews_as_gzipped_csv(test_user, books):
+    response = api_client(test_user).get('/api/v4/books/export/reviews/?format=csv&gzip=1')
+
+    assert response.status_code == 200
+    assert response['Content-Disposition'] == 'attachment; filename="reviews.csv.gz"'
+
+    content = gzip.decompress(b''.join(response.streaming_content)).decode()
+    rows = list(csv.DictReader(io.StringIO(content)))
+    assert len(rows) == 5
+    assert rows[0]['content'] == 'Great, "really"\nreally great'
+    assert {row['book_id'] for row in rows} == {str(book.uuid) for book in books}
+
+
+def test_export_requires_staff_and_known_dataset(test_user, books):
+    reader = User.objects.create_user(username='reader', password='password123')
+
+    assert api_client(reader).get('/api/v4/books/export/books/').status_code == 403
+    assert api_client(test_user).get('/api/v4/books/export/users/').status_code == 404
+    assert api_client(test_user).get('/api/v4/books/export/books/?format=xml').status_code == 400
+
+
+def test_export_command_writes_file(books, tmp_path):
+    output = tmp_path / 'books.ndjson'
+
+    call_command('export_books', 'books', output=str(output))
+
+    assert len(output.read_text().splitlines()) == 5
+
+
+def test_export_streams_asynchronously_over_asgi(test_user, books):
+    async def download():
+        response = await AsyncClient().get(
+            '/api/v4/books/export/books/', headers={'Authorization': f'Bearer {AccessToken.for_user(test_user)}'},
+        )
+        return response, b''.join([chunk async for chunk in response.streaming_content])
+
+    response, content = async_to_sync(download)()
+
+    assert response.status_code == 200
+    assert response.is_async
+    assert len(content.splitlines()) == 5
@@ -0,0 +1,117 @@
+import json
+import pytest
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.books.models import Book, BookStats
+from apps.users.models import User
+
+CSV = (
+    'title,author,isbn,price,published_date,file\n'
+    'First,John Doe,978-0-306-40615-7,10.50,2020-01-01,books/first.pdf\n'
+    'Again,Jane Smith,0306406152,12,,\n'
+    'Second,John Doe,0-8044-2957-X,10,,\n'
+    'Broken,John Doe,123,abc,,\n'
+    'Taken,John Doe,9781234567897,9,,\n'
+    'Misprint,John Doe,9780306406158,10,,\n'
+    'Missing,John Doe,9780198526636,10,,books/missing.pdf\n'
+)
+
+
+@pytest.fixture
+def test_user(db) -> User:
+    return User.objects.create_user(username='admin2', password='password123', role='admin')
+
+
+@pytest.fixture(autouse=True)
+def book_files(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path / 'media'
+    (settings.MEDIA_ROOT / 'books').mkdir(parents=True)
+    (settings.MEDIA_ROOT / 'books' / 'first.pdf').write_bytes(b'%PDF-1.4')
+
+
+@pytest.fixture
+def existing_book(test_user) -> Book:
+    return Book.objects.create(title='Taken', author='John Doe', publisher=test_user, isbn='9781234567897', price=10)
+
+
+def api_client(user: User) -> APIClient:
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+    return client
+
+
+@pytest.mark.parametrize('method', ['copy', 'bulk'])
+def test_import_command_reports_every_row(test_user, existing_book, tmp_path, capsys, method):
+    source, report = tmp_path / 'catalog.csv', tmp_path / 'report.jsonl'
+    source.write_text(CSV)
+
+    call_command('import_books', str(source), publisher='admin2', method=method, batch_size=2, report=str(report))
+
+    results = [json.loads(line) for line in report.read_text().splitlines()]
+    assert [(result['line'], result['status']) for result in results] == [
+        (2, 'created'), (3, 'duplicate'), (4, 'created'), (5, 'invalid'), (6, 'exists'), (7, 'invalid'), (8, 'invalid'),
+    ]
+    assert set(results[3]['errors']) == {'isbn', 'price'}
+    assert results[5]['errors'] == {'isbn': ['ISBN check digit is wrong.']}
+    assert results[6]['errors'] == {'file': ['File does not exist in storage.']}
+    assert '7 rows in' in capsys.readouterr().out
+
+    book = Book.objects.get(isbn='9780306406157')
+    assert (book.title, book.publisher, str(book.price), book.file.name) == ('First', test_user, '10.50', 'books/first.pdf')
+    assert Book.objects.count() == 3
+    assert BookStats.objects.filter(book__isbn='9780804429573').exists()
+
+
+def test_import_endpoint_accepts_jsonl(test_user):
+    rows = [
+        {'title': 'First', 'author': 'John Doe', 'isbn': '9780306406157', 'price': '10'},
+        'not an object',
+        {'title': 'Second', 'author': 'Jane Smith', 'isbn': '0306406152', 'price': 12, 'description': None},
+    ]
+    upload = SimpleUploadedFile('catalog.jsonl', '\n'.join(json.dumps(row) for row in rows).encode())
+
+    response = api_client(test_user).post('/api/v4/books/import/', {'file': upload}, format='multipart')
+
+    assert response.status_code == 201
+    assert (response.data['rows'], response.data['created'], response.data['invalid']) == (3, 1, 1)
+    assert [result['status'] for result in response.data['report']] == ['invalid', 'duplicate']
+    assert not response.data['report_truncated']
+    assert response.data['rows_per_second'] > 0
+
+
+def test_import_endpoint_caps_the_report(test_user, settings):
+    settings.BOOKS_IMPORT_REPORT_LIMIT = 2
+    upload = SimpleUploadedFile('catalog.csv', CSV.encode())
+
+    response = api_client(test_user).post('/api/v4/books/import/', {'file': upload}, format='multipart')
+
+    assert response.status_code == 201
+    assert (response.data['rows'], response.data['created'], response.data['invalid']) == (7, 3, 3)
+    assert [result['line'] for result in response.data['report']] == [3, 5]
+    assert response.data['report_truncated']
+
+
+def test_import_endpoint_rejects_large_files(test_user, settings):
+    settings.BOOKS_IMPORT_MAX_SIZE = len(CSV) - 1
+    upload = SimpleUploadedFile('catalog.csv', CSV.encode())
+
+    response = api_client(test_user).post('/api/v4/books/import/', {'file': upload}, format='multipart')
+
+    assert response.status_code == 413
+    assert not Book.objects.exists()
+
+
+def test_import_endpoint_is_admin_only(db):
+    librarian = User.objects.create_user(username='librarian', password='password123', role='librarian')
+    upload = SimpleUploadedFile('catalog.csv', CSV.encode())
+
+    response = api_client(librarian).post('/api/v4/books/import/', {'file': upload}, format='multipart')
+
+    assert response.status_code == 403
+    assert not Book.objects.exists()
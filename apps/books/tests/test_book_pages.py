@@ -0,0 +1,232 @@
+import io
+import os
+import fcntl
+import pytest
+import zipfile
+import threading
+
+from datetime import timedelta
+
+from pypdf import PdfWriter
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.books.models import Book, BookRent
+from apps.books.services.book_pages import BookPageServices
+from apps.books.tasks import extract_book_pages
+from apps.users.models import User
+
+TEXT = '\n\n'.join(f'Paragraph {i}: ' + ' '.join(['word'] * 10) for i in range(10))
+
+
+ROOTFILE = '<rootfile full-path="OEBPS/content.opf" media-type="application/oebps-package+xml"/>'
+ITEM_ONE = '<item id="one" href="text/one.xhtml" media-type="application/xhtml+xml"/>'
+
+
+def make_epub(rootfile: str = ROOTFILE, item_one: str = ITEM_ONE) -> bytes:
+    output = io.BytesIO()
+    with zipfile.ZipFile(output, 'w') as archive:
+        archive.writestr('mimetype', 'application/epub+zip')
+        archive.writestr('META-INF/container.xml', (
+            '<container xmlns="urn:oasis:names:tc:opendocument:xmlns:container" version="1.0"><rootfiles>'
+            f'{rootfile}</rootfiles></container>'
+        ))
+        archive.writestr('OEBPS/content.opf', (
+            '<package xmlns="http://www.idpf.org/2007/opf" version="3.0"><manifest>'
+            f'{item_one}'
+            '<item id="two" href="text/two.xhtml" media-type="application/xhtml+xml"/>'
+            '</manifest><spine><itemref idref="one"/><itemref idref="two"/></spine></package>'
+        ))
+        for name, title in (('one', 'The Beginning'), ('two', 'The End')):
+            paragraphs = ''.join(f'<p>{title} paragraph {i} ' + 'word ' * 10 + '</p>' for i in range(4))
+            archive.writestr(f'OEBPS/text/{name}.xhtml', (
+                f'<html xmlns="http://www.w3.org/1999/xhtml"><head><style>p {{}}</style></head>'
+                f'<body><h1>{title}</h1>{paragraphs}</body></html>'
+            ))
+
+    return output.getvalue()
+
+
+def make_pdf(pages: int) -> bytes:
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=200, height=200)
+
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def store(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path / 'media'
+    settings.BOOKS_PAGES_DIR = tmp_path / 'pages'
+    settings.BOOKS_PAGE_MAX_CHARS = 100
+    settings.BOOKS_PAGES_PER_CHUNK = 2
+    cache.clear()
+
+
+@pytest.fixture
+def queued(monkeypatch) -> list:
+    queued = []
+    monkeypatch.setattr(extract_book_pages, 'delay', lambda pk: queued.append(pk) or extract_book_pages(pk))
+
+    return queued
+
+
+@pytest.fixture
+def test_user(db) -> User:
+    return User.objects.create_user(username='reader', password='password123')
+
+
+@pytest.fixture
+def reader(test_user) -> APIClient:
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(test_user)}')
+
+    return client
+
+
+def create_book(user: User, name: str, content: bytes, captured, rented: bool = True) -> Book:
+    with captured(execute=True):
+        book = Book.objects.create(
+            title='Title', author='John Doe', publisher=user, isbn=10, price=10,
+            file=SimpleUploadedFile(name, content),
+        )
+    if rented:
+        BookRent.objects.create(book=book, renter=user, rent_end_date=timezone.now() + timedelta(days=1))
+
+    return book
+
+
+def test_text_book_is_read_page_by_page(reader, test_user, queued, django_capture_on_commit_callbacks):
+    book = create_book(test_user, 'book.txt', TEXT.encode(), django_capture_on_commit_callbacks)
+    assert queued == [str(book.uuid)]
+
+    contents = reader.get(f'/api/v4/books/read/{book.uuid}/contents/').json()
+    assert contents == {'page_count': 5, 'chapters': []}
+
+    pages = [reader.get(f'/api/v4/books/read/{book.uuid}/pages/{page}/') for page in range(1, 6)]
+    assert all(response.status_code == 200 for response in pages)
+    assert pages[0].data['text'].startswith('Paragraph 0:')
+    assert pages[4].data['text'].startswith('Paragraph 8:')
+    assert '\n\n'.join(response.data['text'] for response in pages) == TEXT
+
+    etag = pages[2]['ETag']
+    assert reader.get(f'/api/v4/books/read/{book.uuid}/pages/3/', HTTP_IF_NONE_MATCH=etag).status_code == 304
+    assert reader.get(f'/api/v4/books/read/{book.uuid}/pages/6/').status_code == 404
+
+
+def test_epub_chapters(reader, test_user, queued, django_capture_on_commit_callbacks):
+    book = create_book(test_user, 'book.epub', make_epub(), django_capture_on_commit_callbacks)
+
+    contents = reader.get(f'/api/v4/books/read/{book.uuid}/contents/').json()
+    assert [(c['title'], c['first_page'], c['last_page']) for c in contents['chapters']] == [
+        ('The Beginning', 1, 2), ('The End', 3, 4),
+    ]
+
+    chapter = reader.get(f'/api/v4/books/read/{book.uuid}/chapters/2/').json()
+    assert chapter['title'] == 'The End'
+    assert len(chapter['pages']) == 2
+    assert chapter['pages'][0].startswith('The End')
+    assert 'p {}' not in ''.join(chapter['pages'])
+
+    page = reader.get(f'/api/v4/books/read/{book.uuid}/pages/4/').json()
+    assert page['chapter'] == 'The End'
+
+
+def test_pdf_pages(reader, test_user, queued, django_capture_on_commit_callbacks):
+    book = create_book(test_user, 'book.pdf', make_pdf(3), django_capture_on_commit_callbacks)
+
+    assert reader.get(f'/api/v4/books/read/{book.uuid}/contents/').json()['page_count'] == 3
+    assert reader.get(f'/api/v4/books/read/{book.uuid}/pages/3/').json()['text'] == ''
+    assert extract_book_pages(str(book.uuid)) == 0
+
+
+def test_pages_need_rent_and_extraction(reader, test_user, queued, django_capture_on_commit_callbacks, monkeypatch):
+    book = create_book(test_user, 'book.txt', TEXT.encode(), django_capture_on_commit_callbacks, rented=False)
+    other = User.objects.create_user(username='other', password='password123')
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(other)}')
+
+    assert client.get(f'/api/v4/books/read/{book.uuid}/pages/1/').status_code == 403
+
+    BookRent.objects.create(book=book, renter=other, rent_end_date=timezone.now() + timedelta(days=1))
+    Book.objects.filter(uuid=book.uuid).update(file='books/replaced.txt')
+    monkeypatch.setattr(extract_book_pages, 'delay', lambda pk: queued.append(pk))
+
+    response = client.get(f'/api/v4/books/read/{book.uuid}/pages/1/')
+    assert response.status_code == 202
+    assert response['Retry-After'] == '5'
+    assert queued == [str(book.uuid)] * 2
+
+
+def test_unparsable_file_is_not_retried(reader, test_user, queued, django_capture_on_commit_callbacks):
+    book = create_book(test_user, 'book.epub', b'not a zip archive', django_capture_on_commit_callbacks)
+
+    response = reader.get(f'/api/v4/books/read/{book.uuid}/contents/')
+
+    assert response.status_code == 404
+    assert BookPageServices.read_index(book.uuid)['error']
+    assert queued == [str(book.uuid)]
+
+
+@pytest.mark.parametrize('epub', [
+    make_epub(rootfile=''),
+    make_epub(rootfile='<rootfile media-type="application/oebps-package+xml"/>'),
+    make_epub(item_one='<item id="one" media-type="application/xhtml+xml"/>'),
+], ids=['no rootfile', 'rootfile without path', 'item without href'])
+def test_malformed_epub_metadata_is_recorded(reader, test_user, queued, django_capture_on_commit_callbacks, epub):
+    book = create_book(test_user, 'book.epub', epub, django_capture_on_commit_callbacks)
+
+    response = reader.get(f'/api/v4/books/read/{book.uuid}/contents/')
+
+    assert response.status_code == 404
+    assert BookPageServices.read_index(book.uuid)['error'].startswith('EPUB ')
+    assert queued == [str(book.uuid)]
+
+
+def test_storage_errors_propagate_and_keep_the_pages(test_user, queued, django_capture_on_commit_callbacks, monkeypatch):
+    book = create_book(test_user, 'book.txt', TEXT.encode(), django_capture_on_commit_callbacks)
+    index = BookPageServices.read_index(book.uuid)
+
+    def get_pages(book):
+        yield None, 'First page'
+        raise OSError('Storage unavailable')
+
+    monkeypatch.setattr(BookPageServices, 'get_pages', get_pages)
+    book.file_sha256 = 'changed'
+
+    with pytest.raises(OSError):
+        BookPageServices.extract(book)
+
+    assert BookPageServices.read_index(book.uuid) == index
+    assert sorted(os.listdir(BookPageServices.get_dir(book.uuid))) == ['.lock', index['version'], 'index.json']
+
+
+def test_concurrent_extractions_take_turns(test_user, queued, django_capture_on_commit_callbacks):
+    book = create_book(test_user, 'book.txt', TEXT.encode(), django_capture_on_commit_callbacks)
+    Book.objects.filter(uuid=book.uuid).update(file_sha256='changed')
+    book.refresh_from_db()
+
+    results = []
+    with open(os.path.join(BookPageServices.get_dir(book.uuid), '.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        waiting = threading.Thread(target=lambda: results.append(BookPageServices.extract(book)))
+        waiting.start()
+        waiting.join(0.2)
+        assert waiting.is_alive()
+
+        page_count = BookPageServices.write_pages(book, BookPageServices.get_dir(book.uuid))
+        version = BookPageServices.read_index(book.uuid)['version']
+
+    waiting.join()
+
+    assert results == [page_count]
+    assert BookPageServices.read_index(book.uuid)['version'] == version
+    assert os.path.isdir(os.path.join(BookPageServices.get_dir(book.uuid), version))
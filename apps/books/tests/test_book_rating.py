@@ -1,8 +1,13 @@
 import pytest
 
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+
 from rest_framework_simplejwt.tokens import AccessToken
 
-from apps.books.models import Book, BookRent
+from apps.books.models import Book, BookRent, BookRating
+from apps.books.services.books_rating import BooksRatingServices
 from apps.users.models import User
 
 
@@ -15,8 +20,8 @@ def test_user(db) -> User:
 def test_book(db, test_user) -> list[Book]:
 
     books = [
-        Book.objects.create(title='Title', author='John Doe', publisher=test_user, isbn=10),
-        Book.objects.create(title='Django for begginers', author='Jane Smith', publisher=test_user, isbn=12, rating=1)
+        Book.objects.create(title='Title', author='John Doe', publisher=test_user, isbn=10, price=10),
+        Book.objects.create(title='Django for begginers', author='Jane Smith', publisher=test_user, isbn=12, price=10, rating=1)
     ]
 
     return books
@@ -35,6 +40,7 @@ def test_book_like(client, test_user, test_book):
 
 
 def test_book_dislike(client, test_user, test_book):
+    BookRating.objects.create(book=test_book[1], user=test_user)
     token = AccessToken.for_user(test_user)
     url = f'/api/v3/books/{test_book[1].uuid}/dislike/'
 
@@ -43,4 +49,26 @@ def test_book_dislike(client, test_user, test_book):
     assert response.status_code == 200
 
     test_book[1].refresh_from_db()
-    assert test_book[1].rating == 0
\ No newline at end of file
+    assert test_book[1].rating == 0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_likes_are_exact(test_user):
+    book = Book.objects.create(title='Hot book', author='John Doe', publisher=test_user, isbn=20, price=5)
+    likers = User.objects.bulk_create([User(username=f'liker{i}') for i in range(100)])
+    updated_at = book.updated_at
+
+    def like(user) -> int:
+        try:
+            return BooksRatingServices.like_book(book.uuid, user).status_code
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=25) as executor:
+        statuses = list(executor.map(like, likers + likers))
+
+    book.refresh_from_db()
+    assert statuses.count(200) == 200
+    assert BookRating.objects.filter(book=book).count() == 100
+    assert book.rating == 100
+    assert book.updated_at == updated_at
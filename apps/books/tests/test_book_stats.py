@@ -0,0 +1,145 @@
+import pytest
+
+from datetime import timedelta
+
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.books.cache import BookCache
+from apps.books.models import Book, BookRent, BookReview, BookStats, FavoriteBook
+from apps.books.services.book_rent import BookRentServices
+from apps.books.services.rent_expiry import RentExpiryServices
+from apps.books.tasks import reconcile_book_stats
+from apps.users.models import User
+
+
+@pytest.fixture
+def test_user(db) -> User:
+    return User.objects.create_user(username='admin2', password='password123', role='admin')
+
+
+@pytest.fixture
+def test_book(db, test_user) -> Book:
+    return Book.objects.create(title='Title', author='John Doe', publisher=test_user, isbn=10, price=10)
+
+
+@pytest.fixture
+def api_client(test_user) -> APIClient:
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(test_user)}')
+
+    return client
+
+
+def get_stats(book: Book) -> dict:
+    return BookStats.objects.values('likes', 'reviews', 'favorites', 'active_rents').get(book=book)
+
+
+def test_new_book_starts_with_zeroed_stats(test_book):
+    assert get_stats(test_book) == {'likes': 0, 'reviews': 0, 'favorites': 0, 'active_rents': 0}
+
+
+def test_events_move_counters(api_client, test_user, test_book):
+    assert api_client.post(f'/api/v4/books/{test_book.uuid}/like/').status_code == 200
+    review = BookReview.objects.create(book=test_book, author=test_user, content='Review')
+    favorite = FavoriteBook.objects.create(book=test_book, user=test_user)
+    BookRent.objects.create(book=test_book, renter=test_user, rent_end_date=timezone.now() + timedelta(days=1))
+
+    assert get_stats(test_book) == {'likes': 1, 'reviews': 1, 'favorites': 1, 'active_rents': 1}
+
+    assert api_client.delete(f'/api/v4/books/{test_book.uuid}/dislike/').status_code == 200
+    review.delete()
+    favorite.delete()
+
+    assert get_stats(test_book) == {'likes': 0, 'reviews': 0, 'favorites': 0, 'active_rents': 1}
+
+
+def test_rent_expiry_and_bulk_rentals_move_active_rents(test_user, test_book):
+    sessions = [
+        {'session_id': f'cs_{i}', 'book_uuid': str(test_book.uuid), 'user_id': str(test_user.id)}
+        for i in range(3)
+    ]
+    assert BookRentServices.create_rentals_after_payment(sessions) == 3
+    assert get_stats(test_book)['active_rents'] == 3
+
+    BookRent.objects.update(rent_end_date=timezone.now() - timedelta(minutes=1))
+    assert len(RentExpiryServices.expire_due()) == 3
+    assert get_stats(test_book)['active_rents'] == 0
+
+
+def test_reconcile_repairs_drift_and_missing_rows(test_user, test_book):
+    other = Book.objects.create(title='Other', author='Jane Smith', publisher=test_user, isbn=12, price=10)
+    BookReview.objects.create(book=test_book, author=test_user, content='Review')
+
+    BookStats.objects.filter(book=test_book).update(reviews=7, likes=3)
+    BookStats.objects.filter(book=other).delete()
+
+    assert reconcile_book_stats() == 2
+    assert get_stats(test_book) == {'likes': 0, 'reviews': 1, 'favorites': 0, 'active_rents': 0}
+    assert get_stats(other) == {'likes': 0, 'reviews': 0, 'favorites': 0, 'active_rents': 0}
+
+    assert reconcile_book_stats() == 0
+
+
+def test_catalog_exposes_stats_without_counting(api_client, test_user, test_book):
+    FavoriteBook.objects.create(book=test_book, user=test_user)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = api_client.get('/api/v4/books/list/')
+
+    assert response.status_code == 200
+    assert response.json()['results'][0]['stats']['favorites'] == 1
+    assert not any('COUNT(' in query['sql'] for query in queries.captured_queries)
+
+
+def test_cached_responses_follow_the_counters(api_client, test_user, test_book, django_capture_on_commit_callbacks):
+    url = f'/api/v4/books/{test_book.uuid}/'
+
+    def get_cached_stats():
+        return api_client.get(url).json()['stats']
+
+    assert get_cached_stats()['reviews'] == 0
+    with django_capture_on_commit_callbacks(execute=True):
+        BookReview.objects.create(book=test_book, author=test_user, content='Review')
+    assert get_cached_stats()['reviews'] == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        BookRentServices.create_rentals_after_payment([
+            {'session_id': 'cs_1', 'book_uuid': str(test_book.uuid), 'user_id': str(test_user.id)},
+        ])
+    assert get_cached_stats()['active_rents'] == 1
+
+    BookRent.objects.update(rent_end_date=timezone.now() - timedelta(minutes=1))
+    with django_capture_on_commit_callbacks(execute=True):
+        RentExpiryServices.expire_due()
+    assert get_cached_stats()['active_rents'] == 0
+
+    BookStats.objects.filter(book=test_book).update(likes=5)
+    BookCache.invalidate_book(test_book.uuid)
+    assert get_cached_stats()['likes'] == 5
+    with django_capture_on_commit_callbacks(execute=True):
+        assert reconcile_book_stats() == 1
+    assert get_cached_stats()['likes'] == 0
+
+
+def test_bulk_rentals_count_only_inserted_rows(test_user, test_book, monkeypatch):
+    sessions = [
+        {'session_id': f'cs_{i}', 'book_uuid': str(test_book.uuid), 'user_id': str(test_user.id)}
+        for i in range(2)
+    ]
+    bulk_create = BookRent.objects.bulk_create
+
+    def race(rentals, **kwargs):
+        # Another drain inserts the first session between the lookup of existing rentals and the insert
+        BookRent.objects.create(book=test_book, renter=test_user, rent_end_date=timezone.now(), stripe_session_id='cs_0')
+        return bulk_create(rentals, **kwargs)
+
+    monkeypatch.setattr(BookRent.objects, 'bulk_create', race)
+
+    assert BookRentServices.create_rentals_after_payment(sessions) == 1
+    assert BookRent.objects.count() == 2
+    assert get_stats(test_book)['active_rents'] == 2
@@ -16,8 +16,8 @@ def test_user(db) -> User:
 def test_book(db, test_user) -> list[Book]:
 
     books = [
-        Book.objects.create(title='Title', author='John Doe', publisher=test_user, isbn=10),
-        Book.objects.create(title='Django for begginers', author='Jane Smith', publisher=test_user, isbn=12)
+        Book.objects.create(title='Title', author='John Doe', publisher=test_user, isbn=10, price=10),
+        Book.objects.create(title='Django for begginers', author='Jane Smith', publisher=test_user, isbn=12, price=10)
     ]
 
     return books
@@ -49,8 +49,52 @@ def test_book_filter(client, test_book) -> None:
     url = f'/api/v1/books/list/?title=title&author=John'
     response = client.get(url)
 
-    data = response.json()
+    data = response.json()['results']
 
     assert response.status_code == 200
     assert len(data) == 1
-    assert data[0]['title'] == 'Title'
\ No newline at end of file
+    assert data[0]['title'] == 'Title'
+
+
+@pytest.mark.django_db
+def test_books_list_cursor_pagination(client, test_user) -> None:
+    Book.objects.bulk_create([
+        Book(title=f'Book {i}', author='Author', publisher=test_user, isbn=100 + i, price=10, rating=i % 3)
+        for i in range(25)
+    ])
+
+    seen = []
+    url = '/api/v1/books/list/?page_size=10'
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+
+        data = response.json()
+        assert len(data['results']) <= 10
+        seen.extend(book['uuid'] for book in data['results'])
+        url = data['next']
+
+    expected = Book.objects.order_by('rating', 'created_at', 'uuid').values_list('uuid', flat=True)
+    assert seen == [str(uuid) for uuid in expected]
+
+
+@pytest.mark.django_db
+def test_books_list_previous_page(client, test_user) -> None:
+    Book.objects.bulk_create([
+        Book(title=f'Book {i}', author='Author', publisher=test_user, isbn=100 + i, price=10)
+        for i in range(5)
+    ])
+
+    first = client.get('/api/v1/books/list/?page_size=2').json()
+    second = client.get(first['next']).json()
+    back = client.get(second['previous']).json()
+
+    assert first['previous'] is None
+    assert back['results'] == first['results']
+
+
+@pytest.mark.django_db
+def test_books_list_invalid_cursor(client) -> None:
+    response = client.get('/api/v1/books/list/?cursor=not-a-cursor')
+
+    assert response.status_code == 404
\ No newline at end of file
@@ -0,0 +1,99 @@
+import pytest
+
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import AsyncClient
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.books.models import Book, BookRent
+from apps.users.models import User
+
+
+CONTENT = b'0123456789abcdefghij'
+
+
+@pytest.fixture
+def test_user(db) -> User:
+    return User.objects.create_user(username='reader', password='password123')
+
+
+@pytest.fixture
+def books(test_user, settings, tmp_path) -> list[Book]:
+    settings.MEDIA_ROOT = tmp_path
+
+    return [
+        Book.objects.create(
+            title=f'Book {i}', author='John Doe', publisher=test_user, isbn=i, price=10, rating=i,
+            file=SimpleUploadedFile('book.txt', CONTENT),
+        )
+        for i in range(3)
+    ]
+
+
+@pytest.fixture
+def reader(test_user) -> APIClient:
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(test_user)}')
+
+    return client
+
+
+def test_async_list_matches_sync_list(client, books):
+    sync = client.get('/api/v4/books/list/?page_size=2').json()
+    response = client.get('/api/v5/books/list/?page_size=2')
+
+    assert response.status_code == 200
+    assert response.json()['results'] == sync['results']
+    assert response.json()['next'].startswith('http://testserver/api/v5/books/list/')
+
+
+def test_async_list_follows_cursor(client, books):
+    first = client.get('/api/v5/books/list/?page_size=2').json()
+    second = client.get(first['next']).json()
+
+    assert [book['uuid'] for book in second['results']] == [str(books[2].uuid)]
+
+
+def test_async_detail_is_cached_with_etag(client, books):
+    url = f'/api/v5/books/{books[0].uuid}/'
+    response = client.get(url)
+
+    assert response.status_code == 200
+    assert response.json()['title'] == 'Book 0'
+
+    cached = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+    assert cached.status_code == 304
+    assert cached.query_metrics.queries == 0
+
+
+def test_async_detail_not_found(client, db):
+    response = client.get('/api/v5/books/00000000-0000-0000-0000-000000000000/')
+
+    assert response.status_code == 404
+
+
+def test_async_read_requires_rent(reader, client, books, test_user):
+    url = f'/api/v5/books/read/{books[0].uuid}/'
+
+    assert client.get(url).status_code == 401
+    assert reader.get(url).status_code == 403
+
+    BookRent.objects.create(book=books[0], renter=test_user, rent_end_date=timezone.now() + timedelta(days=1))
+    response = reader.get(url, HTTP_RANGE='bytes=2-5')
+
+    assert response.status_code == 206
+    assert b''.join(response.streaming_content) == CONTENT[2:6]
+
+
+def test_async_list_over_asgi(books):
+    response = async_to_sync(AsyncClient().get)('/api/v5/books/list/')
+
+    assert response.status_code == 200
+    assert len(response.json()['results']) == 3
+    assert response.query_metrics.queries == 1
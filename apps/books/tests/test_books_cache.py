@@ -0,0 +1,105 @@
+import pytest
+
+from django.core.cache import cache
+
+from apps.books.models import Book, FavoriteBook
+from apps.books.services.books_rating import BooksRatingServices
+from apps.users.models import User
+
+
+@pytest.fixture
+def test_user(db) -> User:
+    return User.objects.create_user(username='admin2', password='password123', role='admin')
+
+
+@pytest.fixture
+def test_book(db, test_user) -> list[Book]:
+
+    books = [
+        Book.objects.create(title='Title', author='John Doe', publisher=test_user, isbn=10, price=10),
+        Book.objects.create(title='Django for begginers', author='Jane Smith', publisher=test_user, isbn=12, price=10)
+    ]
+
+    return books
+
+
+def test_book_detail_is_cached(client, test_book, django_assert_num_queries):
+    url = f'/api/v1/books/{test_book[0].uuid}/'
+    first = client.get(url)
+
+    with django_assert_num_queries(0):
+        second = client.get(url)
+
+    assert second.status_code == 200
+    assert second.json() == first.json()
+    assert second['ETag'] == first['ETag']
+
+
+def test_books_list_is_cached_per_filter_set(client, test_book, django_assert_num_queries):
+    client.get('/api/v1/books/list/?title=title&author=John')
+
+    with django_assert_num_queries(0):
+        response = client.get('/api/v1/books/list/?author=John&title=title')
+
+    assert [book['title'] for book in response.json()['results']] == ['Title']
+
+    response = client.get('/api/v1/books/list/?title=django')
+    assert [book['title'] for book in response.json()['results']] == ['Django for begginers']
+
+
+def test_if_none_match_returns_not_modified(client, test_book):
+    url = f'/api/v1/books/{test_book[0].uuid}/'
+    etag = client.get(url)['ETag']
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 304
+    assert response['ETag'] == etag
+
+
+def test_book_save_invalidates_cache(client, test_book, django_capture_on_commit_callbacks):
+    detail_url = f'/api/v1/books/{test_book[0].uuid}/'
+    list_url = '/api/v1/books/list/'
+    client.get(detail_url)
+    client.get(list_url)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        test_book[0].title = 'New title'
+        test_book[0].save()
+
+    assert client.get(detail_url).json()['title'] == 'New title'
+    assert 'New title' in [book['title'] for book in client.get(list_url).json()['results']]
+
+
+def test_book_delete_invalidates_cache(client, test_book, django_capture_on_commit_callbacks):
+    client.get('/api/v1/books/list/')
+
+    with django_capture_on_commit_callbacks(execute=True):
+        test_book[1].delete()
+
+    assert len(client.get('/api/v1/books/list/').json()['results']) == 1
+
+
+def test_like_invalidates_cache(client, test_user, test_book, django_capture_on_commit_callbacks):
+    url = f'/api/v1/books/{test_book[0].uuid}/'
+    client.get(url)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        BooksRatingServices.like_book(test_book[0].uuid, test_user)
+
+    assert client.get(url).json()['rating'] == 1
+
+
+def test_favorite_invalidates_cache(client, test_user, test_book, django_capture_on_commit_callbacks):
+    url = f'/api/v1/books/{test_book[0].uuid}/'
+    etag = client.get(url)['ETag']
+    version = cache.get(f'books:detail:{test_book[0].uuid}:version')
+
+    with django_capture_on_commit_callbacks(execute=True):
+        FavoriteBook.objects.create(book=test_book[0], user=test_user)
+
+    assert cache.get(f'books:detail:{test_book[0].uuid}:version') != version
+
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.json()['stats']['favorites'] == 1
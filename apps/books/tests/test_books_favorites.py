@@ -16,8 +16,8 @@ def test_user(db) -> User:
 def test_book(db, test_user) -> list[Book]:
 
     books = [
-        Book.objects.create(title='Title', author='John Doe', publisher=test_user, isbn=10),
-        Book.objects.create(title='Django for begginers', author='Jane Smith', publisher=test_user, isbn=12)
+        Book.objects.create(title='Title', author='John Doe', publisher=test_user, isbn=10, price=10),
+        Book.objects.create(title='Django for begginers', author='Jane Smith', publisher=test_user, isbn=12, price=10)
     ]
 
     return books
@@ -64,4 +64,32 @@ def test_add_book_to_favorite(test_user, test_book):
     url = f'/api/v4/books/delete-book-from-favorites/{favorite_book.uuid}/'
     response = client.delete(url)
 
-    assert response.status_code == 204
\ No newline at end of file
+    assert response.status_code == 204
+
+
+@pytest.mark.django_db
+def test_favorites_list_embeds_books_in_constant_queries(test_user):
+    client = APIClient()
+    token = AccessToken.for_user(test_user)
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def list_favorites(count: int):
+        books = Book.objects.bulk_create([
+            Book(title=f'Book {i}', author='John Doe', publisher=test_user, isbn=f'{count}{i}', price=10)
+            for i in range(count)
+        ])
+        FavoriteBook.objects.bulk_create([FavoriteBook(user=test_user, book=book) for book in books])
+
+        response = client.get('/api/v4/books/my-favorites/')
+        FavoriteBook.objects.all().delete()
+
+        return response
+
+    # The first request also loads the user into the authentication cache
+    list_favorites(1)
+    small = list_favorites(10)
+    large = list_favorites(1000)
+
+    assert len(large.json()) == 1000
+    assert large.json()[0]['book']['title'].startswith('Book ')
+    assert large.query_metrics.queries == small.query_metrics.queries
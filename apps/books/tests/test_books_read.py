@@ -0,0 +1,132 @@
+import pytest
+
+from datetime import timedelta
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from apps.books.models import Book, BookRent
+from apps.users.models import User
+
+
+CONTENT = b'0123456789abcdefghij'
+
+
+@pytest.fixture
+def test_user(db) -> User:
+    return User.objects.create_user(username='reader', password='password123')
+
+
+@pytest.fixture
+def test_book(db, test_user, settings, tmp_path) -> Book:
+    settings.MEDIA_ROOT = tmp_path
+    book = Book.objects.create(
+        title='Title', author='John Doe', publisher=test_user, isbn=10, price=10,
+        file=SimpleUploadedFile('book.txt', CONTENT),
+    )
+    BookRent.objects.create(book=book, renter=test_user, rent_end_date=timezone.now() + timedelta(days=1))
+
+    return book
+
+
+@pytest.fixture
+def reader(test_user) -> APIClient:
+    client = APIClient()
+    client.force_authenticate(user=test_user)
+
+    return client
+
+
+def read_url(book: Book) -> str:
+    return f'/api/v4/books/read/{book.uuid}/'
+
+
+def test_read_whole_file(reader, test_book):
+    response = reader.get(read_url(test_book))
+
+    assert response.status_code == 200
+    assert b''.join(response.streaming_content) == CONTENT
+    assert response['Accept-Ranges'] == 'bytes'
+    assert response['ETag']
+    assert response['Last-Modified']
+
+
+@pytest.mark.parametrize('header, expected, content_range', [
+    ('bytes=2-5', CONTENT[2:6], 'bytes 2-5/20'),
+    ('bytes=15-', CONTENT[15:], 'bytes 15-19/20'),
+    ('bytes=-4', CONTENT[-4:], 'bytes 16-19/20'),
+    ('bytes=10-100', CONTENT[10:], 'bytes 10-19/20'),
+])
+def test_read_range(reader, test_book, header, expected, content_range):
+    response = reader.get(read_url(test_book), HTTP_RANGE=header)
+
+    assert response.status_code == 206
+    assert b''.join(response.streaming_content) == expected
+    assert response['Content-Range'] == content_range
+    assert response['Content-Length'] == str(len(expected))
+
+
+def test_read_unsatisfiable_range(reader, test_book):
+    response = reader.get(read_url(test_book), HTTP_RANGE='bytes=50-')
+
+    assert response.status_code == 416
+    assert response['Content-Range'] == 'bytes */20'
+
+
+def test_read_stale_if_range_returns_whole_file(reader, test_book):
+    response = reader.get(read_url(test_book), HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE='"stale"')
+
+    assert response.status_code == 200
+    assert b''.join(response.streaming_content) == CONTENT
+
+
+def test_read_not_modified(reader, test_book):
+    etag = reader.get(read_url(test_book))['ETag']
+
+    response = reader.get(read_url(test_book), HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 304
+
+
+def test_read_offload_to_web_server(reader, test_book, settings):
+    settings.BOOKS_FILE_OFFLOAD = 'x-accel-redirect'
+
+    response = reader.get(read_url(test_book))
+
+    assert response.status_code == 200
+    assert response.content == b''
+    assert response['X-Accel-Redirect'] == f'/protected-media/{test_book.file.name}'
+
+
+def test_read_requires_rent(test_book):
+    client = APIClient()
+    client.force_authenticate(user=User.objects.create_user(username='stranger', password='password123'))
+
+    response = client.get(read_url(test_book))
+
+    assert response.status_code == 403
+
+
+def test_read_quotes_unusual_filenames(reader, test_book):
+    test_book.file.save('my "best" книга.txt', SimpleUploadedFile('x.txt', CONTENT))
+
+    response = reader.get(read_url(test_book))
+
+    assert response.status_code == 200
+    assert response['Content-Disposition'] == (
+        "attachment; filename*=utf-8''my_best_%D0%BA%D0%BD%D0%B8%D0%B3%D0%B0.txt"
+    )
+
+
+@pytest.mark.parametrize('mode, header', [('x-accel-redirect', 'X-Accel-Redirect'), ('x-sendfile', 'X-Sendfile')])
+def test_offload_quotes_unusual_filenames(reader, test_book, settings, mode, header):
+    settings.BOOKS_FILE_OFFLOAD = mode
+    test_book.file.save('my книга.txt', SimpleUploadedFile('x.txt', CONTENT))
+
+    response = reader.get(read_url(test_book))
+
+    assert response.status_code == 200
+    assert response[header].endswith('books/my_%D0%BA%D0%BD%D0%B8%D0%B3%D0%B0.txt')
+    assert response[header].isascii()
@@ -16,8 +16,8 @@ def test_user(db) -> User:
 def test_book(db, test_user) -> list[Book]:
 
     books = [
-        Book.objects.create(title='Title', author='John Doe', publisher=test_user, isbn=10),
-        Book.objects.create(title='Django for begginers', author='Jane Smith', publisher=test_user, isbn=12)
+        Book.objects.create(title='Title', author='John Doe', publisher=test_user, isbn=10, price=10),
+        Book.objects.create(title='Django for begginers', author='Jane Smith', publisher=test_user, isbn=12, price=10)
     ]
 
     return books
@@ -77,4 +77,13 @@ def test_review_delete(client, test_review, test_user):
         HTTP_AUTHORIZATION=f'Bearer {token}'
     )
 
-    assert response.status_code == 204
\ No newline at end of file
+    assert response.status_code == 204
+
+
+def test_reviews_list_only_returns_reviews_of_the_book(client, test_review, test_book, test_user):
+    BookReview.objects.create(book=test_book[1], author=test_user, content='Another book')
+
+    response = client.get(f'/api/v3/books/reviews/list/{test_book[0].uuid}/')
+
+    assert [review['uuid'] for review in response.json()] == [str(test_review.uuid)]
+    assert response.json()[0]['author']['username'] == test_user.username
@@ -0,0 +1,65 @@
+import pytest
+
+from apps.books.models import Book
+from apps.books.services.books_search import BooksSearchServices
+from apps.users.models import User
+
+
+@pytest.fixture
+def test_user(db) -> User:
+    return User.objects.create_user(username='admin2', password='password123', role='admin')
+
+
+@pytest.fixture
+def test_book(db, test_user) -> list[Book]:
+
+    books = [
+        Book.objects.create(
+            title='The Hobbit', author='J.R.R. Tolkien', publisher=test_user,
+            isbn='9780261102217', price=10, description='A journey there and back again.',
+        ),
+        Book.objects.create(
+            title='Two Scoops of Django', author='Daniel Greenfeld', publisher=test_user,
+            isbn='9780692915721', price=20, description='Best practices for the Django web framework.',
+        ),
+        Book.objects.create(
+            title='Fluent Python', author='Luciano Ramalho', publisher=test_user,
+            isbn='9781492056355', price=30, description='Covers web frameworks such as Django briefly.',
+        ),
+    ]
+
+    return books
+
+
+def search(client, query: str) -> list[str]:
+    response = client.get('/api/v4/books/search/', {'q': query})
+    assert response.status_code == 200
+
+    return [book['title'] for book in response.json()['results']]
+
+
+def test_search_ranks_title_matches_first(client, test_book):
+    assert search(client, 'django') == ['Two Scoops of Django', 'Fluent Python']
+
+
+def test_search_prefix_match(client, test_book):
+    assert search(client, 'hob') == ['The Hobbit']
+
+
+def test_search_by_isbn(client, test_book):
+    assert search(client, '978149') == ['Fluent Python']
+
+
+def test_search_tolerates_typos(client, test_book):
+    assert search(client, 'tolkein') == ['The Hobbit']
+
+
+def test_search_empty_query(client, test_book):
+    assert search(client, '  ') == []
+
+
+def test_search_ranks_on_the_indexed_expressions(db):
+    sql = str(BooksSearchServices.search('tolkein').query)
+
+    assert 'WORD_SIMILARITY(tolkein, UPPER("books_book"."title"))' in sql
+    assert 'WORD_SIMILARITY(tolkein, UPPER("books_book"."author"))' in sql
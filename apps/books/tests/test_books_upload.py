@@ -0,0 +1,142 @@
+import hashlib
+
+import pytest
+
+from rest_framework.test import APIClient
+
+from apps.books.models import Book, BookUpload
+from apps.users.models import User
+
+
+CONTENT = b'Chapter one. It was a dark and stormy night.\n' * 100
+
+
+@pytest.fixture(autouse=True)
+def upload_dirs(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path / 'media'
+    settings.BOOKS_UPLOAD_TEMP_DIR = tmp_path / 'uploads'
+    settings.BOOKS_UPLOAD_CHUNK_SIZE = 1024
+
+
+@pytest.fixture
+def test_user(db) -> User:
+    return User.objects.create_user(username='admin2', password='password123', role='admin')
+
+
+@pytest.fixture
+def publisher(test_user) -> APIClient:
+    client = APIClient()
+    client.force_authenticate(user=test_user)
+
+    return client
+
+
+def start_upload(client: APIClient, size: int = len(CONTENT), filename: str = 'book.txt'):
+    return client.post('/api/v4/books/uploads/', {'filename': filename, 'size': size}, format='json')
+
+
+def send_chunk(client: APIClient, upload_uuid, start: int, data: bytes):
+    return client.put(
+        f'/api/v4/books/uploads/{upload_uuid}/',
+        data=data,
+        content_type='application/octet-stream',
+        HTTP_CONTENT_RANGE=f'bytes {start}-{start + len(data) - 1}/{len(CONTENT)}',
+    )
+
+
+def upload_all(client: APIClient, upload_uuid) -> None:
+    for start in range(0, len(CONTENT), 1024):
+        response = send_chunk(client, upload_uuid, start, CONTENT[start:start + 1024])
+        assert response.status_code == 200
+
+
+def commit(client: APIClient, upload_uuid, test_user, isbn: str):
+    return client.post(
+        f'/api/v4/books/uploads/{upload_uuid}/commit/',
+        {'title': 'Stormy night', 'author': 'John Doe', 'isbn': isbn, 'price': '9.99', 'publisher': str(test_user.id)},
+        format='json',
+    )
+
+
+def test_chunked_upload_and_commit(publisher, test_user):
+    upload_uuid = start_upload(publisher).json()['uuid']
+    upload_all(publisher, upload_uuid)
+
+    response = commit(publisher, upload_uuid, test_user, '1')
+
+    assert response.status_code == 201
+    book = Book.objects.get(uuid=response.json()['uuid'])
+    assert book.file.read() == CONTENT
+    assert book.file_sha256 == hashlib.sha256(CONTENT).hexdigest()
+    assert BookUpload.objects.get(uuid=upload_uuid).book == book
+
+
+def test_upload_resumes_from_reported_offset(publisher):
+    upload_uuid = start_upload(publisher).json()['uuid']
+    send_chunk(publisher, upload_uuid, 0, CONTENT[:1024])
+
+    out_of_order = send_chunk(publisher, upload_uuid, 2048, CONTENT[2048:3072])
+    assert out_of_order.status_code == 409
+    assert out_of_order.json()['offset'] == 1024
+
+    status = publisher.get(f'/api/v4/books/uploads/{upload_uuid}/')
+    assert status.json()['offset'] == 1024
+
+
+def test_upload_rejects_oversized_file_before_transfer(publisher, settings):
+    response = start_upload(publisher, size=settings.BOOKS_FILE_MAX_SIZE + 1)
+
+    assert response.status_code == 400
+    assert not BookUpload.objects.exists()
+
+
+def test_upload_rejects_oversized_chunk(publisher):
+    upload_uuid = start_upload(publisher).json()['uuid']
+
+    response = send_chunk(publisher, upload_uuid, 0, CONTENT[:2048])
+
+    assert response.status_code == 413
+
+
+def test_upload_rejects_wrong_file_type(publisher):
+    upload_uuid = start_upload(publisher, filename='book.pdf').json()['uuid']
+
+    response = send_chunk(publisher, upload_uuid, 0, b'\x89PNG\r\n\x1a\n' + b'\x00' * 1000)
+
+    assert response.status_code == 400
+
+
+def test_commit_incomplete_upload(publisher, test_user):
+    upload_uuid = start_upload(publisher).json()['uuid']
+    send_chunk(publisher, upload_uuid, 0, CONTENT[:1024])
+
+    response = commit(publisher, upload_uuid, test_user, '1')
+
+    assert response.status_code == 409
+
+
+def test_identical_files_are_stored_once(publisher, test_user):
+    first_uuid = start_upload(publisher).json()['uuid']
+    upload_all(publisher, first_uuid)
+    first = Book.objects.get(uuid=commit(publisher, first_uuid, test_user, '1').json()['uuid'])
+
+    second_uuid = start_upload(publisher).json()['uuid']
+    upload_all(publisher, second_uuid)
+    second = Book.objects.get(uuid=commit(publisher, second_uuid, test_user, '2').json()['uuid'])
+
+    assert second.file.name == first.file.name
+
+
+def test_retried_commit_conflicts(publisher, test_user, settings, django_capture_on_commit_callbacks):
+    upload_uuid = start_upload(publisher).json()['uuid']
+    upload_all(publisher, upload_uuid)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        first = commit(publisher, upload_uuid, test_user, '1')
+    retry = commit(publisher, upload_uuid, test_user, '1')
+
+    assert first.status_code == 201
+    assert retry.status_code == 409
+    assert retry.json()['book'] == first.json()['uuid']
+    assert Book.objects.count() == 1
+    assert not (settings.BOOKS_UPLOAD_TEMP_DIR / f'{upload_uuid}.part').exists()
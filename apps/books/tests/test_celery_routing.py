@@ -0,0 +1,105 @@
+import io
+import pytest
+
+from datetime import timedelta
+
+from celery.app.task import Task
+from PIL import Image
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+
+from apps.books.models import Book, BookRent
+from apps.books.tasks import check_rent_status
+from apps.users.models import User
+
+# The app the tasks are bound to, which is the one that imported them first. It is not always
+# config.celery.app, e.g. when the project is also importable as a package under another name.
+celery_app = check_rent_status.app
+
+
+@pytest.fixture
+def dispatched(monkeypatch) -> list:
+    '''
+    Run tasks eagerly and record the queue and priority each message would have been routed to.
+    Eager calls skip the router, so it is consulted here like ``apply_async`` does.
+    '''
+
+    dispatched = []
+    apply_async = Task.apply_async
+
+    def route_and_apply(task, args=None, kwargs=None, **options):
+        route = celery_app.amqp.router.route(dict(options), task.name, args, kwargs)
+        dispatched.append((task.name, route['queue'].name, route.get('priority')))
+        return apply_async(task, args, kwargs, **options)
+
+    monkeypatch.setattr(Task, 'apply_async', route_and_apply)
+    monkeypatch.setattr(celery_app.conf, 'task_always_eager', True)
+    monkeypatch.setattr(celery_app.conf, 'task_eager_propagates', True)
+
+    return dispatched
+
+
+@pytest.fixture
+def test_user(db) -> User:
+    return User.objects.create_user(username='admin2', password='password123', role='admin')
+
+
+def route(task: str, options: dict | None = None) -> tuple[str, int | None]:
+    options = celery_app.amqp.router.route(dict(options or {}), task)
+    return options['queue'].name, options.get('priority')
+
+
+def test_every_task_has_a_route():
+    celery_app.loader.import_default_modules()
+    tasks = {name for name in celery_app.tasks if name.startswith('apps.')}
+
+    assert tasks == set(settings.CELERY_TASK_ROUTES)
+    assert {route(task)[0] for task in tasks} <= {queue.name for queue in settings.CELERY_TASK_QUEUES}
+
+
+def test_periodic_tasks_are_routed_and_expire():
+    for name, entry in settings.CELERY_BEAT_SCHEDULE.items():
+        queue, _ = route(entry['task'], entry.get('options'))
+
+        assert queue == settings.CELERY_TASK_ROUTES[entry['task']]['queue'], name
+        assert entry['options']['expires'] < entry['schedule'].total_seconds(), name
+
+    assert route('apps.books.tasks.check_rent_status') == ('critical', 0)
+    assert route('apps.books.tasks.reconcile_book_stats') == ('maintenance', 9)
+
+
+def test_unknown_tasks_use_the_default_queue():
+    assert route('apps.books.tasks.unknown') == ('default', None)
+
+
+def test_time_limits_are_annotated():
+    task = celery_app.tasks['apps.books.tasks.check_rent_status']
+
+    assert (task.soft_time_limit, task.time_limit) == (45, 55)
+    assert celery_app.conf.task_acks_late
+
+
+def test_rent_expiry_runs_on_the_critical_queue(dispatched, test_user):
+    book = Book.objects.create(title='Title', author='John Doe', publisher=test_user, isbn=10, price=10)
+    BookRent.objects.create(book=book, renter=test_user, rent_end_date=timezone.now() - timedelta(minutes=1))
+
+    assert check_rent_status.delay().get() == 1
+    assert dispatched == [('apps.books.tasks.check_rent_status', 'critical', 0)]
+
+
+def test_cover_upload_renders_on_the_media_queue(dispatched, test_user, settings, tmp_path, django_capture_on_commit_callbacks):
+    settings.MEDIA_ROOT = tmp_path
+    output = io.BytesIO()
+    Image.new('RGB', (400, 600), 'red').save(output, format='PNG')
+
+    with django_capture_on_commit_callbacks(execute=True):
+        book = Book.objects.create(
+            title='Title', author='John Doe', publisher=test_user, isbn=10, price=10,
+            book_image=SimpleUploadedFile('cover.png', output.getvalue(), content_type='image/png'),
+        )
+    book.refresh_from_db()
+
+    assert dispatched == [('apps.books.tasks.generate_book_image_renditions', 'media', 3)]
+    assert book.renditions['sizes']
@@ -0,0 +1,167 @@
+import copy
+
+from contextlib import contextmanager
+from datetime import timedelta
+
+import pytest
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.books.cache import BookCache
+from apps.books.models import Book, BookRent
+from apps.books.services.book_entitlements import BookEntitlementServices
+from apps.users.authentication import UserPrincipalCache
+from apps.users.models import User
+
+from config.db_router import ReplicaRouter, read_from_replicas, pin_to_primary
+
+REPLICA = 'replica'
+
+# A second connection to the test database stands in for a streaming replica. It has to be
+# registered before the test databases are set up, so it is added when the module is collected.
+if REPLICA not in connections.settings:
+    databases = {'default': copy.deepcopy(settings.DATABASES['default']), REPLICA: {
+        **copy.deepcopy(settings.DATABASES['default']), 'TEST': {'MIRROR': 'default'},
+    }}
+    connections.settings[REPLICA] = connections.configure_settings(databases)[REPLICA]
+
+pytestmark = pytest.mark.django_db(transaction=True, databases=['default', REPLICA])
+
+
+@pytest.fixture(scope='module', autouse=True)
+def close_replica_connections():
+    yield
+    connections[REPLICA].close()
+    connections[REPLICA].close_pool()
+
+
+@pytest.fixture(autouse=True)
+def replicas(settings):
+    settings.DATABASE_REPLICAS = [REPLICA]
+
+
+@pytest.fixture
+def test_user() -> User:
+    return User.objects.create_user(username='reader', password='password123')
+
+
+@pytest.fixture
+def test_book(test_user) -> Book:
+    return Book.objects.create(title='Title', author='John Doe', publisher=test_user, isbn=10, price=10)
+
+
+@pytest.fixture
+def reader(test_user) -> APIClient:
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(test_user)}')
+
+    return client
+
+
+def count_queries(client: APIClient, method: str, url: str) -> tuple[int, int, int]:
+    with CaptureQueriesContext(connections['default']) as primary, CaptureQueriesContext(connections[REPLICA]) as replica:
+        response = getattr(client, method)(url)
+
+    return response.status_code, len(primary), len(replica)
+
+
+@contextmanager
+def stale_replica():
+    '''
+    Freeze what the replica sees at the current state of the database, like a replica that
+    stops replaying the primary's writes.
+    '''
+
+    with connections[REPLICA].cursor() as cursor:
+        cursor.execute('BEGIN ISOLATION LEVEL REPEATABLE READ')
+        cursor.execute('SELECT 1 FROM books_book LIMIT 1')
+    try:
+        yield
+    finally:
+        with connections[REPLICA].cursor() as cursor:
+            cursor.execute('ROLLBACK')
+
+
+def test_safe_requests_read_from_replica(reader, test_book):
+    url = f'/api/v4/books/reviews/list/{test_book.uuid}/'
+
+    assert count_queries(reader, 'get', url) == (200, 1, 1)  # the user is loaded from the primary
+    assert count_queries(reader, 'get', url) == (200, 0, 1)
+
+
+def test_caches_are_not_filled_from_a_stale_replica(reader, test_user, test_book):
+    url = f'/api/v4/books/{test_book.uuid}/'
+
+    with stale_replica():
+        Book.objects.filter(uuid=test_book.uuid).update(title='New title')
+        BookCache.invalidate_book(test_book.uuid)
+        User.objects.filter(id=test_user.id).update(role='admin')
+        BookRent.objects.create(book=test_book, renter=test_user, rent_end_date=timezone.now() + timedelta(days=1))
+
+        with connections[REPLICA].cursor() as cursor:
+            cursor.execute('SELECT title FROM books_book')
+            assert cursor.fetchone() == ('Title',)
+
+        status, _, replica = count_queries(reader, 'get', url)
+        assert (status, replica) == (200, 0)
+
+        principal = UserPrincipalCache.get(test_user.id)
+        can_read = BookEntitlementServices.can_read(test_user, test_book.uuid)
+
+    assert reader.get(url).json()['title'] == 'New title'
+    assert principal['role'] == 'admin'
+    assert can_read
+
+
+def test_writes_go_to_primary_and_pin_the_user(reader, test_book):
+    status, _, replica = count_queries(reader, 'post', f'/api/v4/books/{test_book.uuid}/like/')
+    assert status == 200
+    assert replica == 0
+
+    status, _, replica = count_queries(reader, 'get', f'/api/v4/books/reviews/list/{test_book.uuid}/')
+    assert status == 200
+    assert replica == 0
+
+
+def test_anonymous_reads_are_not_pinned(reader, client, test_book):
+    reader.post(f'/api/v4/books/{test_book.uuid}/like/')
+
+    assert count_queries(client, 'get', f'/api/v4/books/reviews/list/{test_book.uuid}/') == (200, 0, 1)
+
+
+def test_pinned_user_from_background_write(reader, test_user, test_book):
+    pin_to_primary(test_user.id)
+
+    status, _, replica = count_queries(reader, 'get', f'/api/v4/books/reviews/list/{test_book.uuid}/')
+
+    assert status == 200
+    assert replica == 0
+
+
+def test_pin_is_read_once_by_requests_that_query_replicas(reader, test_book, monkeypatch):
+    lookups = []
+    monkeypatch.setattr('config.db_router.is_pinned', lambda user_id: lookups.append(user_id) or False)
+
+    reader.get(f'/api/v4/books/{test_book.uuid}/')
+    reader.get(f'/api/v4/books/{test_book.uuid}/')
+    assert lookups == []
+
+    reader.get(f'/api/v4/books/reviews/list/{test_book.uuid}/')
+    assert len(lookups) == 1
+
+
+def test_router_keeps_transactions_on_primary():
+    router = ReplicaRouter()
+
+    assert router.db_for_read(Book) == 'default'
+    with read_from_replicas():
+        assert router.db_for_read(Book) == REPLICA
+        with transaction.atomic():
+            assert router.db_for_read(Book) == 'default'
+    assert router.db_for_write(Book) == 'default'
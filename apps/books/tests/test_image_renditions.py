@@ -0,0 +1,119 @@
+import io
+import pytest
+
+from PIL import Image
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+
+from apps.books.models import Book, BookReview
+from apps.books.tasks import generate_book_image_renditions
+from apps.users.models import User
+from apps.users.tasks import generate_avatar_renditions
+
+
+def make_image(name: str, size=(800, 1200), mode='RGB') -> SimpleUploadedFile:
+    output = io.BytesIO()
+    Image.new(mode, size, 'red').save(output, format='PNG')
+
+    return SimpleUploadedFile(name, output.getvalue(), content_type='image/png')
+
+
+@pytest.fixture(autouse=True)
+def media(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    cache.clear()
+
+
+@pytest.fixture
+def queued(monkeypatch) -> list:
+    '''
+    Run rendition tasks in place and record what was queued.
+    '''
+
+    queued = []
+    for task in (generate_book_image_renditions, generate_avatar_renditions):
+        monkeypatch.setattr(task, 'delay', lambda pk, task=task: queued.append(pk) or task(pk))
+
+    return queued
+
+
+@pytest.fixture
+def test_user(db) -> User:
+    return User.objects.create_user(username='admin2', password='password123', role='admin')
+
+
+def create_book(user: User, image: SimpleUploadedFile | None = None, captured=None) -> Book:
+    if image is None:
+        return Book.objects.create(title='Title', author='John Doe', publisher=user, isbn=10, price=10)
+
+    with captured(execute=True):
+        book = Book.objects.create(title='Title', author='John Doe', publisher=user, isbn=10, price=10, book_image=image)
+    book.refresh_from_db()
+
+    return book
+
+
+def test_upload_generates_renditions(client, test_user, queued, django_capture_on_commit_callbacks):
+    book = create_book(test_user, make_image('cover.png', mode='RGBA'), django_capture_on_commit_callbacks)
+
+    assert queued == [str(book.uuid)]
+    assert book.renditions['source'] == book.book_image.name
+
+    thumb = book.renditions['sizes']['thumb']
+    assert set(thumb) == {'webp', 'jpeg'}
+    assert thumb['webp'] == 'books_images/cover_thumb.webp'
+    with default_storage.open(thumb['jpeg']) as file, Image.open(file) as image:
+        assert (image.format, image.size) == ('JPEG', (160, 240))
+
+    urls = client.get(f'/api/v4/books/{book.uuid}/').json()['book_image_renditions']
+    assert urls['medium']['webp'] == 'http://testserver/media/books_images/cover_medium.webp'
+
+
+def test_changed_image_replaces_renditions(test_user, queued, django_capture_on_commit_callbacks):
+    book = create_book(test_user, make_image('cover.png'), django_capture_on_commit_callbacks)
+    old = book.renditions['sizes']['thumb']['webp']
+
+    with django_capture_on_commit_callbacks(execute=True):
+        book.book_image = make_image('new.png')
+        book.save()
+    book.refresh_from_db()
+
+    assert book.renditions['sizes']['thumb']['webp'] == 'books_images/new_thumb.webp'
+    assert not default_storage.exists(old)
+
+
+def test_existing_images_are_backfilled_by_command(client, test_user, queued):
+    book = create_book(test_user)
+    Book.objects.filter(uuid=book.uuid).update(book_image='books_images/old.png')
+    default_storage.save('books_images/old.png', make_image('old.png'))
+    Book.objects.create(title='No cover', author='John Doe', publisher=test_user, isbn=11, price=10)
+
+    first = client.get(f'/api/v4/books/{book.uuid}/').json()
+    assert queued == []
+    assert first['book_image_renditions'] is None
+
+    output = io.StringIO()
+    call_command('backfill_renditions', stdout=output)
+    assert queued == [str(book.uuid)]
+    assert 'books.Book: 1 stale renditions queued' in output.getvalue()
+
+    second = client.get(f'/api/v4/books/{book.uuid}/').json()
+    assert second['book_image_renditions']['thumb']['jpeg'].endswith('books_images/old_thumb.jpg')
+
+    call_command('backfill_renditions', stdout=io.StringIO())
+    assert queued == [str(book.uuid)]
+
+
+def test_avatar_renditions_in_review_list(client, test_user, queued, django_capture_on_commit_callbacks):
+    book = create_book(test_user)
+    with django_capture_on_commit_callbacks(execute=True):
+        test_user.avatar = make_image('me.png', size=(300, 300))
+        test_user.save()
+    BookReview.objects.create(book=book, author=test_user, content='Review')
+
+    author = client.get(f'/api/v4/books/reviews/list/{book.uuid}/').json()[0]['author']
+
+    assert author['avatar_renditions']['thumb']['webp'] == 'http://testserver/media/users_avatars/me_thumb.webp'
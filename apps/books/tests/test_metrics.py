@@ -0,0 +1,136 @@
+import time
+import pytest
+
+from datetime import timedelta
+from types import SimpleNamespace
+
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from apps.books.models import Book, BookRent
+from apps.books.services.rent_expiry import RentExpiryServices
+from apps.books.tasks import check_rent_status
+from apps.users.models import User
+
+from config.metrics import start_task
+from config.redis import get_broker_redis, get_redis
+
+TOKEN = 'secret'
+
+
+@pytest.fixture(autouse=True)
+def metrics_token(settings):
+    settings.METRICS_TOKEN = TOKEN
+
+
+@pytest.fixture
+def test_user(db) -> User:
+    return User.objects.create_user(username='admin2', password='password123', role='admin')
+
+
+@pytest.fixture
+def broker():
+    client = get_broker_redis()
+    client.flushdb()
+    yield client
+    client.flushdb()
+
+
+def scrape(client: APIClient | None = None) -> dict[str, float]:
+    response = (client or APIClient()).get('/metrics', headers={'Authorization': f'Bearer {TOKEN}'})
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+
+    return {
+        line.rsplit(' ', 1)[0]: float(line.rsplit(' ', 1)[1])
+        for line in response.content.decode().splitlines() if not line.startswith('#')
+    }
+
+
+def test_request_metrics(test_user):
+    client = APIClient()
+    client.get('/api/v4/books/list/')
+    client.get('/api/v4/books/list/')
+
+    metrics = scrape(client)
+
+    labels = 'view="BooksAPIListView",method="GET"'
+    assert metrics[f'http_requests_total{{{labels},status="200"}}'] == 2
+    assert metrics[f'http_request_duration_seconds_count{{{labels}}}'] == 2
+    assert metrics[f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}}'] == 2
+    assert metrics[f'http_request_db_queries_total{{{labels}}}'] == 1  # the second response came from the cache
+
+
+def test_task_metrics(test_user):
+    book = Book.objects.create(title='Title', author='John Doe', publisher=test_user, isbn=10, price=10)
+    for _ in range(3):
+        BookRent.objects.create(book=book, renter=test_user, rent_end_date=timezone.now() - timedelta(minutes=1))
+
+    assert check_rent_status.apply().get() == 3
+    check_rent_status.apply()
+
+    metrics = scrape()
+
+    labels = 'task="apps.books.tasks.check_rent_status"'
+    assert metrics[f'celery_tasks_total{{{labels},state="success"}}'] == 2
+    assert metrics[f'celery_task_rows_total{{{labels}}}'] == 3
+    assert metrics[f'celery_task_duration_seconds_count{{{labels}}}'] == 2
+    assert metrics[f'celery_task_duration_seconds_bucket{{{labels},le="1800"}}'] == 2
+    assert time.time() - metrics[f'celery_task_last_success_timestamp_seconds{{{labels}}}'] < 60
+
+
+def test_task_failures_and_queue_wait(db, monkeypatch):
+    def expire(full_sweep):
+        raise ValueError('broken')
+
+    monkeypatch.setattr(RentExpiryServices, 'expire', expire)
+    check_rent_status.apply()
+    start_task('1', SimpleNamespace(name='apps.books.tasks.check_rent_status', request=SimpleNamespace(sent_at=time.time() - 7)))
+
+    metrics = scrape()
+
+    labels = 'task="apps.books.tasks.check_rent_status"'
+    assert metrics[f'celery_tasks_total{{{labels},state="failure"}}'] == 1
+    assert metrics[f'celery_task_failures_total{{{labels},exception="ValueError"}}'] == 1
+    assert metrics[f'celery_task_queue_wait_seconds_bucket{{{labels},le="5"}}'] == 0
+    assert metrics[f'celery_task_queue_wait_seconds_bucket{{{labels},le="10"}}'] == 1
+
+
+def test_queue_lengths(db, broker):
+    broker.lpush('critical', 'message')
+    broker.lpush('critical:3', 'message', 'message')
+    broker.lpush('media', 'message')
+
+    metrics = scrape()
+
+    assert metrics['celery_queue_length{queue="critical"}'] == 3
+    assert metrics['celery_queue_length{queue="media"}'] == 1
+    assert metrics['celery_queue_length{queue="maintenance"}'] == 0
+
+
+def test_metrics_token(db, settings):
+    assert APIClient().get('/metrics').status_code == 403
+    assert APIClient().get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 403
+    assert scrape()
+
+
+def test_metrics_are_closed_without_a_token(db, settings):
+    settings.METRICS_TOKEN = None
+
+    settings.DEBUG = True
+
+    assert APIClient().get('/metrics').status_code == 403
+    assert APIClient().get('/metrics', headers={'Authorization': 'Bearer None'}).status_code == 403
+
+
+def test_disabled_metrics_record_nothing(test_user, settings):
+    settings.METRICS_ENABLED = False
+    book = Book.objects.create(title='Title', author='John Doe', publisher=test_user, isbn=10, price=10)
+    BookRent.objects.create(book=book, renter=test_user, rent_end_date=timezone.now() - timedelta(minutes=1))
+
+    APIClient().get('/api/v4/books/list/')
+    check_rent_status.apply()
+    start_task('1', SimpleNamespace(name='apps.books.tasks.check_rent_status', request=SimpleNamespace(sent_at=time.time())))
+
+    assert not get_redis().keys('metrics:*')
@@ -0,0 +1,116 @@
+import json
+
+import pytest
+import stripe
+
+from rest_framework.test import APIClient
+
+from apps.books.models import Book
+from apps.users.models import User
+
+from utils.payments import CircuitBreaker, PaymentsClient, PaymentsUnavailable
+
+
+class StripeStandIn(stripe.HTTPClient):
+    '''
+    Local stand-in for the Stripe API that records requests and answers with canned objects.
+    '''
+
+    name = 'stand-in'
+
+    def __init__(self, fail: bool = False):
+        super().__init__()
+        self.fail = fail
+        self.requests = []
+
+    def request(self, method, url, headers, post_data=None, *, _usage=None):
+        path = url.split('/v1/', 1)[1].split('?')[0]
+        self.requests.append((method, path))
+
+        if self.fail:
+            raise stripe.APIConnectionError('Connection refused')
+        if path == 'prices' and method == 'get':
+            body = {'object': 'list', 'data': [], 'has_more': False, 'url': '/v1/prices'}
+        elif path == 'prices':
+            body = {'id': 'price_1', 'object': 'price'}
+        else:
+            body = {'id': 'cs_1', 'object': 'checkout.session', 'url': 'https://checkout.stripe.test/cs_1'}
+
+        return json.dumps(body), 200, {}
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def stand_in(monkeypatch) -> StripeStandIn:
+    stand_in = StripeStandIn()
+    client = PaymentsClient(stripe.StripeClient('sk_test', http_client=stand_in), CircuitBreaker(2, 30))
+    monkeypatch.setattr('apps.books.services.book_rent.get_payments_client', lambda: client)
+
+    return stand_in
+
+
+@pytest.fixture
+def test_user(db) -> User:
+    return User.objects.create_user(username='reader', password='password123')
+
+
+@pytest.fixture
+def test_book(db, test_user) -> Book:
+    return Book.objects.create(title='Title', author='John Doe', publisher=test_user, isbn=10, price=10)
+
+
+@pytest.fixture
+def renter(test_user) -> APIClient:
+    client = APIClient()
+    client.force_authenticate(user=test_user)
+
+    return client
+
+
+def test_rent_book_returns_checkout_url(stand_in, renter, test_book):
+    response = renter.post(f'/api/v4/books/rent/{test_book.uuid}/')
+
+    assert response.status_code == 200
+    assert response.json()['checkout_url'] == 'https://checkout.stripe.test/cs_1'
+
+
+def test_book_price_is_created_once(stand_in, renter, test_book):
+    renter.post(f'/api/v4/books/rent/{test_book.uuid}/')
+    renter.post(f'/api/v4/books/rent/{test_book.uuid}/')
+
+    assert stand_in.requests == [
+        ('get', 'prices'), ('post', 'prices'), ('post', 'checkout/sessions'), ('post', 'checkout/sessions'),
+    ]
+
+
+def test_circuit_breaker_fails_fast_during_outage(stand_in, renter, test_book):
+    stand_in.fail = True
+
+    assert renter.post(f'/api/v4/books/rent/{test_book.uuid}/').status_code == 503
+    assert renter.post(f'/api/v4/books/rent/{test_book.uuid}/').status_code == 503
+    calls = len(stand_in.requests)
+
+    response = renter.post(f'/api/v4/books/rent/{test_book.uuid}/')
+
+    assert response.status_code == 503
+    assert len(stand_in.requests) == calls
+
+
+def test_circuit_breaker_lets_a_trial_request_through_after_timeout():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+
+    breaker.before_call()
+    breaker.record_success()
+
+    assert breaker.opened_at is None
+
+
+def test_open_circuit_breaker_raises():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    breaker.record_failure()
+
+    with pytest.raises(PaymentsUnavailable):
+        breaker.before_call()
@@ -0,0 +1,105 @@
+import pytest
+
+from datetime import timedelta
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.books.models import Book, BookRent, BookReview, FavoriteBook
+from apps.books.views.books_reviews import BookReviewsListView
+from apps.users.models import User
+
+
+@pytest.fixture
+def test_user(db) -> User:
+    return User.objects.create_user(username='admin2', password='password123', role='admin')
+
+
+@pytest.fixture
+def books(test_user, settings, tmp_path) -> list[Book]:
+    '''
+    A catalog large enough for per-row queries to blow any budget.
+    '''
+
+    settings.MEDIA_ROOT = tmp_path
+    books = [
+        Book.objects.create(
+            title=f'Book {i}', author='John Doe', publisher=test_user, isbn=i, price=10,
+            file=SimpleUploadedFile('book.txt', b'content'),
+        )
+        for i in range(25)
+    ]
+
+    for book in books:
+        BookReview.objects.create(book=book, author=test_user, content='Review')
+        FavoriteBook.objects.create(book=book, user=test_user)
+    BookRent.objects.create(book=books[0], renter=test_user, rent_end_date=timezone.now() + timedelta(days=1))
+
+    return books
+
+
+@pytest.fixture
+def api_client(test_user) -> APIClient:
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(test_user)}')
+
+    return client
+
+
+def assert_within_budget(response, settings) -> None:
+    metrics = response.query_metrics
+    budget = settings.QUERY_BUDGETS[metrics.view]
+
+    assert metrics.queries <= budget, (
+        f'{metrics.view} ran {metrics.queries} queries, budget is {budget}:\n'
+        + '\n'.join(sql for sql, _ in metrics.statements)
+    )
+    assert metrics.duplicates == 0, f'{metrics.view} repeated queries: {metrics.statements.most_common(3)}'
+
+
+@pytest.mark.parametrize('method, url', [
+    ('get', '/api/v4/books/list/'),
+    ('get', '/api/v4/books/search/?q=book'),
+    ('get', '/api/v4/books/{book}/'),
+    ('get', '/api/v4/books/read/{book}/'),
+    ('get', '/api/v4/books/reviews/list/{book}/'),
+    ('get', '/api/v4/books/my-favorites/'),
+    ('post', '/api/v4/books/{book}/like/'),
+])
+def test_endpoint_stays_within_query_budget(api_client, books, settings, method, url):
+    response = getattr(api_client, method)(url.format(book=books[0].uuid))
+
+    assert response.status_code < 400
+    assert_within_budget(response, settings)
+
+
+def test_server_timing_header(api_client, books):
+    response = api_client.get('/api/v4/books/list/')
+
+    timing = response['Server-Timing']
+    assert timing.startswith('db;dur=')
+    assert '2 queries, 0 duplicates' in timing
+    assert 'serializer;dur=' in timing
+    assert 'total;dur=' in timing
+
+
+def test_duplicate_queries_are_counted(api_client, books, test_user, monkeypatch):
+    for _ in range(2):
+        BookReview.objects.create(book=books[0], author=test_user, content='Review')
+    # Without select_related('author'), every review loads the same author again
+    monkeypatch.setattr(
+        BookReviewsListView, 'get_queryset',
+        lambda view: BookReview.objects.filter(book_id=view.kwargs['book_uuid']).order_by('-created_at'),
+    )
+
+    response = api_client.get(f'/api/v4/books/reviews/list/{books[0].uuid}/')
+    metrics = response.query_metrics
+
+    (sql, _), count = metrics.statements.most_common(1)[0]
+    assert User._meta.db_table in sql
+    assert count == 3
+    assert metrics.duplicates == 2
+    assert '2 duplicates' in response['Server-Timing']
@@ -0,0 +1,96 @@
+import pytest
+
+from datetime import timedelta
+
+from django.db import connection
+from django.utils import timezone
+
+from apps.books.models import Book, BookRent, BookReview, BookRating, FavoriteBook
+from apps.books.pagination import BookKeysetPagination
+from apps.books.services.books_search import BooksSearchServices
+from apps.users.models import User
+
+pytestmark = pytest.mark.skipif(connection.vendor != 'postgresql', reason='EXPLAIN plans are PostgreSQL specific')
+
+
+@pytest.fixture
+def dataset(db) -> dict:
+    '''
+    Seed every table the hot querysets touch and refresh planner statistics.
+    '''
+
+    users = User.objects.bulk_create([User(username=f'user{i}') for i in range(20)])
+    books = Book.objects.bulk_create([
+        Book(title=f'Book {i}', author=f'Author {i % 10}', publisher=users[i % 20],
+             isbn=f'{i:013d}', price=10, rating=i % 7, file_sha256=f'{i:064x}')
+        for i in range(500)
+    ])
+
+    now = timezone.now()
+    BookRent.objects.bulk_create([
+        BookRent(book=books[i % 500], renter=users[i % 20], rent_end_date=now + timedelta(hours=i - 1000))
+        for i in range(2000)
+    ])
+    BookReview.objects.bulk_create([
+        BookReview(book=books[i % 500], author=users[i % 20], content='Review')
+        for i in range(2000)
+    ])
+    BookRating.objects.bulk_create([
+        BookRating(book=books[i], user=users[j]) for i in range(100) for j in range(20)
+    ])
+    FavoriteBook.objects.bulk_create([
+        FavoriteBook(book=books[i], user=users[j]) for i in range(100) for j in range(20)
+    ])
+
+    with connection.cursor() as cursor:
+        for model in (User, Book, BookRent, BookReview, BookRating, FavoriteBook):
+            cursor.execute(f'ANALYZE {connection.ops.quote_name(model._meta.db_table)}')
+        cursor.execute('SET LOCAL enable_seqscan = off')
+
+    return {'user': users[3], 'book': books[42], 'now': now}
+
+
+def hot_querysets(dataset: dict) -> dict:
+    '''
+    The querysets issued by the views and services on every request, keyed by their call site.
+    '''
+
+    user, book, now = dataset['user'], dataset['book'], dataset['now']
+    position = (book.rating, book.created_at, book.uuid)
+
+    return {
+        'BooksAPIListView first page': Book.objects.order_by(*BookKeysetPagination.ordering)[:21],
+        'BooksAPIListView next page': Book.objects.order_by(*BookKeysetPagination.ordering).filter(
+            BookKeysetPagination().get_keyset_filter(position, reverse=False)
+        )[:21],
+        'BookAPIDetailView': Book.objects.select_related('publisher').filter(uuid=book.uuid),
+        'BookSearchAPIView': BooksSearchServices.search('book 4'),
+        'BookUploadServices.commit_upload dedupe': Book.objects.filter(file_sha256=book.file_sha256),
+        'BookRentServices.rent_book active rent': BookRent.objects.filter(
+            book=book, renter=user, rent_end_date__gt=now
+        ),
+        'BookAPIReadView rent check': BookRent.objects.filter(renter=user, book=book),
+        'RentExpiryServices.expire_due': BookRent.objects.filter(rent_end_date__lte=now).order_by('rent_end_date')[:1000],
+        'BooksRatingServices.like_book': BookRating.objects.filter(book=book, user=user),
+        'BookReviewsListView': BookReview.objects.filter(book=book).order_by('-created_at'),
+        'FavoriteBookListView': FavoriteBook.objects.filter(user=user),
+    }
+
+
+@pytest.mark.parametrize('name', [
+    'BooksAPIListView first page',
+    'BooksAPIListView next page',
+    'BookAPIDetailView',
+    'BookSearchAPIView',
+    'BookUploadServices.commit_upload dedupe',
+    'BookRentServices.rent_book active rent',
+    'BookAPIReadView rent check',
+    'RentExpiryServices.expire_due',
+    'BooksRatingServices.like_book',
+    'BookReviewsListView',
+    'FavoriteBookListView',
+])
+def test_hot_queryset_uses_an_index(dataset, name):
+    plan = hot_querysets(dataset)[name].explain()
+
+    assert 'Seq Scan' not in plan, f'{name} regressed to a sequential scan:\n{plan}'
@@ -0,0 +1,76 @@
+import pytest
+
+from datetime import timedelta
+
+from django.utils import timezone
+
+from apps.books.models import Book, BookRent
+from apps.books.services.rent_expiry import RentExpiryServices
+from apps.books.tasks import check_rent_status
+from apps.users.models import User
+
+from config.redis import get_redis
+
+
+@pytest.fixture
+def test_user(db) -> User:
+    return User.objects.create_user(username='admin2', password='password123', role='admin')
+
+
+@pytest.fixture
+def test_book(db, test_user) -> Book:
+    return Book.objects.create(title='Title', author='John Doe', publisher=test_user, isbn=10, price=10)
+
+
+def create_rents(book: Book, user: User, overdue: int, active: int) -> None:
+    now = timezone.now()
+    for i in range(overdue):
+        BookRent.objects.create(book=book, renter=user, rent_end_date=now - timedelta(minutes=i + 1))
+    for i in range(active):
+        BookRent.objects.create(book=book, renter=user, rent_end_date=now + timedelta(days=i + 1))
+
+
+def test_check_rent_status_expires_overdue_rents(test_book, test_user):
+    create_rents(test_book, test_user, overdue=3, active=2)
+
+    assert check_rent_status() == 3
+    assert BookRent.objects.count() == 2
+    assert not BookRent.objects.filter(rent_end_date__lte=timezone.now()).exists()
+
+
+def test_expire_due_deletes_in_batches(test_book, test_user):
+    create_rents(test_book, test_user, overdue=5, active=1)
+
+    expired = RentExpiryServices.expire_due(batch_size=2)
+
+    assert expired == [(test_book.uuid, test_user.id)] * 5
+    assert BookRent.objects.count() == 1
+
+
+def test_expire_due_stops_at_time_budget(test_book, test_user):
+    create_rents(test_book, test_user, overdue=5, active=0)
+
+    expired = RentExpiryServices.expire_due(batch_size=2, time_budget=1e-9)
+
+    assert len(expired) == 2
+    assert BookRent.objects.count() == 3
+
+
+def test_redis_timer_expires_scheduled_rents(test_book, test_user, settings, django_capture_on_commit_callbacks):
+    settings.BOOKS_RENT_EXPIRY_BACKEND = 'redis'
+
+    with django_capture_on_commit_callbacks(execute=True):
+        create_rents(test_book, test_user, overdue=2, active=1)
+    assert get_redis().zcard(RentExpiryServices.timer_key) == 3
+
+    assert check_rent_status() == 2
+    assert BookRent.objects.count() == 1
+    assert get_redis().zcard(RentExpiryServices.timer_key) == 1
+
+
+def test_redis_timer_skips_unscheduled_rents_until_full_sweep(test_book, test_user, settings):
+    settings.BOOKS_RENT_EXPIRY_BACKEND = 'redis'
+    create_rents(test_book, test_user, overdue=1, active=0)
+
+    assert check_rent_status() == 0
+    assert check_rent_status(full_sweep=True) == 1
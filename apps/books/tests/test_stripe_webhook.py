@@ -0,0 +1,151 @@
+import hmac
+import json
+import time
+import hashlib
+
+import pytest
+
+from rest_framework.test import APIClient
+
+from apps.books.models import Book, BookRent
+from apps.books.services.book_rent import BookRentServices
+from apps.books.services.stripe_webhook import StripeWebhookServices
+from apps.books.tasks import drain_stripe_events
+from apps.users.models import User
+
+from config.redis import get_redis
+
+
+WEBHOOK_URL = '/api/v4/books/rent/stripe-webhook/'
+SECRET = 'whsec_test'
+
+
+@pytest.fixture(autouse=True)
+def webhook_secret(settings):
+    settings.STRIPE_WEBHOOK_SECRET = SECRET
+
+
+@pytest.fixture
+def queued_drains(monkeypatch) -> list:
+    '''
+    Record drain tasks instead of sending them to the broker.
+    '''
+
+    queued = []
+    monkeypatch.setattr(drain_stripe_events, 'delay', lambda: queued.append(True))
+
+    return queued
+
+
+@pytest.fixture
+def test_user(db) -> User:
+    return User.objects.create_user(username='reader', password='password123')
+
+
+@pytest.fixture
+def test_book(db, test_user) -> Book:
+    return Book.objects.create(title='Title', author='John Doe', publisher=test_user, isbn=10, price=10)
+
+
+def checkout_event(session_id: str, book: Book, user: User, payment_status: str = 'paid') -> dict:
+    return {
+        'id': f'evt_{session_id}',
+        'object': 'event',
+        'type': 'checkout.session.completed',
+        'data': {'object': {
+            'id': session_id,
+            'object': 'checkout.session',
+            'payment_status': payment_status,
+            'client_reference_id': str(user.id),
+            'metadata': {'book_uuid': str(book.uuid), 'user_id': str(user.id)},
+        }},
+    }
+
+
+def post_event(event: dict, secret: str = SECRET):
+    '''
+    Send an event signed the way Stripe signs webhook requests.
+    '''
+
+    payload = json.dumps(event)
+    timestamp = int(time.time())
+    signature = hmac.new(secret.encode(), f'{timestamp}.{payload}'.encode(), hashlib.sha256).hexdigest()
+
+    return APIClient().post(
+        WEBHOOK_URL, data=payload, content_type='application/json',
+        HTTP_STRIPE_SIGNATURE=f't={timestamp},v1={signature}',
+    )
+
+
+def test_webhook_buffers_event_without_database_work(test_book, test_user, queued_drains):
+    response = post_event(checkout_event('cs_1', test_book, test_user))
+
+    assert response.status_code == 200
+    assert response.query_metrics.queries == 0
+    assert get_redis().llen(StripeWebhookServices.buffer_key) == 1
+    assert queued_drains == [True]
+    assert not BookRent.objects.exists()
+
+
+def test_webhook_rejects_bad_signature(test_book, test_user, queued_drains):
+    response = post_event(checkout_event('cs_1', test_book, test_user), secret='whsec_other')
+
+    assert response.status_code == 400
+    assert get_redis().llen(StripeWebhookServices.buffer_key) == 0
+
+
+def test_unpaid_sessions_are_acknowledged_and_ignored(test_book, test_user, queued_drains):
+    response = post_event(checkout_event('cs_1', test_book, test_user, payment_status='unpaid'))
+
+    assert response.status_code == 200
+    assert get_redis().llen(StripeWebhookServices.buffer_key) == 0
+
+
+def test_drain_creates_rentals_in_batches_once(test_book, test_user, queued_drains):
+    for i in range(5):
+        post_event(checkout_event(f'cs_{i}', test_book, test_user))
+    post_event(checkout_event('cs_0', test_book, test_user))
+
+    assert len(queued_drains) == 1
+    assert StripeWebhookServices.drain(batch_size=2) == 5
+    assert set(BookRent.objects.values_list('stripe_session_id', flat=True)) == {f'cs_{i}' for i in range(5)}
+
+    post_event(checkout_event('cs_1', test_book, test_user))
+    assert drain_stripe_events() == 0
+    assert BookRent.objects.count() == 5
+
+
+def test_drain_skips_rentals_for_missing_books(test_book, test_user, queued_drains):
+    event = checkout_event('cs_1', test_book, test_user)
+    Book.objects.filter(uuid=test_book.uuid).delete()
+    post_event(event)
+
+    assert drain_stripe_events() == 0
+    assert get_redis().llen(StripeWebhookServices.buffer_key) == 0
+
+
+def test_killed_drain_loses_no_session(test_book, test_user, queued_drains, monkeypatch):
+    for i in range(3):
+        post_event(checkout_event(f'cs_{i}', test_book, test_user))
+
+    def killed(sessions):
+        raise SystemExit  # nothing of the drain runs after this, like a worker killed by its time limit
+
+    with monkeypatch.context() as patch:
+        patch.setattr(BookRentServices, 'create_rentals_after_payment', killed)
+        with pytest.raises(SystemExit):
+            StripeWebhookServices.drain(batch_size=2)
+
+    client = get_redis()
+    assert client.llen(StripeWebhookServices.buffer_key) == 1
+    [worker] = [worker.decode() for worker in client.smembers(StripeWebhookServices.workers_key)]
+    assert client.llen(StripeWebhookServices.get_processing_key(worker)) == 2
+
+    # A live drain's sessions are left alone, a dead one's are taken back
+    assert StripeWebhookServices.requeue_orphans(client) == 0
+    client.delete(StripeWebhookServices.get_lease_key(worker))
+
+    assert drain_stripe_events() == 3
+    assert set(BookRent.objects.values_list('stripe_session_id', flat=True)) == {f'cs_{i}' for i in range(3)}
+    assert not client.keys(f'{StripeWebhookServices.processing_key}:*')
+    assert not client.smembers(StripeWebhookServices.workers_key)
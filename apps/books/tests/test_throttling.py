@@ -0,0 +1,112 @@
+import pytest
+
+from rest_framework.test import APIClient
+
+from apps.books.models import Book
+from apps.books.throttling import TOKEN_BUCKETS
+from apps.users.models import User
+
+
+@pytest.fixture
+def rates(settings):
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {'likes': '2/min', 'likes_ip': '3/min', 'reviews': '1/min'},
+    }
+
+
+@pytest.fixture
+def test_user(db) -> User:
+    return User.objects.create_user(username='reader', password='password123')
+
+
+@pytest.fixture
+def test_book(test_user) -> Book:
+    return Book.objects.create(title='Title', author='John Doe', publisher=test_user, isbn=10, price=10)
+
+
+def api_client(user: User) -> APIClient:
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    return client
+
+
+def test_user_bucket_runs_out(rates, test_user, test_book):
+    client = api_client(test_user)
+
+    responses = [client.post(f'/api/v4/books/{test_book.uuid}/like/') for _ in range(3)]
+
+    assert 429 not in [response.status_code for response in responses[:2]]
+    assert responses[2].status_code == 429
+    assert 25 <= int(responses[2]['Retry-After']) <= 30
+
+
+def test_ip_bucket_is_shared_by_users(rates, test_user, test_book):
+    others = [User.objects.create_user(username=f'other{i}', password='password123') for i in range(3)]
+
+    codes = [api_client(user).post(f'/api/v4/books/{test_book.uuid}/like/').status_code for user in [test_user, *others]]
+
+    assert codes[:3].count(429) == 0
+    assert codes[3] == 429
+
+
+def test_scopes_have_separate_buckets(rates, test_user, test_book):
+    client = api_client(test_user)
+    review = {'book': str(test_book.uuid), 'author': test_user.id, 'content': 'Good'}
+
+    assert client.post('/api/v4/books/review/create/', review).status_code == 201
+    assert client.post('/api/v4/books/review/create/', review).status_code == 429
+    assert client.post(f'/api/v4/books/{test_book.uuid}/like/').status_code != 429
+
+
+def test_memory_bucket_refills():
+    bucket = TOKEN_BUCKETS['memory']
+
+    assert bucket.consume('fast', 1, 1000) == 0
+    assert bucket.consume('fast', 1, 1000) < 0.001
+    assert bucket.consume('slow', 1, 0.01) == 0
+    assert bucket.consume('slow', 1, 0.01) > 90
+
+
+def test_forged_forwarded_for_is_ignored(rates, test_user, test_book):
+    others = [User.objects.create_user(username=f'other{i}', password='password123') for i in range(3)]
+
+    codes = [
+        api_client(user).post(f'/api/v4/books/{test_book.uuid}/like/', headers={'X-Forwarded-For': f'10.0.0.{i}'}).status_code
+        for i, user in enumerate([test_user, *others])
+    ]
+
+    assert codes[3] == 429
+
+
+def test_client_ip_behind_a_proxy(rates, settings, test_user, test_book):
+    settings.REST_FRAMEWORK = {**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}
+    others = [User.objects.create_user(username=f'other{i}', password='password123') for i in range(3)]
+
+    codes = [
+        api_client(user).post(
+            f'/api/v4/books/{test_book.uuid}/like/', headers={'X-Forwarded-For': f'1.1.1.1, 10.0.0.{i}'},
+        ).status_code
+        for i, user in enumerate([test_user, *others])
+    ]
+
+    assert 429 not in codes
+
+
+def test_redis_bucket_script(settings):
+    settings.THROTTLE_BACKEND = 'redis'
+    bucket = TOKEN_BUCKETS['redis']
+
+    assert [bucket.consume('throttle:test', 2, 1 / 60) for _ in range(2)] == [0, 0]
+    assert 59 <= bucket.consume('throttle:test', 2, 1 / 60) <= 60
+    assert bucket.consume('throttle:other', 2, 1 / 60) == 0
+
+
+def test_redis_backend_throttles_requests(rates, settings, test_user, test_book):
+    settings.THROTTLE_BACKEND = 'redis'
+    client = api_client(test_user)
+
+    codes = [client.post(f'/api/v4/books/{test_book.uuid}/like/').status_code for _ in range(3)]
+
+    assert codes[2] == 429
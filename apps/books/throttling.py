@@ -0,0 +1,162 @@
+import time
+import logging
+import threading
+
+from django.conf import settings
+
+from redis.commands.core import Script
+from redis.exceptions import RedisError
+
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+from config.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1]: bucket, ARGV[1]: capacity, ARGV[2]: tokens added per second.
+# The bucket is a hash of the tokens left and the time they were counted, refilled on each
+# call from the Redis clock. Returns whether a token was taken and, if not, the seconds until
+# one is available (as a string, Lua numbers are truncated to integers in replies).
+TOKEN_BUCKET_SCRIPT = '''
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'at')
+local tokens = tonumber(bucket[1]) or capacity
+local at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - at) * rate)
+
+local allowed, wait = 0, (1 - tokens) / rate
+if tokens >= 1 then
+    allowed, wait, tokens = 1, 0, tokens - 1
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(wait)}
+'''
+
+
+class RedisTokenBucket:
+    '''
+    Token buckets shared by every process, updated atomically by a Lua script. The script is
+    hashed once and run with EVALSHA, loaded into Redis on first use or after a restart.
+    When Redis is down requests are let through rather than failed.
+    '''
+
+    def __init__(self):
+        self.script = Script(None, TOKEN_BUCKET_SCRIPT.encode())
+
+    def consume(self, key: str, capacity: int, rate: float) -> float:
+        try:
+            allowed, wait = self.script(keys=[key], args=[capacity, rate], client=get_redis())
+        except RedisError:
+            logger.warning('Throttle bucket %s unavailable, request allowed', key, exc_info=True)
+            return 0
+
+        return 0 if allowed else float(wait)
+
+
+class MemoryTokenBucket:
+    '''
+    Token buckets of the current process only, for tests and single-process development.
+    '''
+
+    def __init__(self):
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def consume(self, key: str, capacity: int, rate: float) -> float:
+        now = time.monotonic()
+
+        with self.lock:
+            tokens, at = self.buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - at) * rate)
+
+            if tokens < 1:
+                self.buckets[key] = (tokens, now)
+                return (1 - tokens) / rate
+
+            self.buckets[key] = (tokens - 1, now)
+            return 0
+
+    def clear(self) -> None:
+        with self.lock:
+            self.buckets.clear()
+
+
+TOKEN_BUCKETS = {
+    'redis': RedisTokenBucket(),
+    'memory': MemoryTokenBucket(),
+}
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    '''
+    Base of the token bucket throttles. Like DRF's ``ScopedRateThrottle``, the rate comes from
+    ``DEFAULT_THROTTLE_RATES`` under the ``throttle_scope`` of the view (plus ``scope_suffix``);
+    views without a scope or rate are not throttled. A rate of ``'10/min'`` is a bucket of 10
+    tokens refilled at 10 per minute, so bursts up to the full rate are allowed. The buckets
+    live in the backend named by ``THROTTLE_BACKEND``.
+    '''
+
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+    scope_suffix = ''
+
+    def __init__(self):
+        # The rate depends on the view, so it is read in allow_request()
+        self.wait_time = 0
+
+    def allow_request(self, request, view) -> bool:
+        scope = getattr(view, 'throttle_scope', None)
+        if not scope:
+            return True
+
+        self.scope = scope + self.scope_suffix
+        self.THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
+        if self.THROTTLE_RATES.get(self.scope) is None:
+            return True
+
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+
+        bucket = TOKEN_BUCKETS[settings.THROTTLE_BACKEND]
+        self.wait_time = bucket.consume(key, self.num_requests, self.num_requests / self.duration)
+
+        return self.wait_time == 0
+
+    def wait(self) -> float | None:
+        return self.wait_time or None
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    '''
+    One bucket per user and scope; anonymous requests get one per client IP.
+    '''
+
+    def get_cache_key(self, request, view) -> str:
+        if request.user and request.user.is_authenticated:
+            ident = f'user:{request.user.pk}'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    '''
+    One bucket per client IP, with the rate of the ``<scope>_ip`` scope. Caps what a single
+    address can do across accounts.
+    '''
+
+    scope_suffix = '_ip'
+
+    def get_cache_key(self, request, view) -> str:
+        return self.cache_format % {'scope': self.scope, 'ident': f'ip:{self.get_ident(request)}'}
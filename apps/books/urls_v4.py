@@ -2,11 +2,12 @@ from django.urls import path
 
 from .views.books_views import (
     BooksAPIListView, BookAPIDetailView, BookAPIUpdateView,
-    BookAPICreateView, BookAPIReadView
+    BookAPICreateView, BookAPIReadView, BookSearchAPIView,
 )
 
 from .views.books_rent import (
-    RentBookAPIView, UnrentBookAPIView
+    RentBookAPIView, UnrentBookAPIView,
+    StripeWebhookAPIView,
 )
 
 from .views.books_reviews import (
@@ -23,14 +24,30 @@ from .views.books_favorites import (
     DeleteBookFromFavorites,
 )
 
+from .views.books_uploads import (
+    BookUploadCreateView, BookUploadDetailView,
+    BookUploadCommitView,
+)
+
+from .views.books_import import BookImportAPIView
+from .views.books_export import BookExportAPIView
+from .views.books_pages import BookContentsAPIView, BookPageAPIView, BookChapterAPIView
+
 
 urlpatterns = [
     path('list/', BooksAPIListView.as_view(), name='books_list'),
+    path('search/', BookSearchAPIView.as_view(), name='books_search'),
     path('<uuid:uuid>/', BookAPIDetailView.as_view(), name='book_detail'),
     path('<uuid:uuid>/update/', BookAPIUpdateView.as_view(), name='book_update'),
     path('create/', BookAPICreateView.as_view(), name='book_create'),
+    path('import/', BookImportAPIView.as_view(), name='books_import'),
+    path('export/<str:dataset>/', BookExportAPIView.as_view(), name='books_export'),
+    path('uploads/', BookUploadCreateView.as_view(), name='book_upload_create'),
+    path('uploads/<uuid:uuid>/', BookUploadDetailView.as_view(), name='book_upload_detail'),
+    path('uploads/<uuid:uuid>/commit/', BookUploadCommitView.as_view(), name='book_upload_commit'),
     path('rent/<uuid:book_uuid>/', RentBookAPIView.as_view(), name='book_rent'),
     path('unrent/<uuid:book_uuid>/', UnrentBookAPIView.as_view(), name='book_unrent'),
+    path('rent/stripe-webhook/', StripeWebhookAPIView.as_view(), name='stripe_webhook'),
     path('review/create/', CreateBookReviewAPIView.as_view(), name='create_book_review'),
     path('reviews/list/<uuid:book_uuid>/', BookReviewsListView.as_view(), name='reviews_list'),
     path('review/update/<uuid:uuid>/', BookReviewUpdateView.as_view(), name='review_update'),
@@ -38,6 +55,9 @@ urlpatterns = [
     path('<uuid:book_uuid>/like/', LikeBookView.as_view(), name='book_like'),
     path('<uuid:book_uuid>/dislike/', DislikeBookView.as_view(), name='book_dislike'),
     path('read/<uuid:book_uuid>/', BookAPIReadView.as_view(), name='book_dislike'),
+    path('read/<uuid:book_uuid>/contents/', BookContentsAPIView.as_view(), name='book_contents'),
+    path('read/<uuid:book_uuid>/pages/<int:page>/', BookPageAPIView.as_view(), name='book_page'),
+    path('read/<uuid:book_uuid>/chapters/<int:chapter>/', BookChapterAPIView.as_view(), name='book_chapter'),
     path('my-favorites/', FavoriteBookListView.as_view(), name='books_favorites'),
     path('add-book-to-favorites/', AddBookToFavorites.as_view(), name='add_book_to_favorites'),
     path('delete-book-from-favorites/<uuid:uuid>/', DeleteBookFromFavorites.as_view(), name='delete_book_from_favorites'),
@@ -0,0 +1,58 @@
+from django.urls import path
+
+from .views.books_views import (
+    BookAPIUpdateView, BookAPICreateView, BookSearchAPIView,
+)
+
+from .views.books_async import (
+    AsyncBooksListView, AsyncBookDetailView, AsyncBookReadView,
+)
+
+from .views.books_rent import (
+    RentBookAPIView, UnrentBookAPIView,
+    StripeWebhookAPIView,
+)
+
+from .views.books_reviews import (
+    CreateBookReviewAPIView, BookReviewsListView,
+    BookReviewUpdateView, BookReviewDeleteView,
+)
+
+from .views.books_rating import (
+    LikeBookView, DislikeBookView
+)
+
+from .views.books_favorites import (
+    FavoriteBookListView, AddBookToFavorites,
+    DeleteBookFromFavorites,
+)
+
+from .views.books_uploads import (
+    BookUploadCreateView, BookUploadDetailView,
+    BookUploadCommitView,
+)
+
+
+urlpatterns = [
+    path('list/', AsyncBooksListView.as_view(), name='books_list'),
+    path('search/', BookSearchAPIView.as_view(), name='books_search'),
+    path('<uuid:uuid>/', AsyncBookDetailView.as_view(), name='book_detail'),
+    path('<uuid:uuid>/update/', BookAPIUpdateView.as_view(), name='book_update'),
+    path('create/', BookAPICreateView.as_view(), name='book_create'),
+    path('uploads/', BookUploadCreateView.as_view(), name='book_upload_create'),
+    path('uploads/<uuid:uuid>/', BookUploadDetailView.as_view(), name='book_upload_detail'),
+    path('uploads/<uuid:uuid>/commit/', BookUploadCommitView.as_view(), name='book_upload_commit'),
+    path('rent/<uuid:book_uuid>/', RentBookAPIView.as_view(), name='book_rent'),
+    path('unrent/<uuid:book_uuid>/', UnrentBookAPIView.as_view(), name='book_unrent'),
+    path('rent/stripe-webhook/', StripeWebhookAPIView.as_view(), name='stripe_webhook'),
+    path('review/create/', CreateBookReviewAPIView.as_view(), name='create_book_review'),
+    path('reviews/list/<uuid:book_uuid>/', BookReviewsListView.as_view(), name='reviews_list'),
+    path('review/update/<uuid:uuid>/', BookReviewUpdateView.as_view(), name='review_update'),
+    path('review/delete/<uuid:uuid>/', BookReviewDeleteView.as_view(), name='review_update'),
+    path('<uuid:book_uuid>/like/', LikeBookView.as_view(), name='book_like'),
+    path('<uuid:book_uuid>/dislike/', DislikeBookView.as_view(), name='book_dislike'),
+    path('read/<uuid:book_uuid>/', AsyncBookReadView.as_view(), name='book_read'),
+    path('my-favorites/', FavoriteBookListView.as_view(), name='books_favorites'),
+    path('add-book-to-favorites/', AddBookToFavorites.as_view(), name='add_book_to_favorites'),
+    path('delete-book-from-favorites/<uuid:uuid>/', DeleteBookFromFavorites.as_view(), name='delete_book_from_favorites'),
+]
\ No newline at end of file
@@ -0,0 +1,158 @@
+from asgiref.sync import sync_to_async
+
+from django.http import HttpResponse
+from django.views import View
+
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotAuthenticated, NotFound, ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from apps.users.authentication import CachedJWTAuthentication
+
+from config.db_router import read_from_primary
+
+from ..models import Book
+from ..serializers import BookSerializer
+from ..pagination import BookKeysetPagination
+from ..cache import BookCache
+from ..services.book_delivery import BookDeliveryServices
+from ..services.book_entitlements import BookEntitlementServices
+from .books_views import BookFilter
+
+jwt_authentication = CachedJWTAuthentication()
+
+
+def json_response(data, status_code: int = status.HTTP_200_OK) -> HttpResponse:
+    return HttpResponse(JSONRenderer().render(data), status=status_code, content_type='application/json')
+
+
+async def aauthenticate(request):
+    '''
+    Async counterpart of ``CachedJWTAuthentication.authenticate``: the token is checked in place and
+    the user resolved from the principal cache, falling back to the async ORM.
+    :param request:
+    :return: the user, or None when the request carries no token
+    '''
+
+    header = jwt_authentication.get_header(request)
+    raw_token = jwt_authentication.get_raw_token(header) if header is not None else None
+    if raw_token is None:
+        return None
+
+    return await jwt_authentication.aget_user(jwt_authentication.get_validated_token(raw_token))
+
+
+class AsyncBookView(View):
+    '''
+    Base view for the async versions of the hot read endpoints. Under ASGI they run on the event
+    loop and use the async ORM. DRF views are synchronous, so these reuse DRF's request,
+    serializers and pagination but return plain Django responses.
+    '''
+
+    http_method_names = ['get', 'head', 'options']
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            response = json_response({'detail': exc.detail}, exc.status_code)
+            if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+                response['WWW-Authenticate'] = jwt_authentication.authenticate_header(request)
+            return response
+
+
+class AsyncBookCacheMixin:
+    '''
+    Async counterpart of ``BookCacheMixin``: the same cache entries, ETags and 304 responses.
+    Views define ``get_cache_version_key`` and ``get_data``.
+    '''
+
+    cache_prefix = None
+
+    def get_cache_version_key(self) -> str:
+        raise NotImplementedError
+
+    async def get_data(self, request: Request):
+        raise NotImplementedError
+
+    async def get(self, request, *args, **kwargs):
+        request = Request(request)
+
+        version = await BookCache.aget(self.get_cache_version_key()) or '0'
+        key = BookCache.entry_key(self.cache_prefix, version, request)
+        entry = await BookCache.aget(key)
+
+        if entry is None:
+            with read_from_primary():
+                entry = BookCache.make_entry(await self.get_data(request))
+            await BookCache.aset(key, entry)
+
+        if BookCache.not_modified(request, entry):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = json_response(entry['data'])
+
+        response['ETag'] = entry['etag']
+        return response
+
+
+class AsyncBooksListView(AsyncBookCacheMixin, AsyncBookView):
+    '''
+    Async version of ``BooksAPIListView``.
+    '''
+
+    cache_prefix = 'books:list'
+
+    def get_cache_version_key(self) -> str:
+        return BookCache.list_version_key
+
+    async def get_data(self, request: Request):
+        filterset = BookFilter(request.query_params, queryset=Book.objects.select_related('publisher', 'stats'))
+        if not filterset.is_valid():
+            raise ValidationError(filterset.errors)
+
+        paginator = BookKeysetPagination()
+        page = await paginator.apaginate_queryset(filterset.qs, request)
+        serializer = BookSerializer(page, many=True, context={'request': request})
+
+        return paginator.get_paginated_data(serializer.data)
+
+
+class AsyncBookDetailView(AsyncBookCacheMixin, AsyncBookView):
+    '''
+    Async version of ``BookAPIDetailView``.
+    '''
+
+    cache_prefix = 'books:detail'
+
+    def get_cache_version_key(self) -> str:
+        return BookCache.detail_version_key(self.kwargs['uuid'])
+
+    async def get_data(self, request: Request):
+        book = await Book.objects.select_related('publisher', 'stats').filter(uuid=self.kwargs['uuid']).afirst()
+        if book is None:
+            raise NotFound('No Book matches the given query.')
+
+        return BookSerializer(book, context={'request': request}).data
+
+
+class AsyncBookReadView(AsyncBookView):
+    '''
+    Async version of ``BookAPIReadView``. The rental check reads the cached entitlements and the
+    file response is prepared in a worker thread.
+    '''
+
+    async def get(self, request, book_uuid):
+        user = await aauthenticate(request)
+        if user is None:
+            raise NotAuthenticated()
+
+        book = await Book.objects.filter(uuid=book_uuid).afirst()
+        if book is None:
+            raise NotFound('No Book matches the given query.')
+
+        if not await BookEntitlementServices.acan_read(user, book.uuid):
+            return json_response({'detail': 'You did not rent this book.'}, status.HTTP_403_FORBIDDEN)
+
+        return await sync_to_async(BookDeliveryServices.deliver)(request, book)
@@ -0,0 +1,19 @@
+from rest_framework.views import APIView
+
+from ..permissions import IsAdminOrLibrarian
+from ..services.book_export import BookExportServices
+
+
+class BookExportAPIView(APIView):
+    '''
+    View to download a whole dataset (books, rents, reviews or ratings) as streamed NDJSON or CSV.
+    '''
+
+    permission_classes = [IsAdminOrLibrarian]
+
+    def perform_content_negotiation(self, request, force=False):
+        # ``format`` selects the export format, not a DRF renderer.
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, dataset):
+        return BookExportServices.export(request, dataset)
@@ -1,7 +1,7 @@
 from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
 
-from ..serializers import FavoriteBookSerializer
+from ..serializers import FavoriteBookSerializer, FavoriteBookReadSerializer
 from ..models import FavoriteBook
 
 
@@ -10,11 +10,11 @@ class FavoriteBookListView(generics.ListAPIView):
     View to list all favorite books of the authenticated user.
     '''
 
-    serializer_class = FavoriteBookSerializer
+    serializer_class = FavoriteBookReadSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return FavoriteBook.objects.filter(user=self.request.user)
+        return FavoriteBook.objects.filter(user=self.request.user).select_related('book')
 
 
 class AddBookToFavorites(generics.CreateAPIView):
@@ -0,0 +1,18 @@
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from ..permissions import IsAdmin
+from ..services.book_import import BookImportServices
+
+
+class BookImportAPIView(APIView):
+    '''
+    View to import a catalog of books from an uploaded CSV or JSON Lines file.
+    '''
+
+    permission_classes = [IsAdmin]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, *args, **kwargs) -> Response:
+        return BookImportServices.import_upload(request)
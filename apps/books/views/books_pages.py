@@ -0,0 +1,38 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAuthenticated
+
+from ..services.book_pages import BookPageServices
+
+
+class BookContentsAPIView(APIView):
+    '''
+    View to get the page count and chapters of a rented book.
+    '''
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, book_uuid) -> Response:
+        return BookPageServices.get_contents(request, book_uuid)
+
+
+class BookPageAPIView(APIView):
+    '''
+    View to read a single page of a rented book, without downloading the whole file.
+    '''
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, book_uuid, page) -> Response:
+        return BookPageServices.get_page(request, book_uuid, page)
+
+
+class BookChapterAPIView(APIView):
+    '''
+    View to read a single chapter of a rented book.
+    '''
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, book_uuid, chapter) -> Response:
+        return BookPageServices.get_chapter(request, book_uuid, chapter)
@@ -3,6 +3,7 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 
 from ..services.books_rating import BooksRatingServices
+from ..throttling import IPTokenBucketThrottle, UserTokenBucketThrottle
 
 
 class LikeBookView(APIView):
@@ -11,6 +12,8 @@ class LikeBookView(APIView):
     '''
 
     permission_classes = [IsAuthenticated]
+    throttle_classes = [UserTokenBucketThrottle, IPTokenBucketThrottle]
+    throttle_scope = 'likes'
 
     def post(self, request, *args, **kwargs) -> Response:
         book_uuid = kwargs.get('book_uuid')
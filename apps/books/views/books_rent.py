@@ -1,8 +1,11 @@
 from rest_framework import generics
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from ..services.book_rent import BookRentServices
+from ..services.stripe_webhook import StripeWebhookServices
+from ..throttling import IPTokenBucketThrottle, UserTokenBucketThrottle
 
 
 class RentBookAPIView(generics.CreateAPIView):
@@ -11,6 +14,8 @@ class RentBookAPIView(generics.CreateAPIView):
     '''
 
     permission_classes = [IsAuthenticated]
+    throttle_classes = [UserTokenBucketThrottle, IPTokenBucketThrottle]
+    throttle_scope = 'rents'
 
     def post(self, request, book_uuid) -> Response:
 
@@ -25,4 +30,16 @@ class UnrentBookAPIView(generics.DestroyAPIView):
     permission_classes = [IsAuthenticated]
 
     def delete(self, request, book_uuid) -> Response:
-        return BookRentServices.unrent_book(request, book_uuid)
\ No newline at end of file
+        return BookRentServices.unrent_book(request, book_uuid)
+
+
+class StripeWebhookAPIView(APIView):
+    '''
+    View receiving Stripe webhook events. Requests are authenticated by their signature only.
+    '''
+
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def post(self, request) -> Response:
+        return StripeWebhookServices.receive(request)
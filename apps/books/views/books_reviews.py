@@ -4,7 +4,8 @@ from rest_framework.response import Response
 from rest_framework import status
 
 from ..models import BookReview
-from ..serializers import BookReviewSerializer
+from ..serializers import BookReviewSerializer, BookReviewReadSerializer
+from ..throttling import IPTokenBucketThrottle, UserTokenBucketThrottle
 
 
 class CreateBookReviewAPIView(generics.CreateAPIView):
@@ -15,6 +16,8 @@ class CreateBookReviewAPIView(generics.CreateAPIView):
     queryset = BookReview.objects.select_related('author', 'book').all()
     serializer_class = BookReviewSerializer
     permission_classes = [IsAuthenticated]
+    throttle_classes = [UserTokenBucketThrottle, IPTokenBucketThrottle]
+    throttle_scope = 'reviews'
 
 
 class BookReviewsListView(generics.ListAPIView):
@@ -22,9 +25,15 @@ class BookReviewsListView(generics.ListAPIView):
     View to list all reviews for a specific book.
     '''
 
-    queryset = BookReview.objects.select_related('author', 'book').all()
-    serializer_class = BookReviewSerializer
-    lookup_field = 'book_uuid'
+    serializer_class = BookReviewReadSerializer
+
+    def get_queryset(self):
+        return (
+            BookReview.objects
+            .filter(book_id=self.kwargs['book_uuid'])
+            .select_related('author')
+            .order_by('-created_at')
+        )
 
 
 class BookReviewUpdateView(generics.UpdateAPIView):
@@ -0,0 +1,41 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+
+from ..permissions import IsAdminOrLibrarian
+from ..services.book_upload import BookUploadServices
+
+
+class BookUploadCreateView(APIView):
+    '''
+    View to start a resumable, chunked upload of a book file.
+    '''
+
+    permission_classes = [IsAdminOrLibrarian]
+
+    def post(self, request, *args, **kwargs) -> Response:
+        return BookUploadServices.start_upload(request)
+
+
+class BookUploadDetailView(APIView):
+    '''
+    View to read the offset of an upload (GET) and to send its next chunk (PUT with Content-Range).
+    '''
+
+    permission_classes = [IsAdminOrLibrarian]
+
+    def get(self, request, uuid) -> Response:
+        return BookUploadServices.get_status(request, uuid)
+
+    def put(self, request, uuid) -> Response:
+        return BookUploadServices.upload_chunk(request, uuid)
+
+
+class BookUploadCommitView(APIView):
+    '''
+    View to create a book from a completed upload.
+    '''
+
+    permission_classes = [IsAdminOrLibrarian]
+
+    def post(self, request, uuid) -> Response:
+        return BookUploadServices.commit_upload(request, uuid)
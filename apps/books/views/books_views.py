@@ -7,11 +7,15 @@ from rest_framework import status
 from rest_framework.request import Request
 from rest_framework.permissions import IsAuthenticated
 
-from django.http import FileResponse, Http404
 
-from ..models import Book, BookRent
+from ..models import Book
 from ..serializers import BookSerializer
 from ..permissions import IsAdminOrLibrarian
+from ..pagination import BookKeysetPagination, BookSearchPagination
+from ..cache import BookCache, BookCacheMixin
+from ..services.books_search import BooksSearchServices
+from ..services.book_delivery import BookDeliveryServices
+from ..services.book_entitlements import BookEntitlementServices
 
 
 class BookFilter(django_filters.FilterSet):
@@ -27,33 +31,59 @@ class BookFilter(django_filters.FilterSet):
         fields = ['title', 'author']
 
 
-class BooksAPIListView(generics.ListAPIView):
+class BooksAPIListView(BookCacheMixin, generics.ListAPIView):
     '''
-    API view to list all books with filtering capabilities.
+    API view to list all books with filtering capabilities, paginated with a keyset cursor.
+    Responses are cached per filter set and page.
     '''
 
-    queryset = Book.objects.select_related('publisher').order_by('rating')
+    cache_prefix = 'books:list'
+    queryset = Book.objects.select_related('publisher', 'stats').order_by('rating', 'created_at', 'uuid')
     serializer_class = BookSerializer
     filter_backends = [django_filters.rest_framework.DjangoFilterBackend]
     filterset_class = BookFilter
+    pagination_class = BookKeysetPagination
 
+    def get_cache_version_key(self) -> str:
+        return BookCache.list_version_key
 
-class BookAPIDetailView(generics.RetrieveAPIView):
+
+class BookSearchAPIView(generics.ListAPIView):
     '''
-    API view to retrieve details of a specific book by its UUID.
+    API view for ranked full-text search over the catalog with prefix matching and typo tolerance.
     '''
 
-    queryset = Book.objects.select_related('publisher').all()
+    serializer_class = BookSerializer
+    pagination_class = BookSearchPagination
+
+    def get_queryset(self):
+        return BooksSearchServices.search(self.request.query_params.get('q', ''))
+
+    def list(self, request: Request, *args, **kwargs):
+        with BooksSearchServices.typo_tolerance():
+            return super().list(request, *args, **kwargs)
+
+
+class BookAPIDetailView(BookCacheMixin, generics.RetrieveAPIView):
+    '''
+    API view to retrieve details of a specific book by its UUID. Responses are cached per book.
+    '''
+
+    cache_prefix = 'books:detail'
+    queryset = Book.objects.select_related('publisher', 'stats').all()
     serializer_class = BookSerializer
     lookup_field = 'uuid'
 
+    def get_cache_version_key(self) -> str:
+        return BookCache.detail_version_key(self.kwargs['uuid'])
+
 
 class BookAPIUpdateView(generics.UpdateAPIView):
     '''
     API view to update a specific book. Only the publisher of the book can update it.
     '''
 
-    queryset = Book.objects.select_related('publisher').all()
+    queryset = Book.objects.select_related('publisher', 'stats').all()
     serializer_class = BookSerializer
     permission_classes = [IsAdminOrLibrarian]
     lookup_field = 'uuid'
@@ -80,9 +110,10 @@ class BookAPICreateView(generics.CreateAPIView):
 class BookAPIReadView(generics.RetrieveAPIView):
     '''
     API view to download the file of a rented book. Only users who have rented the book can download it.
+    Supports Range requests and conditional GETs, or offloads the transfer to the web server.
     '''
 
-    queryset = Book.objects.select_related('publisher').all()
+    queryset = Book.objects.select_related('publisher', 'stats').all()
     serializer_class = BookSerializer
     lookup_field = 'book_uuid'
     permission_classes = [IsAuthenticated]
@@ -91,12 +122,7 @@ class BookAPIReadView(generics.RetrieveAPIView):
         book_id = kwargs.get('book_uuid')
         book = get_object_or_404(Book, uuid=book_id)
 
-        try:
-            rent = BookRent.objects.get(renter=request.user, book=book)
-        except BookRent.DoesNotExist:
+        if not BookEntitlementServices.can_read(request.user, book.uuid):
             return Response({'detail': 'You did not rent this book.'}, status=403)
 
-        if book.file:
-            return FileResponse(book.file.open('rb'), as_attachment=True, filename=book.file.name)
-        else:
-            raise Http404('File not found')
\ No newline at end of file
+        return BookDeliveryServices.deliver(request, book)
\ No newline at end of file
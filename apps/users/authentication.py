@@ -0,0 +1,220 @@
+import time
+import logging
+import threading
+
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from redis.exceptions import RedisError
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from config.db_router import route_user
+
+from .models import User
+
+logger = logging.getLogger(__name__)
+
+
+class LocalLRUCache:
+    '''
+    Small thread-safe LRU with a time to live, shared by the threads of one process.
+    '''
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, timeout: float, max_size: int) -> None:
+        with self.lock:
+            self.entries[key] = (time.monotonic() + timeout, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > max_size:
+                self.entries.popitem(last=False)
+
+    def delete(self, key) -> None:
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+
+class UserPrincipalCache:
+    '''
+    The slim part of a user that authentication and permissions need, cached in two levels:
+    a per-process LRU for a few seconds and Redis for a few minutes. A principal is a dict of
+    ``fields``, plus a digest of the password hash when simplejwt revokes tokens on password
+    change. Saving or deleting a user drops its entries (see ``apps.users.signals``); other
+    processes may keep theirs until ``AUTH_USER_LOCAL_CACHE_TTL`` runs out. Redis errors
+    fall back to the database. Principals are always loaded from the primary, a replica that
+    lags behind would cache a stale role or password digest for ``AUTH_USER_CACHE_TIMEOUT``.
+    '''
+
+    fields = ('id', 'username', 'role', 'is_active', 'is_staff', 'is_superuser')
+    local = LocalLRUCache()
+
+    @staticmethod
+    def get_key(user_id) -> str:
+        return f'users:principal:{user_id}'
+
+    @staticmethod
+    def get(user_id) -> dict | None:
+        '''
+        :param user_id: value of the token's user id claim
+        :return: the principal, or None when there is no such user
+        '''
+
+        key = UserPrincipalCache.get_key(user_id)
+        principal = UserPrincipalCache.local.get(key)
+        if principal is not None:
+            return principal
+
+        try:
+            principal = cache.get(key)
+        except RedisError:
+            logger.warning('User cache unavailable, loading user %s from the database', user_id, exc_info=True)
+            principal = None
+
+        if principal is None:
+            values = User.objects.using(DEFAULT_DB_ALIAS).filter(**{jwt_settings.USER_ID_FIELD: user_id}).values(
+                *UserPrincipalCache.fields, 'password',
+            ).first()
+            if values is None:
+                return None
+            principal = UserPrincipalCache.from_values(values)
+            try:
+                cache.set(key, principal, settings.AUTH_USER_CACHE_TIMEOUT)
+            except RedisError:
+                logger.warning('User %s not cached', user_id, exc_info=True)
+
+        UserPrincipalCache.remember(key, principal)
+        return principal
+
+    @staticmethod
+    async def aget(user_id) -> dict | None:
+        key = UserPrincipalCache.get_key(user_id)
+        principal = UserPrincipalCache.local.get(key)
+        if principal is not None:
+            return principal
+
+        try:
+            principal = await cache.aget(key)
+        except RedisError:
+            logger.warning('User cache unavailable, loading user %s from the database', user_id, exc_info=True)
+            principal = None
+
+        if principal is None:
+            values = await User.objects.using(DEFAULT_DB_ALIAS).filter(**{jwt_settings.USER_ID_FIELD: user_id}).values(
+                *UserPrincipalCache.fields, 'password',
+            ).afirst()
+            if values is None:
+                return None
+            principal = UserPrincipalCache.from_values(values)
+            try:
+                await cache.aset(key, principal, settings.AUTH_USER_CACHE_TIMEOUT)
+            except RedisError:
+                logger.warning('User %s not cached', user_id, exc_info=True)
+
+        UserPrincipalCache.remember(key, principal)
+        return principal
+
+    @staticmethod
+    def from_values(values: dict) -> dict:
+        password = values.pop('password')
+        if jwt_settings.CHECK_REVOKE_TOKEN:
+            values['password_digest'] = get_md5_hash_password(password)
+
+        return values
+
+    @staticmethod
+    def remember(key: str, principal: dict) -> None:
+        UserPrincipalCache.local.set(
+            key, principal, settings.AUTH_USER_LOCAL_CACHE_TTL, settings.AUTH_USER_LOCAL_CACHE_SIZE,
+        )
+
+    @staticmethod
+    def get_user(principal: dict) -> User:
+        '''
+        Build a ``User`` from a principal. The other fields are deferred, so reading one of them
+        loads it from the database like ``.only()`` would. ``from_db`` takes the values in the
+        order of the model's fields.
+        '''
+
+        fields = [field.attname for field in User._meta.concrete_fields if field.attname in principal]
+        return User.from_db(DEFAULT_DB_ALIAS, fields, [principal[field] for field in fields])
+
+    @staticmethod
+    def invalidate(user_id) -> None:
+        key = UserPrincipalCache.get_key(user_id)
+        UserPrincipalCache.local.delete(key)
+
+        try:
+            cache.delete(key)
+        except RedisError:
+            logger.warning('User %s not evicted from the cache', user_id, exc_info=True)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    '''
+    ``JWTAuthentication`` that resolves the token's user from ``UserPrincipalCache`` instead of
+    querying the user table on every request, and hands the user to the replica routing.
+    '''
+
+    def get_user(self, validated_token) -> User:
+        try:
+            user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        user = self.check_principal(UserPrincipalCache.get(user_id), validated_token)
+        route_user(user.pk)
+
+        return user
+
+    async def aget_user(self, validated_token) -> User:
+        try:
+            user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        user = self.check_principal(await UserPrincipalCache.aget(user_id), validated_token)
+        route_user(user.pk)
+
+        return user
+
+    @staticmethod
+    def check_principal(principal: dict | None, validated_token) -> User:
+        '''
+        The checks of ``JWTAuthentication.get_user``, run against a cached principal.
+        '''
+
+        if principal is None:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+
+        if jwt_settings.CHECK_USER_IS_ACTIVE and not principal['is_active']:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+
+        if jwt_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(jwt_settings.REVOKE_TOKEN_CLAIM) != principal.get('password_digest'):
+                raise AuthenticationFailed("The user's password has been changed.", code='password_changed')
+
+        return UserPrincipalCache.get_user(principal)
@@ -13,6 +13,7 @@ class User(AbstractUser):
     id = models.UUIDField(default=uuid.uuid4, primary_key=True, editable=False)
     role = models.CharField(max_length=20, choices=ROLES, null=True, blank=True)
     avatar = models.ImageField(upload_to='users_avatars/', null=True, blank=True)
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
 
     def __str__(self):
         return self.username
@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from utils.images import ImageRenditions
+
+from .authentication import UserPrincipalCache
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def schedule_avatar_renditions(sender, instance, **kwargs) -> None:
+    '''
+    Render the thumbnails of a new or changed avatar once the user is committed.
+    '''
+
+    if ImageRenditions.is_stale(instance, 'avatar'):
+        transaction.on_commit(
+            lambda: ImageRenditions.schedule(instance, 'avatar', 'apps.users.tasks.generate_avatar_renditions')
+        )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_principal(sender, instance, update_fields=None, **kwargs) -> None:
+    '''
+    Drop the cached principal of a changed user (role, password, active flag...). It is dropped
+    again on commit, in case a request cached the old row while the transaction was open.
+    Logins only touch ``last_login`` and keep it. ``QuerySet.update()`` sends no signal, so
+    callers that update users in bulk must call ``UserPrincipalCache.invalidate`` themselves.
+    '''
+
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+
+    UserPrincipalCache.invalidate(instance.pk)
+    transaction.on_commit(lambda: UserPrincipalCache.invalidate(instance.pk))
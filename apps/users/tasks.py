@@ -0,0 +1,20 @@
+from celery import shared_task
+
+from django.conf import settings
+
+from utils.images import ImageRenditions
+
+from .models import User
+
+
+@shared_task
+def generate_avatar_renditions(user_id: str) -> None:
+    '''
+    Task to render the thumbnails of a user avatar.
+    '''
+
+    user = User.objects.filter(id=user_id).first()
+    if user is None or not ImageRenditions.is_stale(user, 'avatar'):
+        return
+
+    ImageRenditions.generate(user, 'avatar', settings.USERS_AVATAR_RENDITIONS)
@@ -0,0 +1,115 @@
+'''
+Benchmark the catalog search endpoint against the legacy ``icontains`` filter.
+
+Seeds a synthetic catalog (1M rows by default) inside a transaction that is rolled back
+at the end, then times both query paths for a set of search terms.
+
+Usage:
+    python benchmarks/books_search.py --rows 1000000 --repeat 5
+'''
+
+import os
+import sys
+import random
+import argparse
+import statistics
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+
+django.setup()
+
+from django.db import connection, transaction
+
+from apps.books.models import Book
+from apps.books.views.books_views import BookFilter
+from apps.books.services.books_search import BooksSearchServices
+from apps.users.models import User
+
+
+WORDS = (
+    'shadow river empire glass winter garden silent machine ocean letters night city '
+    'stone queen orchard signal harbor mountain paper fire echo atlas crown forest '
+    'django python history science journey secret light memory island storm'
+).split()
+
+QUERIES = ('python', 'silent garden', 'harb', 'mountian', '978000012')
+
+
+class Rollback(Exception):
+    pass
+
+
+def seed(rows: int, batch_size: int = 10_000) -> None:
+    rng = random.Random(42)
+    publisher = User.objects.create_user(username='bench-publisher', password='bench-password')
+
+    for start in range(0, rows, batch_size):
+        Book.objects.bulk_create([
+            Book(
+                title=' '.join(rng.sample(WORDS, 3)).title(),
+                author=f'{rng.choice(WORDS).title()} {rng.choice(WORDS).title()}',
+                description=' '.join(rng.choices(WORDS, k=30)),
+                isbn=f'978{i:010d}',
+                publisher=publisher,
+                price=rng.randint(1, 50),
+                rating=rng.randint(0, 500),
+            )
+            for i in range(start, min(start + batch_size, rows))
+        ])
+        print(f'\rseeded {min(start + batch_size, rows):,}/{rows:,}', end='', flush=True)
+    print()
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'ANALYZE {Book._meta.db_table}')
+
+
+def timed(func, repeat: int) -> tuple[float, int]:
+    durations = []
+    count = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        count = func()
+        durations.append((time.perf_counter() - started) * 1000)
+
+    return statistics.median(durations), count
+
+
+def legacy_filter(query: str) -> int:
+    queryset = BookFilter({'title': query}, queryset=Book.objects.all()).qs
+    return len(queryset[:20])
+
+
+def search(query: str) -> int:
+    with BooksSearchServices.typo_tolerance():
+        return len(BooksSearchServices.search(query)[:20])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    try:
+        with transaction.atomic():
+            seed(args.rows)
+
+            print(f'{"query":<16}{"icontains ms":>14}{"hits":>6}{"search ms":>12}{"hits":>6}')
+            for query in QUERIES:
+                legacy_ms, legacy_hits = timed(lambda: legacy_filter(query), args.repeat)
+                search_ms, search_hits = timed(lambda: search(query), args.repeat)
+                print(f'{query:<16}{legacy_ms:>14.1f}{legacy_hits:>6}{search_ms:>12.1f}{search_hits:>6}')
+
+            raise Rollback
+    except Rollback:
+        pass
+
+
+if __name__ == '__main__':
+    main()
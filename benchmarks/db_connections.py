@@ -0,0 +1,84 @@
+'''
+Measure the per-request cost of opening a PostgreSQL connection against borrowing one from the pool.
+
+Each iteration replays a request's database lifecycle: the request_started signal, one small
+query, and the request_finished signal, which closes the connection or returns it to the pool.
+The same query runs over three aliases of the default database: a fresh connection per
+request (CONN_MAX_AGE=0), a persistent connection (CONN_MAX_AGE) and the psycopg pool.
+
+Usage:
+    python benchmarks/db_connections.py --requests 2000
+'''
+
+import os
+import sys
+import argparse
+import statistics
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+
+django.setup()
+
+from django.conf import settings
+from django.core import signals
+from django.db import connections
+
+
+def configure_aliases() -> list[str]:
+    base = {key: value for key, value in settings.DATABASES['default'].items() if key not in ('OPTIONS', 'CONN_MAX_AGE')}
+
+    settings.DATABASES['fresh'] = {**base, 'CONN_MAX_AGE': 0}
+    settings.DATABASES['persistent'] = {**base, 'CONN_MAX_AGE': 600}
+    settings.DATABASES['pooled'] = {**base, 'CONN_MAX_AGE': 0, 'OPTIONS': {'pool': {'min_size': 2, 'max_size': 4}}}
+    connections.settings = connections.configure_settings(settings.DATABASES)
+
+    return ['fresh', 'persistent', 'pooled']
+
+
+def request_cycle(alias: str) -> float:
+    started = time.perf_counter()
+
+    signals.request_started.send(sender=None)
+    with connections[alias].cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+    signals.request_finished.send(sender=None)
+
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    aliases = configure_aliases()
+    results = {}
+
+    for alias in aliases:
+        for _ in range(20):
+            request_cycle(alias)
+        timings = sorted(request_cycle(alias) for _ in range(args.requests))
+        results[alias] = timings
+        quantiles = statistics.quantiles(timings, n=100)
+
+        print(
+            f'{alias:<11} mean {statistics.mean(timings) * 1000:7.3f} ms  '
+            f'p50 {quantiles[49] * 1000:7.3f} ms  p99 {quantiles[98] * 1000:7.3f} ms'
+        )
+
+    saved = statistics.mean(results['fresh']) - statistics.mean(results['pooled'])
+    print(f'\nPooling saves {saved * 1000:.3f} ms per request over a fresh connection')
+
+    connections.close_all()
+    connections['pooled'].close_pool()
+
+
+if __name__ == '__main__':
+    main()
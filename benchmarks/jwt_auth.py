@@ -0,0 +1,96 @@
+'''
+Measure what authenticating a request with a JWT costs, step by step.
+
+Each iteration authenticates the same access token:
+  decode      only verifying and decoding the token
+  database    simplejwt's JWTAuthentication, one user query per request
+  redis       CachedJWTAuthentication with the process-local LRU cleared, so the principal comes from Redis
+  local       CachedJWTAuthentication with a warm process-local LRU
+
+A throwaway user is created for the run and deleted afterwards.
+
+Usage:
+    python benchmarks/jwt_auth.py --requests 5000
+'''
+
+import os
+import sys
+import uuid
+import argparse
+import statistics
+import time
+
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+
+django.setup()
+
+from django.test import RequestFactory
+
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.users.authentication import CachedJWTAuthentication, UserPrincipalCache
+from apps.users.models import User
+
+
+def measure(step, requests: int) -> list[float]:
+    for _ in range(20):
+        step()
+
+    timings = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        step()
+        timings.append(time.perf_counter() - started)
+
+    return sorted(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    user = User.objects.create_user(username=f'benchmark-{uuid.uuid4().hex[:8]}', password=uuid.uuid4().hex)
+    token = str(AccessToken.for_user(user))
+    request = Request(RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}'))
+
+    plain, cached = JWTAuthentication(), CachedJWTAuthentication()
+
+    def from_redis():
+        UserPrincipalCache.local.clear()
+        cached.authenticate(request)
+
+    steps = {
+        'decode': lambda: plain.get_validated_token(token.encode()),
+        'database': lambda: plain.authenticate(request),
+        'redis': from_redis,
+        'local': lambda: cached.authenticate(request),
+    }
+
+    try:
+        results = {}
+        for name, step in steps.items():
+            timings = measure(step, args.requests)
+            results[name] = timings
+            quantiles = statistics.quantiles(timings, n=100)
+
+            print(
+                f'{name:<9} mean {statistics.mean(timings) * 1_000_000:8.1f} us  '
+                f'p50 {quantiles[49] * 1_000_000:8.1f} us  p99 {quantiles[98] * 1_000_000:8.1f} us'
+            )
+    finally:
+        user.delete()
+
+    saved = statistics.mean(results['database']) - statistics.mean(results['local'])
+    print(f'\nThe cached principal saves {saved * 1_000_000:.1f} us per authenticated request')
+
+
+if __name__ == '__main__':
+    main()
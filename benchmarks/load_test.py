@@ -0,0 +1,131 @@
+'''
+Load test the hot read endpoints and compare serving modes, e.g. WSGI (gunicorn) against ASGI (uvicorn).
+
+Every target is hit by ``--connections`` concurrent keep-alive connections for ``--duration``
+seconds, then requests/sec, error count and latency percentiles are reported side by side.
+The client is plain asyncio, so one process can hold 1k connections without extra dependencies.
+
+Usage:
+    docker compose --profile benchmark up -d
+    python benchmarks/load_test.py \
+        --target wsgi=http://localhost:8001/api/v4/books/list/ \
+        --target asgi=http://localhost:8000/api/v5/books/list/ \
+        --connections 1000 --duration 30
+
+Raise the open file limit first (``ulimit -n 4096``) when testing with 1k connections.
+'''
+
+import asyncio
+import argparse
+import statistics
+import time
+
+from urllib.parse import urlsplit
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+
+    def report(self, name: str, duration: float) -> str:
+        if not self.latencies:
+            return f'{name:<8} no successful requests, {self.errors} errors'
+
+        latencies = sorted(self.latencies)
+        quantiles = statistics.quantiles(latencies, n=100)
+
+        return (
+            f'{name:<8} {len(latencies) / duration:>10.1f} req/s  '
+            f'p50 {quantiles[49] * 1000:>8.1f} ms  p99 {quantiles[98] * 1000:>8.1f} ms  '
+            f'max {latencies[-1] * 1000:>8.1f} ms  errors {self.errors}'
+        )
+
+
+async def read_response(reader: asyncio.StreamReader) -> int:
+    '''
+    Read one HTTP/1.1 response with a Content-Length or chunked body and return its status code.
+    '''
+
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('Connection closed by server')
+    status = int(status_line.split()[1])
+
+    length, chunked = 0, False
+    while (line := await reader.readline()) not in (b'\r\n', b''):
+        name, _, value = line.decode('latin-1').partition(':')
+        name = name.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'transfer-encoding' and 'chunked' in value.lower():
+            chunked = True
+
+    if chunked:
+        while (size := int((await reader.readline()).split(b';')[0], 16)):
+            await reader.readexactly(size + 2)
+        await reader.readline()
+    elif length:
+        await reader.readexactly(length)
+
+    return status
+
+
+async def worker(url: str, deadline: float, stats: Stats, headers: list[str]) -> None:
+    parts = urlsplit(url)
+    path = parts.path + (f'?{parts.query}' if parts.query else '')
+    request = '\r\n'.join([f'GET {path} HTTP/1.1', f'Host: {parts.netloc}', *headers, '', '']).encode()
+
+    writer = None
+    while time.monotonic() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+
+            started = time.monotonic()
+            writer.write(request)
+            status = await read_response(reader)
+
+            if status >= 400:
+                stats.errors += 1
+            else:
+                stats.latencies.append(time.monotonic() - started)
+        except (OSError, ValueError, IndexError, asyncio.IncompleteReadError):
+            stats.errors += 1
+            if writer is not None:
+                writer.close()
+            writer = None
+            await asyncio.sleep(0.05)
+
+    if writer is not None:
+        writer.close()
+
+
+async def run(url: str, connections: int, duration: float, headers: list[str]) -> Stats:
+    stats = Stats()
+    deadline = time.monotonic() + duration
+    await asyncio.gather(*(worker(url, deadline, stats, headers) for _ in range(connections)))
+
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', action='append', required=True, help='name=url, repeat to compare')
+    parser.add_argument('--connections', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--warmup', type=float, default=5)
+    parser.add_argument('--header', action='append', default=[], help='extra request header, e.g. "Authorization: Bearer ..."')
+    args = parser.parse_args()
+
+    targets = [target.split('=', 1) for target in args.target]
+
+    print(f'{args.connections} connections, {args.duration:.0f} s per target\n')
+    for name, url in targets:
+        asyncio.run(run(url, min(args.connections, 50), args.warmup, args.header))
+        stats = asyncio.run(run(url, args.connections, args.duration, args.header))
+        print(stats.report(name, args.duration))
+
+
+if __name__ == '__main__':
+    main()
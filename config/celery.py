@@ -1,9 +1,19 @@
 import os
 
 from celery import Celery
+from celery.signals import before_task_publish, task_failure, task_postrun, task_prerun
+
+from .metrics import count_task_failure, finish_task, stamp_task, start_task
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 app = Celery('config')
 app.config_from_object('django.conf:settings', namespace='CELERY')
-app.autodiscover_tasks()
\ No newline at end of file
+app.autodiscover_tasks()
+
+# Task metrics for the /metrics endpoint. The uids keep the handlers connected once even when
+# this module is imported under two names.
+before_task_publish.connect(stamp_task, dispatch_uid='metrics_stamp_task')
+task_prerun.connect(start_task, dispatch_uid='metrics_start_task')
+task_postrun.connect(finish_task, dispatch_uid='metrics_finish_task')
+task_failure.connect(count_task_failure, dispatch_uid='metrics_count_task_failure')
@@ -0,0 +1,197 @@
+import random
+import logging
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from redis.exceptions import RedisError
+
+from rest_framework.permissions import SAFE_METHODS
+
+logger = logging.getLogger(__name__)
+
+_read_from_replicas = ContextVar('read_from_replicas', default=False)
+_request_user = ContextVar('request_user', default=None)
+
+
+@contextmanager
+def read_from_replicas(enabled: bool = True):
+    '''
+    Let reads in the block go to the replicas in ``DATABASE_REPLICAS``. Outside such a block,
+    e.g. in Celery tasks, every query goes to the primary.
+    '''
+
+    token = _read_from_replicas.set(enabled)
+    try:
+        yield
+    finally:
+        _read_from_replicas.reset(token)
+
+
+def read_from_primary():
+    '''
+    Send the reads in the block to the primary, even in a request served from the replicas.
+    Used for reads whose result is cached: a replica that lags behind would get a stale result
+    stored, and served, until the next invalidation.
+    '''
+
+    return read_from_replicas(False)
+
+
+def pin_key(user_id) -> str:
+    return f'db:pin:{user_id}'
+
+
+def pin_to_primary(*user_ids) -> None:
+    '''
+    Send the reads of these users to the primary for ``DATABASE_REPLICA_PIN_SECONDS``, so they
+    see their own writes while the replicas catch up.
+    '''
+
+    if not settings.DATABASE_REPLICAS or not user_ids:
+        return
+
+    try:
+        cache.set_many({pin_key(user_id): 1 for user_id in user_ids}, settings.DATABASE_REPLICA_PIN_SECONDS)
+    except RedisError:
+        logger.warning('Replica pin not stored for %s', user_ids, exc_info=True)
+
+
+async def apin_to_primary(*user_ids) -> None:
+    if not settings.DATABASE_REPLICAS or not user_ids:
+        return
+
+    try:
+        await cache.aset_many({pin_key(user_id): 1 for user_id in user_ids}, settings.DATABASE_REPLICA_PIN_SECONDS)
+    except RedisError:
+        logger.warning('Replica pin not stored for %s', user_ids, exc_info=True)
+
+
+def is_pinned(user_id) -> bool:
+    try:
+        return cache.get(pin_key(user_id)) is not None
+    except RedisError:
+        return True
+
+
+class RequestUser:
+    '''
+    The user of the current request, as far as routing is concerned. Authentication reports the
+    id once it has validated the token (see ``route_user``), and whether the user is pinned is
+    only looked up when the request first reads from the database.
+    '''
+
+    def __init__(self):
+        self.id = None
+        self.pinned = None
+
+    def is_pinned(self) -> bool:
+        if self.id is None:
+            return False
+        if self.pinned is None:
+            self.pinned = is_pinned(self.id)
+
+        return self.pinned
+
+
+def route_user(user_id) -> None:
+    '''
+    Tell the routing of the current request which user it is for.
+    '''
+
+    request_user = _request_user.get()
+    if request_user is not None:
+        request_user.id = user_id
+
+
+class ReplicaRouter:
+    '''
+    Database router sending reads to a random replica inside ``read_from_replicas`` blocks and
+    everything else to the primary. Reads inside a transaction, and reads of a request whose
+    user is pinned, stay on the primary, so they see the recent writes.
+    '''
+
+    def db_for_read(self, model, **hints):
+        if not settings.DATABASE_REPLICAS or not _read_from_replicas.get():
+            return 'default'
+        if connections['default'].in_atomic_block:
+            return 'default'
+
+        request_user = _request_user.get()
+        if request_user is not None and request_user.is_pinned():
+            return 'default'
+
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaRoutingMiddleware:
+    '''
+    Serve safe requests from the replicas, unless the user wrote something in the last
+    ``DATABASE_REPLICA_PIN_SECONDS``, and pin users to the primary after a successful write
+    (a like, review, rent, favorite or any other unsafe request).
+
+    The user comes from the token the view's authentication validated (see ``route_user``), so
+    the token is checked once, and the pin is only read by requests that query the database.
+    '''
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        request_user = RequestUser()
+        safe = request.method in SAFE_METHODS
+
+        token = _request_user.set(request_user)
+        try:
+            with read_from_replicas(safe):
+                response = self.get_response(request)
+        finally:
+            _request_user.reset(token)
+
+        if request_user.id is not None and not safe and response.status_code < 400:
+            pin_to_primary(request_user.id)
+        return response
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        request_user = RequestUser()
+        safe = request.method in SAFE_METHODS
+
+        token = _request_user.set(request_user)
+        try:
+            with read_from_replicas(safe):
+                response = await self.get_response(request)
+        finally:
+            _request_user.reset(token)
+
+        if request_user.id is not None and not safe and response.status_code < 400:
+            await apin_to_primary(request_user.id)
+        return response
@@ -0,0 +1,185 @@
+import time
+import logging
+
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+from django.conf import settings
+from django.db import connections
+
+from rest_framework.serializers import ModelSerializer
+
+from .metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+TRANSACTION_CONTROL = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+_current_metrics = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    '''
+    Database and serializer work done while handling one request.
+    Installed as an ``execute_wrapper`` on every database connection.
+    '''
+
+    def __init__(self):
+        self.view = None
+        self.total = 0.0
+        self.queries = 0
+        self.sql_time = 0.0
+        self.statements = Counter()
+        self.timings = Counter()
+        self.active = set()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if not sql.startswith(TRANSACTION_CONTROL):
+                self.sql_time += time.perf_counter() - started
+                self.queries += 1
+                self.statements[(sql, repr(params))] += 1
+
+    @property
+    def duplicates(self) -> int:
+        return sum(count - 1 for count in self.statements.values() if count > 1)
+
+    def server_timing(self, total: float) -> str:
+        parts = [f'db;dur={self.sql_time * 1000:.2f};desc="{self.queries} queries, {self.duplicates} duplicates"']
+        for name, duration in sorted(self.timings.items()):
+            parts.append(f'{name};dur={duration * 1000:.2f}')
+        parts.append(f'total;dur={total * 1000:.2f}')
+
+        return ', '.join(parts)
+
+
+@contextmanager
+def measure(name: str):
+    '''
+    Add the time spent in the block to the current request's ``name`` timing.
+    Nested blocks with the same name are only counted once.
+    '''
+
+    metrics = _current_metrics.get()
+    if metrics is None or name in metrics.active:
+        yield
+        return
+
+    metrics.active.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.timings[name] += time.perf_counter() - started
+        metrics.active.discard(name)
+
+
+class InstrumentedModelSerializer(ModelSerializer):
+    '''
+    ModelSerializer that reports its representation time as the ``serializer`` timing of the request.
+    '''
+
+    def to_representation(self, instance):
+        with measure('serializer'):
+            return super().to_representation(instance)
+
+
+class QueryInstrumentationMiddleware:
+    '''
+    Record query count, SQL time, duplicate queries and serializer time for every request,
+    expose them in a ``Server-Timing`` header, a structured log line and the Prometheus
+    metrics, and flag views that exceed their entry in ``QUERY_BUDGETS``.
+    '''
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        started = time.perf_counter()
+
+        try:
+            with self.instrument_connections(metrics):
+                response = self.get_response(request)
+        finally:
+            _current_metrics.reset(token)
+
+        response = self.finish(request, response, metrics, started)
+        Metrics.record_request(metrics.view, request.method, response.status_code, metrics.total, metrics.queries)
+        return response
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current_metrics.set(metrics)
+        started = time.perf_counter()
+
+        # Database connections belong to the thread that runs the request's sync code,
+        # so the wrappers are installed and removed from that thread.
+        stack = await sync_to_async(self.instrument_connections)(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            _current_metrics.reset(token)
+
+        response = self.finish(request, response, metrics, started)
+        await sync_to_async(Metrics.record_request, thread_sensitive=False)(
+            metrics.view, request.method, response.status_code, metrics.total, metrics.queries,
+        )
+        return response
+
+    @staticmethod
+    def instrument_connections(metrics: RequestMetrics) -> ExitStack:
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(metrics))
+
+        return stack
+
+    @staticmethod
+    def finish(request, response, metrics: RequestMetrics, started: float):
+        total = metrics.total = time.perf_counter() - started
+        match = getattr(request, 'resolver_match', None)
+        view_class = getattr(match.func, 'view_class', None) if match else None
+        metrics.view = view_class.__name__ if view_class else None
+
+        response['Server-Timing'] = metrics.server_timing(total)
+        response.query_metrics = metrics
+
+        budget = settings.QUERY_BUDGETS.get(metrics.view)
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': metrics.view,
+            'status': response.status_code,
+            'queries': metrics.queries,
+            'duplicate_queries': metrics.duplicates,
+            'sql_ms': round(metrics.sql_time * 1000, 2),
+            'serializer_ms': round(metrics.timings['serializer'] * 1000, 2),
+            'total_ms': round(total * 1000, 2),
+            'query_budget': budget,
+        }
+
+        level = logging.WARNING if budget is not None and metrics.queries > budget else logging.INFO
+        logger.log(
+            level, '%s %s %d queries in %.1f ms', request.method, request.path,
+            metrics.queries, record['sql_ms'], extra=record,
+        )
+
+        return response
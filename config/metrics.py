@@ -0,0 +1,251 @@
+import time
+import hmac
+import logging
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+from redis.exceptions import RedisError
+
+from .redis import get_broker_redis, get_redis
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+WAIT_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600)
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# name: (type, help, histogram buckets)
+METRICS = {
+    'celery_task_duration_seconds': ('histogram', 'Run time of Celery tasks.', DURATION_BUCKETS),
+    'celery_task_queue_wait_seconds': ('histogram', 'Time from publishing a task to its start.', WAIT_BUCKETS),
+    'celery_tasks_total': ('counter', 'Finished Celery task runs by state (success, failure, retry).', None),
+    'celery_task_failures_total': ('counter', 'Failed Celery task runs by exception.', None),
+    'celery_task_rows_total': ('counter', 'Rows handled by Celery tasks that return a row count.', None),
+    'celery_task_last_success_timestamp_seconds': ('gauge', 'Unix time of the last successful run.', None),
+    'http_requests_total': ('counter', 'Handled requests by view, method and status.', None),
+    'http_request_duration_seconds': ('histogram', 'Time to handle a request.', REQUEST_BUCKETS),
+    'http_request_db_queries_total': ('counter', 'Database queries run by requests.', None),
+}
+
+
+class Metrics:
+    '''
+    Prometheus metrics shared by the web and worker processes through Redis.
+
+    Every metric is a hash under ``metrics:<name>`` whose fields are rendered label sets (plus
+    ``|<le>``, ``|sum`` and ``|count`` for histograms, whose buckets are stored per bucket and
+    summed at render time). Writes of one event go in a single pipeline, and a Redis error only
+    loses that event. Broker queue lengths are read when the metrics are scraped.
+    '''
+
+    @staticmethod
+    def get_key(name: str) -> str:
+        return f'metrics:{name}'
+
+    @staticmethod
+    def get_labels(**labels) -> str:
+        return ','.join(
+            '{}="{}"'.format(name, str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+            for name, value in labels.items()
+        )
+
+    @staticmethod
+    def increment(pipe, name: str, labels: str, amount: float = 1) -> None:
+        pipe.hincrbyfloat(Metrics.get_key(name), labels, amount)
+
+    @staticmethod
+    def set(pipe, name: str, labels: str, value: float) -> None:
+        pipe.hset(Metrics.get_key(name), labels, value)
+
+    @staticmethod
+    def observe(pipe, name: str, labels: str, value: float) -> None:
+        key = Metrics.get_key(name)
+        bucket = next((le for le in METRICS[name][2] if value <= le), None)
+
+        if bucket is not None:
+            pipe.hincrby(key, f'{labels}|{bucket}', 1)
+        pipe.hincrbyfloat(key, f'{labels}|sum', value)
+        pipe.hincrby(key, f'{labels}|count', 1)
+
+    @staticmethod
+    def format_value(value: float) -> str:
+        '''
+        Render a sample value without losing precision, e.g. of Unix timestamps.
+        '''
+
+        return str(int(value)) if value.is_integer() else repr(value)
+
+    @staticmethod
+    def record(write) -> None:
+        '''
+        Run ``write(pipe)`` and send its commands in one round trip.
+        '''
+
+        try:
+            pipe = get_redis().pipeline(transaction=False)
+            write(pipe)
+            pipe.execute()
+        except RedisError:
+            logger.warning('Metrics not recorded', exc_info=True)
+
+    @staticmethod
+    def record_request(view: str | None, method: str, status: int, duration: float, queries: int) -> None:
+        if not settings.METRICS_ENABLED:
+            return
+
+        labels = Metrics.get_labels(view=view or '', method=method)
+
+        def write(pipe):
+            Metrics.increment(pipe, 'http_requests_total', Metrics.get_labels(view=view or '', method=method, status=status))
+            Metrics.observe(pipe, 'http_request_duration_seconds', labels, duration)
+            Metrics.increment(pipe, 'http_request_db_queries_total', labels, queries)
+
+        Metrics.record(write)
+
+    @staticmethod
+    def get_queue_lengths() -> dict[str, int]:
+        '''
+        Messages waiting in every Celery queue, over all of its priority steps. The Redis
+        transport keeps priority ``n`` of queue ``q`` in the list ``q<sep>n``, and priority 0 in ``q``.
+        '''
+
+        options = settings.CELERY_BROKER_TRANSPORT_OPTIONS
+        pipe = get_broker_redis().pipeline(transaction=False)
+
+        for queue in settings.CELERY_TASK_QUEUES:
+            for priority in options['priority_steps']:
+                pipe.llen(f'{queue.name}{options["sep"]}{priority}' if priority else queue.name)
+
+        lengths = iter(pipe.execute())
+        return {
+            queue.name: sum(next(lengths) for _ in options['priority_steps'])
+            for queue in settings.CELERY_TASK_QUEUES
+        }
+
+    @staticmethod
+    def render() -> str:
+        '''
+        All metrics in the Prometheus text exposition format.
+        '''
+
+        pipe = get_redis().pipeline(transaction=False)
+        for name in METRICS:
+            pipe.hgetall(Metrics.get_key(name))
+
+        lines = []
+        for (name, (kind, description, buckets)), values in zip(METRICS.items(), pipe.execute()):
+            lines += [f'# HELP {name} {description}', f'# TYPE {name} {kind}']
+            values = {field.decode(): float(value) for field, value in values.items()}
+
+            if kind != 'histogram':
+                lines += [f'{name}{{{labels}}} {Metrics.format_value(value)}' for labels, value in sorted(values.items())]
+                continue
+
+            for labels in sorted({field.rsplit('|', 1)[0] for field in values}):
+                total = 0.0
+                for le in buckets:
+                    total += values.get(f'{labels}|{le}', 0)
+                    lines.append(f'{name}_bucket{{{labels},le="{le}"}} {Metrics.format_value(total)}')
+                count = Metrics.format_value(values.get(f'{labels}|count', 0.0))
+                lines += [
+                    f'{name}_bucket{{{labels},le="+Inf"}} {count}',
+                    f'{name}_sum{{{labels}}} {Metrics.format_value(values.get(f"{labels}|sum", 0.0))}',
+                    f'{name}_count{{{labels}}} {count}',
+                ]
+
+        lines += ['# HELP celery_queue_length Messages waiting in a Celery queue.', '# TYPE celery_queue_length gauge']
+        try:
+            lengths = Metrics.get_queue_lengths()
+        except RedisError:
+            logger.warning('Celery queue lengths unavailable', exc_info=True)
+            lengths = {}
+        lines += [f'celery_queue_length{{{Metrics.get_labels(queue=queue)}}} {length}' for queue, length in lengths.items()]
+
+        return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request) -> HttpResponse:
+    '''
+    Prometheus scrape endpoint. Scrapers must send ``METRICS_TOKEN`` as a bearer token; without
+    a token set the endpoint is closed.
+    '''
+
+    token = settings.METRICS_TOKEN
+    if token is None or not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponseForbidden()
+
+    try:
+        content = Metrics.render()
+    except RedisError:
+        logger.warning('Metrics unavailable', exc_info=True)
+        return HttpResponse('Metrics unavailable\n', status=503, content_type='text/plain')
+
+    return HttpResponse(content, content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# Celery signal handlers, connected in config/celery.py, doing nothing unless METRICS_ENABLED.
+# Start times are kept per process, by task id, between task_prerun and task_postrun.
+_started = {}
+
+
+def stamp_task(headers=None, **kwargs) -> None:
+    '''
+    before_task_publish: note when the message was sent, to measure its time in the queue.
+    '''
+
+    if settings.METRICS_ENABLED and headers is not None:
+        headers.setdefault('sent_at', time.time())
+
+
+def start_task(task_id=None, task=None, **kwargs) -> None:
+    '''
+    task_prerun
+    '''
+
+    if not settings.METRICS_ENABLED:
+        return
+
+    _started[task_id] = time.monotonic()
+
+    sent_at = getattr(task.request, 'sent_at', None)
+    if sent_at is not None:
+        labels = Metrics.get_labels(task=task.name)
+        Metrics.record(lambda pipe: Metrics.observe(pipe, 'celery_task_queue_wait_seconds', labels, max(time.time() - float(sent_at), 0)))
+
+
+def finish_task(task_id=None, task=None, retval=None, state=None, **kwargs) -> None:
+    '''
+    task_postrun: record the run time and outcome, and the rows handled when the task returns a count.
+    '''
+
+    if not settings.METRICS_ENABLED:
+        return
+
+    started = _started.pop(task_id, None)
+    labels = Metrics.get_labels(task=task.name)
+    state = (state or 'unknown').lower()
+
+    def write(pipe):
+        if started is not None:
+            Metrics.observe(pipe, 'celery_task_duration_seconds', labels, time.monotonic() - started)
+        Metrics.increment(pipe, 'celery_tasks_total', Metrics.get_labels(task=task.name, state=state))
+
+        if state == 'success':
+            Metrics.set(pipe, 'celery_task_last_success_timestamp_seconds', labels, time.time())
+            if isinstance(retval, int) and not isinstance(retval, bool):
+                Metrics.increment(pipe, 'celery_task_rows_total', labels, retval)
+
+    Metrics.record(write)
+
+
+def count_task_failure(sender=None, exception=None, **kwargs) -> None:
+    '''
+    task_failure
+    '''
+
+    if not settings.METRICS_ENABLED:
+        return
+
+    labels = Metrics.get_labels(task=sender.name, exception=type(exception).__name__)
+    Metrics.record(lambda pipe: Metrics.increment(pipe, 'celery_task_failures_total', labels))
@@ -0,0 +1,43 @@
+import redis
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+_client = None
+_broker_client = None
+
+
+def get_redis() -> redis.Redis:
+    '''
+    Return the shared client for application state kept in Redis outside the cache
+    (timers, buffers, counters). Connections come from one pool per process.
+    '''
+
+    global _client
+
+    if _client is None:
+        _client = redis.Redis.from_url(settings.REDIS_STORE_URL, **settings.REDIS_STORE_OPTIONS)
+    return _client
+
+
+def get_broker_redis() -> redis.Redis:
+    '''
+    Return a client for the Celery broker database, used to inspect queues (not to publish).
+    '''
+
+    global _broker_client
+
+    if _broker_client is None:
+        _broker_client = redis.Redis.from_url(settings.CELERY_BROKER_URL, **settings.REDIS_STORE_OPTIONS)
+    return _broker_client
+
+
+@receiver(setting_changed)
+def reset_redis(*, setting, **kwargs) -> None:
+    global _client, _broker_client
+
+    if setting in ('REDIS_STORE_URL', 'REDIS_STORE_OPTIONS'):
+        _client = None
+    if setting in ('CELERY_BROKER_URL', 'REDIS_STORE_OPTIONS'):
+        _broker_client = None
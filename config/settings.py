@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+import copy
 
 from pathlib import Path
 
@@ -18,6 +19,8 @@ from datetime import timedelta
 
 from dotenv import load_dotenv, find_dotenv
 
+from kombu import Queue
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -46,6 +49,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     'rest_framework',
     'rest_framework_simplejwt',
@@ -57,6 +61,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'config.instrumentation.QueryInstrumentationMiddleware',
+    'config.db_router.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -98,9 +104,43 @@ DATABASES = {
         'PASSWORD': 'aAzZ9999',
         'HOST': 'localhost',
         'PORT': '5432',
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Connection pooling: each process keeps a psycopg pool of DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE
+# connections, health-checked on checkout (CONN_HEALTH_CHECKS). Size it per process type:
+# a web worker needs about as many connections as it runs threads, a prefork Celery worker
+# child needs one or two. With DB_POOL=0 (e.g. behind PgBouncer) connections persist for
+# DB_CONN_MAX_AGE seconds instead.
+if os.getenv('DB_POOL', '1') == '1':
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+            'max_idle': 300,
+            'max_lifetime': 1800,
+        },
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE', 60))
+
+# Read replicas: one alias per host in DB_REPLICA_HOSTS (comma separated). Safe requests read
+# from a random replica; a user who just wrote something reads from the primary for
+# DATABASE_REPLICA_PIN_SECONDS. Tests run the replicas as mirrors of the test database.
+DATABASE_REPLICAS = []
+for index, host in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    DATABASES[f'replica{index}'] = {
+        **copy.deepcopy(DATABASES['default']),
+        'HOST': host.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{index}')
+
+DATABASE_ROUTERS = ['config.db_router.ReplicaRouter']
+DATABASE_REPLICA_PIN_SECONDS = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -136,14 +176,31 @@ USE_TZ = True
 # Rest Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_RENDERER_CLASSES': (
         'rest_framework.renderers.JSONRenderer',
     ),
+    # Token bucket rates per view scope (apps/books/throttling.py): '<scope>' per user,
+    # '<scope>_ip' per client IP
+    'DEFAULT_THROTTLE_RATES': {
+        'likes': '30/min',
+        'likes_ip': '120/min',
+        'rents': '5/min',
+        'rents_ip': '20/min',
+        'reviews': '10/min',
+        'reviews_ip': '40/min',
+    },
+    # Proxies in front of the app that append to X-Forwarded-For. Client IPs for throttling are
+    # read that many entries from the right, or from REMOTE_ADDR when 0, so clients cannot
+    # choose their IP with a forged header.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 0)),
 }
 
+# Where throttle buckets live: 'redis' (shared, atomic Lua script) or 'memory' (per process)
+THROTTLE_BACKEND = os.getenv('THROTTLE_BACKEND', 'redis')
+
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
@@ -159,18 +216,159 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Image renditions: fixed-size (width, height) crops of covers and avatars, made in Celery
+# and stored next to the original in every format below.
+IMAGE_RENDITION_FORMATS = ('webp', 'jpeg')
+IMAGE_RENDITIONS_SCHEDULE_TIMEOUT = 60 * 10
+BOOKS_IMAGE_RENDITIONS = {'thumb': (160, 240), 'medium': (400, 600)}
+USERS_AVATAR_RENDITIONS = {'thumb': (64, 64), 'medium': (256, 256)}
+
+# Book rents
+BOOKS_RENT_DURATION = timedelta(days=14)
+
+# Rent expiry: 'database' sweeps overdue rents on every run, 'redis' pops them from a
+# sorted-set timer and leaves the full sweep to the hourly safety net.
+BOOKS_RENT_EXPIRY_BACKEND = os.getenv('BOOKS_RENT_EXPIRY_BACKEND', 'database')
+BOOKS_RENT_EXPIRY_BATCH_SIZE = 1000
+BOOKS_RENT_EXPIRY_TIME_BUDGET = 10
+
+# Book stats: counters are kept up to date by every event, the daily job only repairs drift.
+BOOKS_STATS_RECONCILE_BATCH_SIZE = 1000
+
+# Book files upload
+BOOKS_FILE_MAX_SIZE = 50 * 1024 * 1024
+BOOKS_UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024
+BOOKS_UPLOAD_TEMP_DIR = BASE_DIR / 'tmp' / 'uploads'
+BOOKS_UPLOAD_EXPIRY = timedelta(days=1)
+
+# Bulk catalog imports: rows validated, deduplicated and loaded per batch.
+BOOKS_IMPORT_BATCH_SIZE = 2000
+# Uploads to the import endpoint run within the request: their size and the rejected rows reported back are capped.
+BOOKS_IMPORT_MAX_SIZE = 10 * 1024 * 1024
+BOOKS_IMPORT_REPORT_LIMIT = 100
+
+# Streaming exports: rows fetched per server-side cursor round trip, bytes per response chunk.
+BOOKS_EXPORT_CHUNK_SIZE = 2000
+BOOKS_EXPORT_BUFFER_SIZE = 64 * 1024
+
+# Book files delivery: None streams through Django, 'x-accel-redirect' (nginx) or
+# 'x-sendfile' (Apache) hand the transfer to the web server after the rental check.
+BOOKS_FILE_OFFLOAD = os.getenv('BOOKS_FILE_OFFLOAD') or None
+BOOKS_FILE_ACCEL_PREFIX = '/protected-media/'
+
+# Paged reading: text extracted from book files in Celery, stored in gzipped chunks of pages.
+BOOKS_PAGES_DIR = os.getenv('BOOKS_PAGES_DIR', BASE_DIR / 'data' / 'pages')
+BOOKS_PAGES_PER_CHUNK = 16
+BOOKS_PAGE_MAX_CHARS = 3000
+BOOKS_PAGES_SCHEDULE_TIMEOUT = 60 * 10
+BOOKS_PAGES_RETRY_AFTER = 5
+BOOKS_PAGES_CACHE_MAX_AGE = 60 * 60
+
+# Redis
+REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379')
+REDIS_STORE_URL = f'{REDIS_URL}/2'
+REDIS_STORE_OPTIONS = {}
+
+# Cache
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': f'{REDIS_URL}/1',
+    }
+}
+BOOKS_CACHE_TIMEOUT = 60 * 5
+BOOKS_ENTITLEMENTS_CACHE_TIMEOUT = 60 * 60
+
+# Authenticated users are resolved from a cached principal (apps/users/authentication.py):
+# a per-process LRU in front of Redis. Other processes see role or password changes once
+# their local entry expires.
+AUTH_USER_CACHE_TIMEOUT = 60 * 5
+AUTH_USER_LOCAL_CACHE_TTL = 5
+AUTH_USER_LOCAL_CACHE_SIZE = 10000
+
 # Celery
-CELERY_BROKER_URL = 'redis://localhost:6379/0'
-CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
+CELERY_BROKER_URL = f'{REDIS_URL}/0'
+CELERY_RESULT_BACKEND = f'{REDIS_URL}/0'
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'Europe/Kiev'
 
+# Task topology: each queue is consumed by its own worker service (docker-compose.yaml), so a
+# long maintenance or rendering task never delays rent expiry or payments. Within a queue,
+# messages with a lower priority number are delivered first (Redis priority steps 0-9).
+CELERY_TASK_QUEUES = (
+    Queue('critical'),
+    Queue('default'),
+    Queue('media'),
+    Queue('maintenance'),
+)
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+CELERY_TASK_DEFAULT_PRIORITY = 5
+CELERY_TASK_ROUTES = {
+    'apps.books.tasks.check_rent_status': {'queue': 'critical', 'priority': 0},
+    'apps.books.tasks.drain_stripe_events': {'queue': 'critical', 'priority': 1},
+    'apps.books.tasks.extract_book_pages': {'queue': 'media', 'priority': 5},
+    'apps.books.tasks.generate_book_image_renditions': {'queue': 'media', 'priority': 3},
+    'apps.users.tasks.generate_avatar_renditions': {'queue': 'media', 'priority': 3},
+    'apps.books.tasks.delete_stale_uploads': {'queue': 'maintenance', 'priority': 5},
+    'apps.books.tasks.reconcile_book_stats': {'queue': 'maintenance', 'priority': 9},
+}
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'priority_steps': list(range(10)),
+    'sep': ':',
+    'queue_order_strategy': 'priority',
+    # Unacknowledged messages are redelivered after this long, so it must exceed the longest time limit
+    'visibility_timeout': 60 * 60 * 2,
+}
+
+# Every task is idempotent, so messages are acknowledged after the task ran and redelivered
+# if the worker dies. One prefetched message per process keeps long tasks from holding back
+# others; the critical worker, whose tasks are short, raises it with --prefetch-multiplier.
+CELERY_TASK_ACKS_LATE = True
+CELERY_TASK_REJECT_ON_WORKER_LOST = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+# Time limits in seconds: the soft one raises SoftTimeLimitExceeded in the task, the hard one kills it
+CELERY_TASK_SOFT_TIME_LIMIT = 60 * 5
+CELERY_TASK_TIME_LIMIT = 60 * 5 + 30
+CELERY_TASK_ANNOTATIONS = {
+    'apps.books.tasks.check_rent_status': {'soft_time_limit': 45, 'time_limit': 55},
+    'apps.books.tasks.drain_stripe_events': {'soft_time_limit': 45, 'time_limit': 55},
+    'apps.books.tasks.generate_book_image_renditions': {'soft_time_limit': 60, 'time_limit': 90},
+    'apps.users.tasks.generate_avatar_renditions': {'soft_time_limit': 60, 'time_limit': 90},
+    'apps.books.tasks.extract_book_pages': {'soft_time_limit': 60 * 5, 'time_limit': 60 * 6},
+    'apps.books.tasks.delete_stale_uploads': {'soft_time_limit': 60 * 10, 'time_limit': 60 * 11},
+    'apps.books.tasks.reconcile_book_stats': {'soft_time_limit': 60 * 30, 'time_limit': 60 * 32},
+}
+
+# Periodic runs expire before the next one is due, so a backlog does not pile up duplicates
 CELERY_BEAT_SCHEDULE = {
     'expire-overdue-rents-everyday': {
         'task': 'apps.books.tasks.check_rent_status',
         'schedule': timedelta(seconds=60),
+        'options': {'expires': 55},
+    },
+    'sweep-overdue-rents-hourly': {
+        'task': 'apps.books.tasks.check_rent_status',
+        'schedule': timedelta(hours=1),
+        'kwargs': {'full_sweep': True},
+        'options': {'expires': 60 * 55},
+    },
+    'drain-stripe-events-every-minute': {
+        'task': 'apps.books.tasks.drain_stripe_events',
+        'schedule': timedelta(minutes=1),
+        'options': {'expires': 55},
+    },
+    'delete-stale-uploads-hourly': {
+        'task': 'apps.books.tasks.delete_stale_uploads',
+        'schedule': timedelta(hours=1),
+        'options': {'expires': 60 * 55},
+    },
+    'reconcile-book-stats-daily': {
+        'task': 'apps.books.tasks.reconcile_book_stats',
+        'schedule': timedelta(days=1),
+        'options': {'expires': 60 * 60 * 23},
     },
 }
 
@@ -179,3 +377,54 @@ STRIPE_API_KEY = os.getenv('STRIPE_API_KEY')
 STRIPE_WEBHOOK_SECRET = os.getenv('STRIPE_WEBHOOK_SECRET')
 STRIPE_SUCCESS_URL = 'http://127.0.0.1:8000/pay/success?session_id={CHECKOUT_SESSION_ID}'
 STRIPE_CANCEL_URL = 'http://127.0.0.1:8000/pay/cancel'
+
+# Stripe client: pooled keep-alive connections, (connect, read) timeouts in seconds, and a
+# circuit breaker that fails fast for STRIPE_BREAKER_RESET_TIMEOUT seconds after repeated outages.
+# STRIPE_API_BASE points the client at a local stand-in such as stripe-mock.
+STRIPE_API_BASE = os.getenv('STRIPE_API_BASE') or None
+STRIPE_POOL_SIZE = 10
+STRIPE_TIMEOUT = (3.05, 10)
+STRIPE_MAX_NETWORK_RETRIES = 2
+STRIPE_BREAKER_FAILURES = 5
+STRIPE_BREAKER_RESET_TIMEOUT = 30
+STRIPE_PRICE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Verified webhook events are buffered in Redis and turned into rentals in batches of this size.
+STRIPE_WEBHOOK_BATCH_SIZE = 500
+# A drain that has not renewed its lease for this long is taken for dead, and the sessions
+# it was processing are put back into the buffer. Keep it above the drain task's time limit.
+STRIPE_WEBHOOK_DRAIN_LEASE = 120
+
+# Query instrumentation: every request reports its queries, SQL time and serializer time
+# in a Server-Timing header and a log line. Views with a budget here are flagged when they
+# exceed it, and apps/books/tests/test_query_budgets.py fails the build.
+QUERY_BUDGETS = {
+    'BooksAPIListView': 2,
+    'BookSearchAPIView': 4,
+    'BookAPIDetailView': 2,
+    'BookAPIReadView': 3,
+    'BookReviewsListView': 2,
+    'FavoriteBookListView': 2,
+    'LikeBookView': 6,
+    'AsyncBooksListView': 1,
+    'AsyncBookDetailView': 1,
+    'AsyncBookReadView': 3,
+}
+
+# Prometheus metrics at /metrics (config/metrics.py), kept in Redis so web and worker processes
+# report together. Scrapers send METRICS_TOKEN as a bearer token; without one the endpoint is
+# closed. METRICS_ENABLED=0 stops recording request and task metrics.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN') or None
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'config': {'handlers': ['console'], 'level': 'INFO'},
+        'apps': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
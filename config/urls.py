@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from .metrics import metrics_view
+
 from drf_spectacular.views import (
     SpectacularAPIView,
     SpectacularSwaggerView,
@@ -14,7 +16,9 @@ urlpatterns = [
     path('api/v2/', include('api.v2.urls')),
     path('api/v3/', include('api.v3.urls')),
     path('api/v4/', include('api.v4.urls')),
+    path('api/v5/', include('api.v5.urls')),
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path('api/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+    path('metrics', metrics_view, name='metrics'),
 ]
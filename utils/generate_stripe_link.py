@@ -1,9 +1,5 @@
-import stripe
+from utils.payments import get_payments_client
 
-from django.conf import settings
-
-
-stripe.api_key = settings.STRIPE_API_KEY
 
 def create_checkout_session(user, order):
     '''
@@ -13,7 +9,7 @@ def create_checkout_session(user, order):
     :return:
     '''
 
-    session = stripe.checkout.Session.create(
+    session = get_payments_client().create_checkout_session(
         payment_method_types=['card'],
         line_items=[
             {
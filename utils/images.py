@@ -0,0 +1,182 @@
+import io
+import os
+import hashlib
+import logging
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from kombu.exceptions import OperationalError
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+
+
+class ImageRenditions:
+    '''
+    Fixed-size WebP/JPEG renditions of an uploaded image, stored next to the original.
+
+    A model keeps them in a ``renditions`` JSON field::
+
+        {'source': 'books_images/cover.png', 'sizes': {'thumb': {'webp': 'books_images/cover_thumb.webp', ...}}}
+
+    ``source`` is the image the renditions were made from, so they are stale as soon as the
+    image changes. Generation runs in Celery on upload; images uploaded before are queued by
+    ``backfill`` (see the ``backfill_renditions`` command).
+    '''
+
+    @staticmethod
+    def is_stale(instance, field: str) -> bool:
+        image = getattr(instance, field)
+        return (image.name or None) != (instance.renditions or {}).get('source')
+
+    @staticmethod
+    def get_urls(instance, field: str, request=None) -> dict | None:
+        '''
+        URLs of the current renditions, by size and format.
+        :param instance:
+        :param field: name of the image field
+        :param request: used to build absolute URLs, like DRF does for the image itself
+        :return: None when the image has no up-to-date renditions
+        '''
+
+        image = getattr(instance, field)
+        if not image or ImageRenditions.is_stale(instance, field):
+            return None
+
+        urls = {}
+        for size, names in instance.renditions.get('sizes', {}).items():
+            urls[size] = {}
+            for format, name in names.items():
+                url = image.storage.url(name)
+                urls[size][format] = request.build_absolute_uri(url) if request is not None else url
+
+        return urls
+
+    @staticmethod
+    def schedule(instance, field: str, task: str) -> None:
+        '''
+        Queue ``task`` (dotted path of a Celery task taking the primary key) to refresh stale renditions.
+        Requests are deduplicated per image for a few minutes, so busy list pages queue one task per image.
+        :param instance:
+        :param field:
+        :param task:
+        :return:
+        '''
+
+        if not ImageRenditions.is_stale(instance, field):
+            return
+
+        source = getattr(instance, field).name or ''
+        key = f'images:renditions:{instance._meta.label_lower}:{instance.pk}:{hashlib.sha1(source.encode()).hexdigest()}'
+
+        try:
+            if not cache.add(key, 1, settings.IMAGE_RENDITIONS_SCHEDULE_TIMEOUT):
+                return
+            import_string(task).delay(str(instance.pk))
+        except (RedisError, OperationalError):
+            logger.warning('Renditions of %s %s not queued', instance._meta.label, instance.pk, exc_info=True)
+
+    @staticmethod
+    def backfill(queryset, field: str, task: str, batch_size: int = 1000) -> int:
+        '''
+        Queue ``task`` for every instance of ``queryset`` with an image and stale renditions.
+        :param queryset:
+        :param field:
+        :param task:
+        :param batch_size:
+        :return: number of instances with stale renditions
+        '''
+
+        queryset = queryset.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True}).only('pk', field, 'renditions')
+
+        stale = 0
+        for instance in queryset.iterator(chunk_size=batch_size):
+            if ImageRenditions.is_stale(instance, field):
+                ImageRenditions.schedule(instance, field, task)
+                stale += 1
+
+        return stale
+
+    @staticmethod
+    def generate(instance, field: str, sizes: dict) -> dict | None:
+        '''
+        Render every size in every format of ``IMAGE_RENDITION_FORMATS`` and store them, then drop
+        the renditions of the previous image. Nothing is stored if the image changed meanwhile.
+        :param instance:
+        :param field:
+        :param sizes: ``{name: (width, height)}``
+        :return: the new ``renditions`` value, or None if the image changed meanwhile
+        '''
+
+        image = getattr(instance, field)
+        storage = image.storage
+        previous = ImageRenditions.get_names(instance.renditions)
+
+        renditions = {}
+        if image:
+            renditions = {'source': image.name, 'sizes': {}}
+            root = os.path.splitext(image.name)[0]
+
+            try:
+                with image.open('rb'), Image.open(image) as original:
+                    original = ImageOps.exif_transpose(original)
+                    for size, dimensions in sizes.items():
+                        resized = ImageOps.fit(original, tuple(dimensions), Image.Resampling.LANCZOS)
+                        renditions['sizes'][size] = {
+                            format: storage.save(
+                                f'{root}_{size}.{EXTENSIONS[format]}',
+                                ContentFile(ImageRenditions.encode(resized, format)),
+                            )
+                            for format in settings.IMAGE_RENDITION_FORMATS
+                        }
+            except (OSError, UnidentifiedImageError, Image.DecompressionBombError):
+                logger.warning('Renditions of %s %s failed', instance._meta.label, instance.pk, exc_info=True)
+
+        current = Q(**{field: image.name}) if image else Q(**{field: ''}) | Q(**{f'{field}__isnull': True})
+        updated = type(instance).objects.filter(current, pk=instance.pk).update(renditions=renditions)
+
+        stored = ImageRenditions.get_names(renditions)
+        for name in (previous - stored) if updated else (stored - previous):
+            storage.delete(name)
+
+        if not updated:
+            return None
+
+        instance.renditions = renditions
+        return renditions
+
+    @staticmethod
+    def encode(image: Image.Image, format: str) -> bytes:
+        has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+
+        if format == 'jpeg':
+            if has_alpha:
+                rgba = image.convert('RGBA')
+                image = Image.new('RGB', rgba.size, (255, 255, 255))
+                image.paste(rgba, mask=rgba.getchannel('A'))
+            else:
+                image = image.convert('RGB')
+            options = {'quality': 85, 'optimize': True, 'progressive': True}
+        else:
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+            options = {'quality': 80, 'method': 4}
+
+        output = io.BytesIO()
+        image.save(output, format=format.upper(), **options)
+        return output.getvalue()
+
+    @staticmethod
+    def get_names(renditions: dict | None) -> set[str]:
+        return {
+            name
+            for names in (renditions or {}).get('sizes', {}).values()
+            for name in names.values()
+        }
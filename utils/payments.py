@@ -0,0 +1,191 @@
+import time
+import logging
+import threading
+
+import requests
+import stripe
+
+from requests.adapters import HTTPAdapter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+
+class PaymentsUnavailable(Exception):
+    '''
+    Raised without calling Stripe while the circuit breaker is open.
+    '''
+
+
+class CircuitBreaker:
+    '''
+    Stop calling Stripe after ``failure_threshold`` consecutive outages, then let a single
+    trial request through every ``reset_timeout`` seconds until one succeeds.
+    '''
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    def before_call(self) -> None:
+        with self.lock:
+            if self.opened_at is None:
+                return
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                raise PaymentsUnavailable('Payments are temporarily unavailable')
+            self.opened_at = time.monotonic()
+
+    def record_success(self) -> None:
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning('Stripe circuit breaker opened after %d failures', self.failures)
+                self.opened_at = time.monotonic()
+
+
+class PaymentsClient:
+    '''
+    Stripe client shared by every payment flow.
+
+    Requests go through one pooled keep-alive session with bounded connect and read timeouts,
+    Stripe's idempotent network retries, and a circuit breaker that fails fast while Stripe is
+    down. Book prices are created once as reusable Stripe Price objects and their ids cached.
+    '''
+
+    # Errors that say Stripe is unreachable or failing, as opposed to a rejected request.
+    outage_errors = (stripe.APIConnectionError, stripe.APIError, stripe.RateLimitError)
+
+    def __init__(self, client: stripe.StripeClient, breaker: CircuitBreaker):
+        self.client = client
+        self.breaker = breaker
+
+    @classmethod
+    def from_settings(cls) -> 'PaymentsClient':
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.STRIPE_POOL_SIZE)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+
+        client = stripe.StripeClient(
+            settings.STRIPE_API_KEY,
+            http_client=stripe.RequestsClient(session=session, timeout=settings.STRIPE_TIMEOUT),
+            max_network_retries=settings.STRIPE_MAX_NETWORK_RETRIES,
+            base_addresses={'api': settings.STRIPE_API_BASE} if settings.STRIPE_API_BASE else {},
+        )
+        breaker = CircuitBreaker(settings.STRIPE_BREAKER_FAILURES, settings.STRIPE_BREAKER_RESET_TIMEOUT)
+
+        return cls(client, breaker)
+
+    def call(self, method, params: dict):
+        '''
+        Call a Stripe service method through the circuit breaker.
+        :param method:
+        :param params:
+        :return:
+        '''
+
+        self.breaker.before_call()
+        try:
+            result = method(params=params)
+        except self.outage_errors:
+            self.breaker.record_failure()
+            raise
+
+        self.breaker.record_success()
+        return result
+
+    def create_checkout_session(self, **params) -> stripe.checkout.Session:
+        return self.call(self.client.checkout.sessions.create, params)
+
+    def get_book_price(self, book) -> str:
+        '''
+        Return the id of the Stripe Price for the book's current price, creating it on first use.
+        :param book:
+        :return:
+        '''
+
+        unit_amount = int(book.price * 100)
+        lookup_key = f'book:{book.uuid}:{unit_amount}'
+        cache_key = f'payments:price:{lookup_key}'
+
+        try:
+            price_id = cache.get(cache_key)
+        except RedisError:
+            price_id = None
+        if price_id:
+            return price_id
+
+        prices = self.call(self.client.prices.list, {'lookup_keys': [lookup_key], 'limit': 1})
+        if prices.data:
+            price_id = prices.data[0].id
+        else:
+            price_id = self.call(self.client.prices.create, {
+                'currency': 'usd',
+                'unit_amount': unit_amount,
+                'lookup_key': lookup_key,
+                'product_data': {'name': book.title},
+            }).id
+
+        try:
+            cache.set(cache_key, price_id, settings.STRIPE_PRICE_CACHE_TIMEOUT)
+        except RedisError:
+            logger.warning('Stripe price %s not cached', price_id, exc_info=True)
+
+        return price_id
+
+    def create_book_checkout_session(self, book, user) -> stripe.checkout.Session:
+        '''
+        Create the checkout session for renting a book.
+        :param book:
+        :param user:
+        :return:
+        '''
+
+        return self.create_checkout_session(
+            payment_method_types=['card'],
+            line_items=[{'price': self.get_book_price(book), 'quantity': 1}],
+            mode='payment',
+            success_url=settings.STRIPE_SUCCESS_URL,
+            cancel_url=settings.STRIPE_CANCEL_URL,
+            client_reference_id=str(user.id),
+            metadata={'book_uuid': str(book.uuid), 'user_id': str(user.id)},
+        )
+
+
+_payments_client = None
+
+
+def get_payments_client() -> PaymentsClient:
+    '''
+    Return the process-wide payments client, so every request reuses its connection pool.
+    '''
+
+    global _payments_client
+
+    if _payments_client is None:
+        _payments_client = PaymentsClient.from_settings()
+
+    return _payments_client
+
+
+@receiver(setting_changed)
+def reset_payments_client(*, setting, **kwargs) -> None:
+    global _payments_client
+
+    if setting.startswith('STRIPE_'):
+        _payments_client = None